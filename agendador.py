@@ -0,0 +1,176 @@
+# agendador.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from metricas import BUCKETS_PADRAO, registro
+
+# Análises executadas ao mesmo tempo (por processo); JOBS_MAX_WORKERS é o nome antigo
+AGENDADOR_CAPACIDADE = int(os.environ.get("AGENDADOR_CAPACIDADE", os.environ.get("JOBS_MAX_WORKERS", "2")))
+# Vagas que o lote nunca ocupa: sempre sobra espaço para uma consulta interativa
+AGENDADOR_RESERVA_INTERATIVA = int(os.environ.get("AGENDADOR_RESERVA_INTERATIVA", "1"))
+# Itens de lote aguardando vaga antes de o servidor responder 503; 0 desliga.
+# Sem valor: AGENDADOR_FILA_LOTE_POR_VAGA itens por vaga do lote, folga para vários clientes em rodízio
+AGENDADOR_FILA_LOTE_MAXIMA = os.environ.get("AGENDADOR_FILA_LOTE_MAXIMA")
+AGENDADOR_FILA_LOTE_POR_VAGA = int(os.environ.get("AGENDADOR_FILA_LOTE_POR_VAGA", "4"))
+# Retry-After sugerido enquanto ainda não há duração medida de análises de lote (segundos)
+AGENDADOR_RETRY_AFTER_PADRAO = int(os.environ.get("AGENDADOR_RETRY_AFTER_PADRAO", "30"))
+
+espera_agendador = registro.histograma(
+    "agendador_espera_segundos", "Tempo na fila do agendador até a análise começar", ("classe",),
+    buckets=BUCKETS_PADRAO + (600, 1800, 3600))
+
+
+class AgendadorAnalises:
+    """Executa análises com duas classes de prioridade: interativa e lote.
+
+    Interativas saem primeiro e podem usar todas as vagas; o lote usa no
+    máximo capacidade - reserva_interativa, então uma consulta do formulário
+    nunca espera um lote de 500 pessoas terminar — no máximo espera uma
+    análise em andamento acabar, se todas as vagas estiverem ocupadas. Dentro
+    do lote, os clientes (um por lote_id) são atendidos em rodízio.
+
+    A fila do lote é limitada (fila_lote_maxima): com ela cheia,
+    lote_saturado() avisa o app para recusar com 503 + Retry-After em vez de
+    enfileirar sem fim, e estimar_espera_lote() sugere quanto esperar.
+
+    As threads só nascem no primeiro submit (preload_app/fork).
+    """
+
+    INTERATIVA = "interativa"
+    LOTE = "lote"
+
+    def __init__(self, capacidade=AGENDADOR_CAPACIDADE, reserva_interativa=AGENDADOR_RESERVA_INTERATIVA,
+                 fila_lote_maxima=AGENDADOR_FILA_LOTE_MAXIMA):
+        self.capacidade = max(capacidade, 1)
+        # Com uma vaga só, reservá-la pararia o lote de vez
+        self.reserva_interativa = min(max(reserva_interativa, 0), self.capacidade - 1)
+        self.vagas_lote = self.capacidade - self.reserva_interativa
+        if fila_lote_maxima is None:
+            fila_lote_maxima = AGENDADOR_FILA_LOTE_POR_VAGA * self.vagas_lote
+        self.fila_lote_maxima = max(int(fila_lote_maxima), 0)
+        self._cond = threading.Condition()
+        self._interativas = deque()
+        self._lote = OrderedDict()  # cliente -> deque de itens, na ordem do rodízio
+        self._ativos = {self.INTERATIVA: 0, self.LOTE: 0}
+        self._executadas = {self.INTERATIVA: 0, self.LOTE: 0}
+        self._duracao_media = {self.INTERATIVA: None, self.LOTE: None}
+        self._threads = []
+
+    def _garantir_trabalhadores(self):
+        if not self._threads:
+            for i in range(self.capacidade):
+                thread = threading.Thread(target=self._trabalhar, name=f"agendador-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submeter(self, funcao, *args, prioridade=INTERATIVA, cliente=None, **kwargs):
+        """Enfileira funcao(*args, **kwargs) e retorna um Future"""
+        classe = self.LOTE if prioridade == self.LOTE else self.INTERATIVA
+        futuro = Future()
+        item = (futuro, funcao, args, kwargs, time.monotonic())
+        with self._cond:
+            self._garantir_trabalhadores()
+            if classe == self.INTERATIVA:
+                self._interativas.append(item)
+            else:
+                self._lote.setdefault(cliente or "padrao", deque()).append(item)
+            self._cond.notify()
+        # Cancelado antes de começar: sai da fila na hora, em vez de esperar um trabalhador descartá-lo
+        futuro.add_done_callback(lambda f: f.cancelled() and self._retirar(classe, cliente or "padrao", item))
+        return futuro
+
+    def _retirar(self, classe, cliente, item):
+        with self._cond:
+            fila = self._interativas if classe == self.INTERATIVA else self._lote.get(cliente)
+            posicao = next((i for i, outro in enumerate(fila or ()) if outro is item), None)
+            if posicao is None:
+                return
+            del fila[posicao]
+            if classe == self.LOTE and not fila:
+                del self._lote[cliente]
+
+    def executar(self, funcao, *args, prioridade=INTERATIVA, cliente=None, **kwargs):
+        """submeter() e espera o resultado na thread de quem chamou"""
+        return self.submeter(funcao, *args, prioridade=prioridade, cliente=cliente, **kwargs).result()
+
+    def _proximo(self):
+        # Chamado com o lock
+        if self._interativas:
+            return self.INTERATIVA, self._interativas.popleft()
+        if self._lote and self._ativos[self.LOTE] < self.capacidade - self.reserva_interativa:
+            cliente, fila = next(iter(self._lote.items()))
+            item = fila.popleft()
+            if fila:
+                self._lote.move_to_end(cliente)
+            else:
+                del self._lote[cliente]
+            return self.LOTE, item
+        return None
+
+    def _trabalhar(self):
+        while True:
+            with self._cond:
+                proximo = self._proximo()
+                while proximo is None:
+                    self._cond.wait()
+                    proximo = self._proximo()
+                classe, (futuro, funcao, args, kwargs, enfileirado) = proximo
+                self._ativos[classe] += 1
+
+            inicio = time.monotonic()
+            espera_agendador.observar(inicio - enfileirado, classe=classe)
+            try:
+                if futuro.set_running_or_notify_cancel():
+                    try:
+                        futuro.set_result(funcao(*args, **kwargs))
+                    except BaseException as e:
+                        futuro.set_exception(e)
+            finally:
+                duracao = time.monotonic() - inicio
+                with self._cond:
+                    self._ativos[classe] -= 1
+                    self._executadas[classe] += 1
+                    media = self._duracao_media[classe]
+                    self._duracao_media[classe] = duracao if media is None else 0.8 * media + 0.2 * duracao
+                    # Uma vaga de lote liberada pode destravar outro trabalhador
+                    self._cond.notify_all()
+
+    def _fila_lote(self):
+        # Chamado com o lock
+        return sum(len(fila) for fila in self._lote.values())
+
+    def lote_saturado(self):
+        """A fila do lote atingiu fila_lote_maxima (0 = sem limite)"""
+        with self._cond:
+            return self.fila_lote_maxima > 0 and self._fila_lote() >= self.fila_lote_maxima
+
+    def estimar_espera_lote(self):
+        """Segundos até a fila atual do lote andar, pela duração média das análises de lote"""
+        with self._cond:
+            media = self._duracao_media[self.LOTE]
+            if media is None:
+                return AGENDADOR_RETRY_AFTER_PADRAO
+            return max(1, math.ceil(media * (self._fila_lote() + 1) / self.vagas_lote))
+
+    def estatisticas(self):
+        with self._cond:
+            return {
+                'capacidade': self.capacidade,
+                'reserva_interativa': self.reserva_interativa,
+                'fila_interativa': len(self._interativas),
+                'fila_lote': self._fila_lote(),
+                'fila_lote_maxima': self.fila_lote_maxima,
+                'clientes_lote': len(self._lote),
+                'ativas_interativa': self._ativos[self.INTERATIVA],
+                'ativas_lote': self._ativos[self.LOTE],
+                'executadas_interativa': self._executadas[self.INTERATIVA],
+                'executadas_lote': self._executadas[self.LOTE],
+            }
+
+
+agendador_analises = AgendadorAnalises()
+registro.coletor("agendador", agendador_analises.estatisticas)
@@ -1,9 +1,14 @@
 # app.py - ATUALIZAR A CONFIGURAÇÃO DO BANCO
 import os
+import io
+import csv
+import functools
 import json
-from datetime import datetime
+import time
+import uuid
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context, url_for
 
 
 load_dotenv()
@@ -14,6 +19,12 @@ if not DATABASE_URL:
 if DATABASE_URL.startswith('postgres://'):
     DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://', 1)
 
+# Reaproveita a última análise salva da pessoa se tiver até essa idade (segundos; 0 = sempre analisa de novo).
+# Pode ser sobrescrito por requisição com o campo "idade_maxima".
+ANALISE_IDADE_MAXIMA = int(os.environ.get("ANALISE_IDADE_MAXIMA", "0"))
+# Máximo de pessoas por chamada a /api/analises/lote
+LOTE_MAX_PESSOAS = int(os.environ.get("LOTE_MAX_PESSOAS", "1000"))
+
 app = Flask(__name__)
 app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
@@ -39,8 +50,15 @@ try:
 except Exception as e:
     print(f"❌ Erro nos models: {e}")
 
+from checkpoints import chave_pessoa
+from agendador import agendador_analises
+from coalescencia import coalescedor_analises
+from jobs import gerenciador_jobs
+from metricas import duracao_http, duracao_persistencia, erros, registro
+from motor_lote import MotorLote
+
 try:
-    from buscar import executar_analise
+    from buscar import executar_analise, obter_analisador
     BUSCAR_AVAILABLE = True
     print("✅ buscar.py carregado com sucesso")
 except ImportError as e:
@@ -48,6 +66,27 @@ except ImportError as e:
 except Exception as e:
     print(f"❌ Erro ao carregar buscar.py: {e}")
 
+# ========== MÉTRICAS ==========
+@app.before_request
+def _iniciar_cronometro():
+    g.inicio_requisicao = time.monotonic()
+
+@app.after_request
+def _registrar_duracao(response):
+    inicio = getattr(g, 'inicio_requisicao', None)
+    if inicio is not None:
+        # Usa o padrão da rota (/analises/<int:analise_id>) para não explodir a cardinalidade
+        rota = request.url_rule.rule if request.url_rule else "nao_encontrada"
+        duracao_http.observar(time.monotonic() - inicio, rota=rota, metodo=request.method,
+                              status=response.status_code)
+        if response.status_code >= 500:
+            erros.inc(componente="http")
+    return response
+
+@app.route("/metrics")
+def metricas():
+    return Response(registro.exportar(), mimetype="text/plain; version=0.0.4")
+
 # ========== ROTAS ==========
 @app.route("/")
 def home():
@@ -64,6 +103,80 @@ def listar_analises():
         print(f"❌ Erro ao listar análises: {e}")
         return render_template("listar_analises.html", analises=[])
 
+def _analise_para_dict(analise):
+    """AnalisePessoaDB (com polêmicas e empresas) no formato de detalhes.html e da API"""
+    # Buscar polêmicas e empresas relacionadas
+    polemicas = PolemicaDB.query.filter_by(analise_pessoa_id=analise.id).all()
+    empresas = EmpresaAssociadaDB.query.filter_by(analise_pessoa_id=analise.id).all()
+    
+    # Processar fontes consultadas
+    fontes_consultadas = []
+    if analise.fontes_consultadas:
+        try:
+            fontes_consultadas = json.loads(analise.fontes_consultadas)
+        except:
+            fontes_consultadas = []
+    
+    # Processar tweets relevantes
+    tweets_relevantes = []
+    if analise.tweets_relevantes:
+        try:
+            tweets_relevantes = json.loads(analise.tweets_relevantes)
+        except:
+            tweets_relevantes = []
+    
+    # Montar dicionário da análise com todos os campos
+    analise_dict = {
+        'id': analise.id,
+        'nome': analise.nome,
+        'cargo': analise.cargo,
+        'data_analise': analise.data_analise,
+        'resumo_analise': analise.resumo_analise or '',
+        'risco_reputacao': analise.risco_reputacao or 'desconhecido',
+        'recomendacoes': analise.recomendacoes,
+        'total_polemicas': analise.total_polemicas if hasattr(analise, 'total_polemicas') else len(polemicas),
+        'fontes_consultadas': fontes_consultadas,
+        'tweets_relevantes': tweets_relevantes,
+        'polemicas': [],
+        'empresas_associadas': []
+    }
+    
+    # Processar polêmicas com todos os campos possíveis
+    for p in polemicas:
+        polemica_dict = {
+            'titulo': p.titulo or 'Sem título',
+            'descricao': p.descricao or 'Sem descrição',
+            'gravidade': p.gravidade or 'media',
+            'categoria': p.categoria,
+            'fonte_url': p.fonte_url,
+            'fonte': p.fonte_url if p.fonte_url else None,
+            'impacto_publico': getattr(p, 'impacto_publico', None),
+            'impacto': getattr(p, 'impacto', None),
+            'data_publicacao': getattr(p, 'data_publicacao', None),
+            'evidencias': []
+        }
+    
+        # Tentar extrair evidências se existirem
+        if hasattr(p, 'evidencias') and p.evidencias:
+            try:
+                polemica_dict['evidencias'] = json.loads(p.evidencias) if isinstance(p.evidencias, str) else p.evidencias
+            except:
+                polemica_dict['evidencias'] = []
+    
+        analise_dict['polemicas'].append(polemica_dict)
+    
+    # Processar empresas associadas
+    for e in empresas:
+        empresa_dict = {
+            'nome_empresa': e.nome_empresa,
+            'cnpj': e.cnpj,
+            'relacao': e.relacao,
+            'fonte_url': e.fonte_url
+        }
+        analise_dict['empresas_associadas'].append(empresa_dict)
+    
+    return analise_dict
+
 @app.route("/analises/<int:analise_id>")
 def detalhar_analise(analise_id):
     if not MODELS_AVAILABLE:
@@ -74,75 +187,7 @@ def detalhar_analise(analise_id):
         if not analise:
             return render_template("detalhes.html", analise=None)
         
-        # Buscar polêmicas e empresas relacionadas
-        polemicas = PolemicaDB.query.filter_by(analise_pessoa_id=analise_id).all()
-        empresas = EmpresaAssociadaDB.query.filter_by(analise_pessoa_id=analise_id).all()
-        
-        # Processar fontes consultadas
-        fontes_consultadas = []
-        if analise.fontes_consultadas:
-            try:
-                fontes_consultadas = json.loads(analise.fontes_consultadas)
-            except:
-                fontes_consultadas = []
-        
-        # Processar tweets relevantes
-        tweets_relevantes = []
-        if analise.tweets_relevantes:
-            try:
-                tweets_relevantes = json.loads(analise.tweets_relevantes)
-            except:
-                tweets_relevantes = []
-        
-        # Montar dicionário da análise com todos os campos
-        analise_dict = {
-            'id': analise.id,
-            'nome': analise.nome,
-            'cargo': analise.cargo,
-            'data_analise': analise.data_analise,
-            'resumo_analise': analise.resumo_analise or '',
-            'risco_reputacao': analise.risco_reputacao or 'desconhecido',
-            'recomendacoes': analise.recomendacoes,
-            'total_polemicas': analise.total_polemicas if hasattr(analise, 'total_polemicas') else len(polemicas),
-            'fontes_consultadas': fontes_consultadas,
-            'tweets_relevantes': tweets_relevantes,
-            'polemicas': [],
-            'empresas_associadas': []
-        }
-        
-        # Processar polêmicas com todos os campos possíveis
-        for p in polemicas:
-            polemica_dict = {
-                'titulo': p.titulo or 'Sem título',
-                'descricao': p.descricao or 'Sem descrição',
-                'gravidade': p.gravidade or 'media',
-                'categoria': p.categoria,
-                'fonte_url': p.fonte_url,
-                'fonte': p.fonte_url if p.fonte_url else None,
-                'impacto_publico': getattr(p, 'impacto_publico', None),
-                'impacto': getattr(p, 'impacto', None),
-                'data_publicacao': getattr(p, 'data_publicacao', None),
-                'evidencias': []
-            }
-            
-            # Tentar extrair evidências se existirem
-            if hasattr(p, 'evidencias') and p.evidencias:
-                try:
-                    polemica_dict['evidencias'] = json.loads(p.evidencias) if isinstance(p.evidencias, str) else p.evidencias
-                except:
-                    polemica_dict['evidencias'] = []
-            
-            analise_dict['polemicas'].append(polemica_dict)
-        
-        # Processar empresas associadas
-        for e in empresas:
-            empresa_dict = {
-                'nome_empresa': e.nome_empresa,
-                'cnpj': e.cnpj,
-                'relacao': e.relacao,
-                'fonte_url': e.fonte_url
-            }
-            analise_dict['empresas_associadas'].append(empresa_dict)
+        analise_dict = _analise_para_dict(analise)
         
         return render_template("detalhes.html", analise=analise_dict)
         
@@ -152,6 +197,147 @@ def detalhar_analise(analise_id):
         traceback.print_exc()
         return render_template("detalhes.html", analise=None)
 
+def salvar_analise_db(resultado, nome, cargo):
+    """Persiste a análise (com polêmicas e empresas) e retorna o id.
+
+    Precisa de app context; em caso de erro faz rollback e relança.
+    """
+    with duracao_persistencia.medir():
+        return _salvar_analise_db(resultado, nome, cargo)
+
+def _salvar_analise_db(resultado, nome, cargo):
+    try:
+        nova_analise = AnalisePessoaDB(
+            nome=resultado.get('nome', nome),
+            cargo=cargo,
+            data_analise=datetime.now(),
+            fontes_consultadas=json.dumps(resultado.get('fontes_consultadas', []), ensure_ascii=False),
+            resumo_analise=resultado.get('resumo_analise', ''),
+            risco_reputacao=resultado.get('risco_reputacao', 'desconhecido'),
+            recomendacoes=resultado.get('recomendacoes', ''),
+            tweets_relevantes=json.dumps(resultado.get('tweets_relevantes', []), ensure_ascii=False),
+            total_polemicas=len(resultado.get('polemicas', []))
+        )
+        db.session.add(nova_analise)
+        db.session.flush()
+        analise_id = nova_analise.id
+        
+        for polemica_data in resultado.get('polemicas', []):
+            polemica = PolemicaDB(
+                analise_pessoa_id=analise_id,
+                titulo=polemica_data.get('titulo', '')[:255],
+                descricao=polemica_data.get('descricao', ''),
+                gravidade=polemica_data.get('gravidade', 'media'),
+                categoria=polemica_data.get('categoria', 'Outros'),
+                fonte_url=polemica_data.get('fonte_url') or polemica_data.get('fonte', '')
+            )
+            db.session.add(polemica)
+        
+        for empresa_data in resultado.get('empresas_associadas', []):
+            empresa = EmpresaAssociadaDB(
+                analise_pessoa_id=analise_id,
+                nome_empresa=empresa_data.get('nome_empresa', ''),
+                cnpj=empresa_data.get('cnpj', ''),
+                relacao=empresa_data.get('relacao', ''),
+                fonte_url=empresa_data.get('fonte_url', '')
+            )
+            db.session.add(empresa)
+        
+        db.session.commit()
+        print(f"✅ Análise salva com ID: {analise_id}")
+        return analise_id
+    except Exception:
+        db.session.rollback()
+        erros.inc(componente="db")
+        raise
+
+def _sem_espacos(valor):
+    return ''.join((valor or '').lower().split())
+
+def _buscar_analise_recente(nome, cargo, idade_maxima):
+    """Última análise salva da pessoa (nome + cargo normalizados como chave_pessoa) se tiver até idade_maxima segundos"""
+    if not MODELS_AVAILABLE or idade_maxima <= 0:
+        return None
+    limite = datetime.now() - timedelta(seconds=idade_maxima)
+    chave = chave_pessoa(nome, cargo)
+    # O banco compara sem espaços nem caixa (normalização portátil entre SQLite e PostgreSQL);
+    # a chave_pessoa dos candidatos decide, com a mesma normalização dos dois lados
+    candidatas = (
+        AnalisePessoaDB.query
+        .filter(db.func.replace(db.func.lower(AnalisePessoaDB.nome), ' ', '') == _sem_espacos(nome))
+        .filter(db.func.replace(db.func.lower(db.func.coalesce(AnalisePessoaDB.cargo, '')), ' ', '') == _sem_espacos(cargo))
+        .filter(AnalisePessoaDB.data_analise >= limite)
+        .order_by(AnalisePessoaDB.data_analise.desc())
+        .all()
+    )
+    analise = next((a for a in candidatas if chave_pessoa(a.nome, a.cargo) == chave), None)
+    if analise is None:
+        return None
+    print(f"♻️  Reaproveitando análise {analise.id} de {nome} ({analise.data_analise:%d/%m/%Y %H:%M})")
+    analise_dict = _analise_para_dict(analise)
+    analise_dict['data_analise'] = analise.data_analise.isoformat() if analise.data_analise else None
+    return analise_dict
+
+def _idade_maxima(data):
+    valor = data.get("idade_maxima", request.args.get("idade_maxima"))
+    try:
+        return int(valor) if valor is not None else ANALISE_IDADE_MAXIMA
+    except (TypeError, ValueError):
+        return ANALISE_IDADE_MAXIMA
+
+def _analisar_e_salvar(nome, cargo, ao_mudar_fase=None):
+    """Análise completa + persistência. Falha ao salvar não descarta a análise: vem em 'erro'"""
+    resultado = executar_analise(nome, cargo, ao_mudar_fase=ao_mudar_fase)
+    if not resultado:
+        raise RuntimeError("Análise retornou vazio")
+    
+    analise_id = None
+    if MODELS_AVAILABLE:
+        if ao_mudar_fase:
+            ao_mudar_fase('persistencia')
+        try:
+            with app.app_context():
+                analise_id = salvar_analise_db(resultado, nome, cargo)
+        except Exception as e:
+            print(f"❌ Erro ao salvar: {e}")
+            import traceback
+            traceback.print_exc()
+            return {"id": None, "analise": resultado, "erro": str(e)}
+    return {"id": analise_id, "analise": resultado}
+
+def analisar_coalescido(nome, cargo, ao_mudar_fase=None, prioridade=agendador_analises.INTERATIVA, cliente=None):
+    """Pedidos simultâneos para a mesma pessoa (nome + cargo normalizados) compartilham uma única análise.
+
+    A ordem importa: primeiro o coalescedor, depois o agendador. Só o líder
+    entra na fila do agendador; seguidores esperam sem ocupar vaga, então
+    nunca seguram a vaga de que o próprio líder precisa. Os jobs
+    (GerenciadorJobs) fazem o mesmo com o mesmo coalescedor, sem bloquear
+    uma thread por seguidor.
+    """
+    aguardar = (lambda: ao_mudar_fase('aguardando_analise_em_andamento')) if ao_mudar_fase else None
+    saida, _ = coalescedor_analises.executar(
+        chave_pessoa(nome, cargo), agendador_analises.executar, _analisar_e_salvar, nome, cargo, ao_mudar_fase,
+        prioridade=prioridade, cliente=cliente, ao_aguardar=aguardar
+    )
+    return saida
+
+def _prioridade(data):
+    """Classe no agendador (interativa por padrão) e cliente para o rodízio entre lotes"""
+    valor = str(data.get("prioridade", request.args.get("prioridade", ""))).lower()
+    prioridade = agendador_analises.LOTE if valor == agendador_analises.LOTE else agendador_analises.INTERATIVA
+    return prioridade, data.get("lote_id") or request.remote_addr
+
+def _lote_saturado(prioridade, nome, cargo):
+    """Pedido de lote com a fila do lote cheia; quem só acompanharia uma análise em andamento não entra na fila"""
+    return (prioridade == agendador_analises.LOTE and agendador_analises.lote_saturado()
+            and not coalescedor_analises.em_voo(chave_pessoa(nome, cargo)))
+
+def _pedido_assincrono(data):
+    valor = data.get("async", request.args.get("async", False))
+    if isinstance(valor, str):
+        return valor.lower() in ("1", "true", "sim")
+    return bool(valor)
+
 @app.route("/api/analises", methods=["POST"])
 def criar_analise():
     data = request.get_json(force=True, silent=True)
@@ -166,7 +352,32 @@ def criar_analise():
     cargo = data.get("cargo", "")
     
     try:
-        resultado = executar_analise(nome, cargo)
+        recente = _buscar_analise_recente(nome, cargo, _idade_maxima(data))
+    except Exception as e:
+        print(f"⚠️ Não foi possível consultar análises recentes: {e}")
+        recente = None
+    if recente:
+        return jsonify({"status": "ok", "id": recente['id'], "analise": recente, "reaproveitada": True}), 200
+    
+    prioridade, cliente = _prioridade(data)
+    if _lote_saturado(prioridade, nome, cargo):
+        espera = agendador_analises.estimar_espera_lote()
+        resposta = jsonify({"error": "Fila de lote cheia, tente novamente mais tarde", "retry_after": espera})
+        resposta.headers["Retry-After"] = str(espera)
+        return resposta, 503
+    
+    if _pedido_assincrono(data):
+        # Falha ao salvar não descarta a análise: o job conclui com id None e o erro em resultado['erro']
+        job_id = gerenciador_jobs.submeter(functools.partial(_analisar_e_salvar, nome, cargo),
+                                           prioridade=prioridade, cliente=cliente, chave=chave_pessoa(nome, cargo),
+                                           nome=nome, cargo=cargo)
+        status_url = url_for("status_job_analise", job_id=job_id)
+        resposta = jsonify({"status": "aceito", "job_id": job_id, "status_url": status_url})
+        resposta.headers["Location"] = status_url
+        return resposta, 202
+    
+    try:
+        saida = analisar_coalescido(nome, cargo, prioridade=prioridade, cliente=cliente)
         print(f"✅ Busca executada para: {nome}")
     except Exception as e:
         print(f"❌ Erro na análise: {e}")
@@ -174,59 +385,144 @@ def criar_analise():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
     
-    if not resultado:
-        return jsonify({"error": "Análise retornou vazio"}), 500
+    if saida.get("erro"):
+        return jsonify({"status": "ok", "id": None, "error": saida["erro"], "analise": saida["analise"]}), 201
     
-    analise_id = None
-    if MODELS_AVAILABLE:
-        try:
-            nova_analise = AnalisePessoaDB(
-                nome=resultado.get('nome', nome),
-                cargo=cargo,
-                data_analise=datetime.now(),
-                fontes_consultadas=json.dumps(resultado.get('fontes_consultadas', []), ensure_ascii=False),
-                resumo_analise=resultado.get('resumo_analise', ''),
-                risco_reputacao=resultado.get('risco_reputacao', 'desconhecido'),
-                recomendacoes=resultado.get('recomendacoes', ''),
-                tweets_relevantes=json.dumps(resultado.get('tweets_relevantes', []), ensure_ascii=False),
-                total_polemicas=len(resultado.get('polemicas', []))
-            )
-            db.session.add(nova_analise)
-            db.session.flush()
-            analise_id = nova_analise.id
-            
-            for polemica_data in resultado.get('polemicas', []):
-                polemica = PolemicaDB(
-                    analise_pessoa_id=analise_id,
-                    titulo=polemica_data.get('titulo', '')[:255],
-                    descricao=polemica_data.get('descricao', ''),
-                    gravidade=polemica_data.get('gravidade', 'media'),
-                    categoria=polemica_data.get('categoria', 'Outros'),
-                    fonte_url=polemica_data.get('fonte_url') or polemica_data.get('fonte', '')
-                )
-                db.session.add(polemica)
-            
-            for empresa_data in resultado.get('empresas_associadas', []):
-                empresa = EmpresaAssociadaDB(
-                    analise_pessoa_id=analise_id,
-                    nome_empresa=empresa_data.get('nome_empresa', ''),
-                    cnpj=empresa_data.get('cnpj', ''),
-                    relacao=empresa_data.get('relacao', ''),
-                    fonte_url=empresa_data.get('fonte_url', '')
-                )
-                db.session.add(empresa)
-            
-            db.session.commit()
-            print(f"✅ Análise salva com ID: {analise_id}")
-            return jsonify({"status": "ok", "id": analise_id, "analise": resultado}), 201
-        except Exception as e:
-            db.session.rollback()
-            print(f"❌ Erro ao salvar: {e}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({"status": "ok", "id": None, "error": str(e), "analise": resultado}), 201
+    return jsonify({"status": "ok", "id": saida["id"], "analise": saida["analise"]}), 201
+
+@app.route("/api/analises/jobs/<job_id>", methods=["GET"])
+def status_job_analise(job_id):
+    job = gerenciador_jobs.obter(job_id)
+    if not job:
+        return jsonify({"error": "Job não encontrado"}), 404
+    
+    resposta = {
+        "job_id": job['id'],
+        "status": job['status'],
+        "fase": job['fase'],
+        "prioridade": job['prioridade'],
+        "nome": job['dados'].get('nome'),
+        "cargo": job['dados'].get('cargo'),
+        "criado_em": job['criado_em'],
+        "iniciado_em": job['iniciado_em'],
+        "concluido_em": job['concluido_em'],
+    }
+    if job['status'] == gerenciador_jobs.CONCLUIDO:
+        resposta["id"] = job['resultado']['id']
+        resposta["analise"] = job['resultado']['analise']
+        if job['resultado'].get("erro"):
+            resposta["error"] = job['resultado']["erro"]
+    elif job['status'] == gerenciador_jobs.ERRO:
+        resposta["error"] = job['erro']
+    return jsonify(resposta), 200
+
+def _linhas_csv(texto):
+    # Cabeçalhos como 'Nome,Cargo' (o relatorio_lote.csv do pack.py) valem como 'nome,cargo'
+    return [{(coluna or '').strip().lower(): valor for coluna, valor in linha.items()}
+            for linha in csv.DictReader(io.StringIO(texto))]
+
+def _ler_pessoas_lote():
+    """Lista de {'nome', 'cargo'} do corpo: JSON (formato do pesquisas.json) ou CSV (upload 'arquivo' ou text/csv)"""
+    if 'arquivo' in request.files:
+        linhas = _linhas_csv(request.files['arquivo'].read().decode('utf-8-sig'))
+    elif request.mimetype == 'text/csv':
+        linhas = _linhas_csv(request.get_data(as_text=True))
+    else:
+        dados = request.get_json(force=True, silent=True)
+        linhas = dados.get('pessoas') if isinstance(dados, dict) else dados
+        if not isinstance(linhas, list):
+            raise ValueError("Envie uma lista JSON de pessoas ou um CSV com a coluna 'nome'")
+    
+    pessoas = []
+    for posicao, linha in enumerate(linhas):
+        nome = (linha.get('nome') or '').strip() if isinstance(linha, dict) else ''
+        if len(nome) < 2:
+            raise ValueError(f"Pessoa na posição {posicao} sem 'nome' válido")
+        pessoas.append({'nome': nome, 'cargo': (linha.get('cargo') or '').strip()})
+    return pessoas
+
+def _persistir_lote(analise, nome, cargo):
+    with app.app_context():
+        return salvar_analise_db(analise, nome, cargo)
+
+def _linha_ndjson(registro_lote):
+    return json.dumps(registro_lote, ensure_ascii=False, default=str) + "\n"
+
+@app.route("/api/analises/lote", methods=["POST"])
+def criar_analises_lote():
+    """Analisa uma lista de pessoas no motor de lote e transmite o progresso em NDJSON.
+
+    Uma linha 'inicio', uma 'resultado' por pessoa (na ordem em que terminam,
+    com id, risco e total de polêmicas) e uma 'fim' com o resumo.
+    """
+    if not BUSCAR_AVAILABLE:
+        return jsonify({"error": "Sistema de busca indisponível"}), 500
+    
+    try:
+        pessoas = _ler_pessoas_lote()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+    if not pessoas:
+        return jsonify({"error": "Nenhuma pessoa informada"}), 400
+    if len(pessoas) > LOTE_MAX_PESSOAS:
+        return jsonify({"error": f"Máximo de {LOTE_MAX_PESSOAS} pessoas por lote"}), 413
+    
+    dados = request.get_json(silent=True) if request.is_json else None
+    dados = dados if isinstance(dados, dict) else {}
+    estado = dados.get("estado", request.args.get("estado", "Paraná"))
+    idade_maxima = _idade_maxima(dados)
+    lote_id = uuid.uuid4().hex
+    
+    def gerar():
+        inicio = time.monotonic()
+        contagem = {"ok": 0, "erro": 0, "reaproveitadas": 0}
+        yield _linha_ndjson({"tipo": "inicio", "lote_id": lote_id, "total": len(pessoas)})
+        
+        # Análises recentes o bastante saem na hora; o resto vai para o motor
+        pendentes = []
+        for posicao, pessoa in enumerate(pessoas):
+            try:
+                recente = _buscar_analise_recente(pessoa['nome'], pessoa['cargo'], idade_maxima)
+            except Exception as e:
+                print(f"⚠️ Não foi possível consultar análises recentes: {e}")
+                recente = None
+            if recente is None:
+                pendentes.append((posicao, pessoa))
+                continue
+            contagem["ok"] += 1
+            contagem["reaproveitadas"] += 1
+            yield _linha_ndjson({
+                "tipo": "resultado", "posicao": posicao, "nome": pessoa['nome'], "cargo": pessoa['cargo'],
+                "status": "ok", "id": recente['id'], "risco_reputacao": recente['risco_reputacao'],
+                "total_polemicas": recente['total_polemicas'], "reaproveitada": True,
+                "concluidas": contagem["ok"] + contagem["erro"], "total": len(pessoas),
+            })
+        
+        # Cada pessoa passa antes pelo coalescedor; as que o lote lidera usam uma vaga de lote no agendador
+        # (rodízio por lote_id, cedida quando outro lote espera) e, dentro dela, os pools do motor sobrepõem
+        # busca e LLM
+        motor = MotorLote(obter_analisador(), persistir=_persistir_lote if MODELS_AVAILABLE else None,
+                          agendador=agendador_analises, cliente=lote_id, coalescedor=coalescedor_analises)
+        for resultado in motor.processar([pessoa for _, pessoa in pendentes], estado):
+            posicao = pendentes[resultado['posicao']][0]
+            contagem[resultado['status']] += 1
+            yield _linha_ndjson({
+                "tipo": "resultado", "posicao": posicao, "nome": resultado['nome'], "cargo": resultado['cargo'],
+                "status": resultado['status'], "id": resultado['id'],
+                "risco_reputacao": resultado['risco_reputacao'], "total_polemicas": resultado['total_polemicas'],
+                "caminho_analise": resultado['caminho_analise'], "error": resultado['erro'],
+                "concluidas": contagem["ok"] + contagem["erro"], "total": len(pessoas),
+            })
+        
+        yield _linha_ndjson({
+            "tipo": "fim", "lote_id": lote_id, "total": len(pessoas),
+            "sucessos": contagem["ok"], "erros": contagem["erro"], "reaproveitadas": contagem["reaproveitadas"],
+            "duracao": round(time.monotonic() - inicio, 1), "etapas": motor.estatisticas(),
+        })
     
-    return jsonify({"status": "ok", "id": None, "analise": resultado}), 201
+    print(f"📦 Lote {lote_id[:8]}: {len(pessoas)} pessoas")
+    return Response(stream_with_context(gerar()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"})
 
 # ========== INICIALIZAÇÃO ==========
 def init_database():
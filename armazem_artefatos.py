@@ -0,0 +1,243 @@
+# armazem_artefatos.py
+import atexit
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+
+from cache_persistente import ConexaoSqlite
+from checkpoints import chave_pessoa
+from metricas import registro
+
+ARTEFATOS_DIR = os.environ.get("ARTEFATOS_DIR", "artefatos")
+ARTEFATOS_TAMANHO_SEGMENTO = int(os.environ.get("ARTEFATOS_TAMANHO_SEGMENTO", str(64 * 1024 * 1024)))
+ARTEFATOS_FILA_MAXIMA = int(os.environ.get("ARTEFATOS_FILA_MAXIMA", "1000"))
+ARTEFATOS_NIVEL_COMPRESSAO = int(os.environ.get("ARTEFATOS_NIVEL_COMPRESSAO", "6"))
+
+_PADRAO_SEGMENTO = re.compile(r'^segmento_(\d{6})\.jsonl\.gz$')
+
+
+class ArmazemArtefatos:
+    """Artefatos das análises (resultados brutos, análise final) fora do caminho da requisição.
+
+    gravar() só enfileira; uma thread escritora serializa cada registro em
+    JSON compacto, comprime como um membro gzip independente e anexa ao
+    segmento atual (segmento_NNNNNN.jsonl.gz), trocando de segmento ao passar
+    de tamanho_segmento. Como os membros são concatenados, `zcat` de um
+    segmento devolve JSONL. Um índice SQLite (pessoa, run, tipo, segmento,
+    offset) permite ler qualquer registro antigo sem descompactar o resto.
+    """
+
+    def __init__(self, diretorio=ARTEFATOS_DIR, tamanho_segmento=ARTEFATOS_TAMANHO_SEGMENTO,
+                 fila_maxima=ARTEFATOS_FILA_MAXIMA, nivel_compressao=ARTEFATOS_NIVEL_COMPRESSAO):
+        self.diretorio = diretorio
+        self.tamanho_segmento = tamanho_segmento
+        self.nivel_compressao = nivel_compressao
+        self._fila = queue.Queue(maxsize=fila_maxima)
+        self._thread = None
+        self._lock_thread = threading.Lock()
+        self._lock = threading.Lock()
+        self.gravados = 0
+        self.erros = 0
+        self.bytes_originais = 0
+        self.bytes_comprimidos = 0
+
+        self._banco = ConexaoSqlite(os.path.join(diretorio, "indice.db"), self._criar_tabelas)
+        # Descobertos no primeiro uso de cada processo (ver _segmento_atual)
+        self._numero_segmento = None
+        self._pid = None
+        self._lock_segmento = threading.Lock()
+
+    @staticmethod
+    def _criar_tabelas(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS artefatos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chave_pessoa TEXT NOT NULL,
+                nome TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                segmento TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                tamanho INTEGER NOT NULL,
+                tamanho_original INTEGER NOT NULL,
+                criado REAL NOT NULL
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_artefatos_pessoa ON artefatos (chave_pessoa, criado)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_artefatos_run ON artefatos (run_id)")
+
+    @property
+    def _conn(self):
+        self._segmento_atual()
+        return self._banco.obter()
+
+    def _segmento_atual(self):
+        # Com preload_app o objeto nasce no master: cada worker (e cada reciclagem) procura no disco
+        # o último segmento, que outros workers podem ter girado depois do fork
+        with self._lock_segmento:
+            if self._pid != os.getpid():
+                os.makedirs(self.diretorio, exist_ok=True)
+                self._numero_segmento = self._ultimo_segmento()
+                self._pid = os.getpid()
+            return self._numero_segmento
+
+    def _ultimo_segmento(self):
+        numeros = [
+            int(m.group(1)) for m in map(_PADRAO_SEGMENTO.match, os.listdir(self.diretorio)) if m
+        ]
+        return max(numeros, default=1)
+
+    def _caminho_segmento(self, numero):
+        return os.path.join(self.diretorio, f"segmento_{numero:06d}.jsonl.gz")
+
+    def _garantir_escritor(self):
+        # Criada só no primeiro uso: com preload_app a thread não pode nascer antes do fork
+        with self._lock_thread:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._escrever, name="armazem-artefatos", daemon=True)
+                self._thread.start()
+
+    def gravar(self, nome_pessoa, tipo, dados, run_id=None, cargo_publico=None):
+        """Enfileira o artefato e retorna o run_id usado (bloqueia só se a fila estiver cheia)"""
+        run_id = run_id or uuid.uuid4().hex
+        criado = time.time()
+        # Serializa já aqui: quem chamou pode continuar alterando `dados`
+        bruto = json.dumps(
+            {'nome': nome_pessoa, 'run_id': run_id, 'tipo': tipo, 'criado': criado, 'dados': dados},
+            ensure_ascii=False, separators=(',', ':'), default=str
+        ).encode('utf-8') + b'\n'
+        self._garantir_escritor()
+        self._fila.put({
+            'chave_pessoa': chave_pessoa(nome_pessoa, cargo_publico),
+            'nome': nome_pessoa,
+            'run_id': run_id,
+            'tipo': tipo,
+            'criado': criado,
+            'bruto': bruto,
+        })
+        return run_id
+
+    def _escrever(self):
+        while True:
+            itens = [self._fila.get()]
+            # Esvazia o que já estiver na fila: um único commit no índice por rajada
+            while len(itens) < 100:
+                try:
+                    itens.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._gravar_itens(itens)
+            except Exception as e:
+                with self._lock:
+                    self.erros += len(itens)
+                print(f"❌ Erro ao gravar {len(itens)} artefatos: {e}")
+            finally:
+                for _ in itens:
+                    self._fila.task_done()
+
+    def _gravar_itens(self, itens):
+        linhas_indice = []
+        caminho = self._caminho_segmento(self._segmento_atual())
+        arquivo = open(caminho, 'ab')
+        try:
+            for item in itens:
+                bruto = item['bruto']
+                comprimido = gzip.compress(bruto, compresslevel=self.nivel_compressao)
+
+                # Laço: o próximo segmento também pode já estar cheio (gravado por outro worker)
+                while arquivo.tell() > 0 and arquivo.tell() + len(comprimido) > self.tamanho_segmento:
+                    arquivo.close()
+                    self._numero_segmento += 1
+                    caminho = self._caminho_segmento(self._numero_segmento)
+                    arquivo = open(caminho, 'ab')
+                    print(f"🗂️  Novo segmento de artefatos: {caminho}")
+
+                offset = arquivo.tell()
+                arquivo.write(comprimido)
+                linhas_indice.append((
+                    item['chave_pessoa'], item['nome'], item['run_id'], item['tipo'],
+                    os.path.basename(caminho), offset, len(comprimido), len(bruto), item['criado']
+                ))
+                with self._lock:
+                    self.bytes_originais += len(bruto)
+                    self.bytes_comprimidos += len(comprimido)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        finally:
+            arquivo.close()
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO artefatos (chave_pessoa, nome, run_id, tipo, segmento, offset, tamanho, "
+                "tamanho_original, criado) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                linhas_indice
+            )
+            self._conn.commit()
+            self.gravados += len(linhas_indice)
+
+    def aguardar(self):
+        """Bloqueia até todos os artefatos enfileirados estarem em disco"""
+        if self._thread is not None:
+            self._fila.join()
+
+    def listar(self, nome_pessoa, cargo_publico=None, tipo=None, run_id=None):
+        """Metadados dos artefatos da pessoa, do mais recente para o mais antigo"""
+        consulta = "SELECT id, nome, run_id, tipo, segmento, tamanho, tamanho_original, criado FROM artefatos WHERE chave_pessoa = ?"
+        parametros = [chave_pessoa(nome_pessoa, cargo_publico)]
+        if tipo:
+            consulta += " AND tipo = ?"
+            parametros.append(tipo)
+        if run_id:
+            consulta += " AND run_id = ?"
+            parametros.append(run_id)
+        consulta += " ORDER BY criado DESC, id DESC"
+        with self._lock:
+            linhas = self._conn.execute(consulta, parametros).fetchall()
+        campos = ('id', 'nome', 'run_id', 'tipo', 'segmento', 'tamanho', 'tamanho_original', 'criado')
+        return [dict(zip(campos, linha)) for linha in linhas]
+
+    def ler(self, artefato_id):
+        """Registro completo (nome, run_id, tipo, criado, dados) ou None"""
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT segmento, offset, tamanho FROM artefatos WHERE id = ?", (artefato_id,)
+            ).fetchone()
+        if linha is None:
+            return None
+        segmento, offset, tamanho = linha
+        with open(os.path.join(self.diretorio, segmento), 'rb') as arquivo:
+            arquivo.seek(offset)
+            return json.loads(gzip.decompress(arquivo.read(tamanho)))
+
+    def ultimo(self, nome_pessoa, tipo, cargo_publico=None):
+        """Dados do artefato mais recente desse tipo para a pessoa, ou None"""
+        artefatos = self.listar(nome_pessoa, cargo_publico, tipo=tipo)
+        if not artefatos:
+            return None
+        return self.ler(artefatos[0]['id'])['dados']
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'na_fila': self._fila.qsize(),
+                'gravados': self.gravados,
+                'erros': self.erros,
+                'bytes_originais': self.bytes_originais,
+                'bytes_comprimidos': self.bytes_comprimidos,
+                'taxa_compressao': round(self.bytes_comprimidos / self.bytes_originais, 3) if self.bytes_originais else 0.0,
+                'segmento_atual': self._numero_segmento,
+            }
+
+
+armazem_artefatos = ArmazemArtefatos()
+registro.coletor("artefatos", armazem_artefatos.estatisticas)
+atexit.register(armazem_artefatos.aguardar)
@@ -0,0 +1,166 @@
+# backends_busca.py
+import json
+import os
+import random
+import threading
+import time
+from typing import List, Optional, Protocol
+
+from cache_persistente import gerar_chave
+from pool_clientes import pool_clientes
+
+# ddgs (padrão) | gravar (DDGS real + grava fixtures) | replay (serve fixtures, sem rede)
+BUSCA_BACKEND = os.environ.get("BUSCA_BACKEND", "ddgs")
+BUSCA_FIXTURES_DIR = os.environ.get("BUSCA_FIXTURES_DIR", "fixtures_busca")
+
+
+def _latencia_replay(valor):
+    """Sem valor (ou "gravada") o replay usa a latência de cada fixture; senão, segundos fixos"""
+    if valor is None or valor.strip().lower() in ("", "gravada"):
+        return None
+    return float(valor)
+
+
+BUSCA_REPLAY_LATENCIA = _latencia_replay(os.environ.get("BUSCA_REPLAY_LATENCIA"))
+BUSCA_REPLAY_VARIACAO = float(os.environ.get("BUSCA_REPLAY_VARIACAO", "0"))
+
+
+class BackendBusca(Protocol):
+    """Interface mínima usada pelo buscador (mesma assinatura de DDGS.text).
+
+    `usa_cache`: o buscador pode responder do cache_ddgs sem chamar text();
+    `usa_rede`: text() vai ao DuckDuckGo e passa pelo limitador/disjuntor.
+    """
+
+    usa_cache: bool
+    usa_rede: bool
+
+    def text(self, query: str, region: str, max_results: int, timelimit: Optional[str]) -> List[dict]:
+        ...
+
+
+class FixtureAusente(KeyError):
+    pass
+
+
+def _caminho_fixture(diretorio, query, region, max_results, timelimit):
+    return os.path.join(diretorio, f"{gerar_chave(query, region, max_results, timelimit)}.json")
+
+
+def _criar_ddgs():
+    from ddgs import DDGS
+    return DDGS()
+
+
+# A sessão HTTP do DDGS não é thread-safe: uma por thread, reaproveitada entre buscas
+pool_clientes.registrar('ddgs', _criar_ddgs, por_thread=True)
+
+
+class BackendDDGS:
+    """Backend real: instâncias DDGS do pool de clientes (uma por thread)"""
+
+    usa_cache = True
+    usa_rede = True
+
+    def text(self, query, region, max_results, timelimit):
+        return list(pool_clientes.obter('ddgs').text(
+            query=query,
+            region=region,
+            max_results=max_results,
+            timelimit=timelimit
+        ))
+
+
+class BackendGravacao:
+    """Repassa as buscas para outro backend e grava cada resposta (ou erro) como fixture.
+
+    Sem cache: uma query respondida pelo cache não viraria fixture.
+    """
+
+    usa_cache = False
+    usa_rede = True
+
+    def __init__(self, backend, diretorio=BUSCA_FIXTURES_DIR):
+        self.backend = backend
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def text(self, query, region, max_results, timelimit):
+        registro = {
+            'query': query,
+            'region': region,
+            'max_results': max_results,
+            'timelimit': timelimit,
+        }
+        inicio = time.time()
+        try:
+            resultados = self.backend.text(query, region, max_results, timelimit)
+            registro['resultados'] = resultados
+            return resultados
+        except Exception as e:
+            registro['erro'] = {'tipo': type(e).__name__, 'mensagem': str(e)}
+            raise
+        finally:
+            registro['latencia'] = round(time.time() - inicio, 3)
+            caminho = _caminho_fixture(self.diretorio, query, region, max_results, timelimit)
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump(registro, f, ensure_ascii=False)
+
+
+class BackendReplay:
+    """Serve fixtures gravadas, sem rede, com latência configurável.
+
+    latencia=None usa a latência gravada em cada fixture; erros gravados são
+    relançados com o mesmo nome de exceção (ex.: RatelimitException).
+    Não passa pelo cache nem pelo limitador. Fixture ausente é FixtureAusente
+    com estrito=True; senão devolve [] com aviso e conta em `ausentes`.
+    """
+
+    usa_cache = False
+    usa_rede = False
+
+    def __init__(self, diretorio=BUSCA_FIXTURES_DIR, latencia=BUSCA_REPLAY_LATENCIA,
+                 variacao=BUSCA_REPLAY_VARIACAO, estrito=False, semente=0):
+        self.diretorio = diretorio
+        self.latencia = latencia
+        self.variacao = variacao
+        self.estrito = estrito
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self.ausentes = 0
+
+    def text(self, query, region, max_results, timelimit):
+        caminho = _caminho_fixture(self.diretorio, query, region, max_results, timelimit)
+        if not os.path.exists(caminho):
+            if self.estrito:
+                raise FixtureAusente(query)
+            with self._lock:
+                self.ausentes += 1
+            print(f"⚠️ Replay: sem fixture para '{query}' ({os.path.basename(caminho)}), devolvendo []")
+            return []
+
+        with open(caminho, 'r', encoding='utf-8') as f:
+            registro = json.load(f)
+
+        latencia = registro.get('latencia', 0) if self.latencia is None else self.latencia
+        if self.variacao:
+            with self._lock:
+                latencia += self._aleatorio.uniform(0, self.variacao)
+        if latencia > 0:
+            time.sleep(latencia)
+
+        if 'erro' in registro:
+            tipo = type(registro['erro']['tipo'], (Exception,), {})
+            raise tipo(registro['erro']['mensagem'])
+        return registro.get('resultados', [])
+
+
+def criar_backend(nome=None):
+    nome = nome or BUSCA_BACKEND
+    if nome == 'replay':
+        print(f"🎞️  Backend de busca: replay ({BUSCA_FIXTURES_DIR})")
+        return BackendReplay()
+    if nome == 'gravar':
+        print(f"⏺️  Backend de busca: DDGS com gravação em {BUSCA_FIXTURES_DIR}")
+        return BackendGravacao(BackendDDGS())
+    return BackendDDGS()
@@ -1,42 +1,141 @@
+import os
 import time
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from ddgs import DDGS
+from backends_busca import criar_backend
+from controle_taxa import LimitadorTokenBucket, ControleConcorrenciaAIMD, DisjuntorCircuito
+from cache_persistente import CachePersistente, gerar_chave
+from planejador_queries import PlanejadorQueries
+from termos import termos_fonte, termos_resultado
+from duplicatas import AgrupadorDuplicatas
+from metricas import duracao_fase_busca, duracao_query_ddgs, erros, registro
 
-duck = DDGS()
+# Execução concorrente das queries (DDGS_MODO_CONCORRENTE=0 volta ao modo sequencial)
+DDGS_MODO_CONCORRENTE = os.environ.get("DDGS_MODO_CONCORRENTE", "1") == "1"
+DDGS_MAX_WORKERS = int(os.environ.get("DDGS_MAX_WORKERS", "4"))
+
+# Fase 2 só roda se a fase 1 trouxer menos resultados que isso
+DDGS_MINIMO_RESULTADOS = int(os.environ.get("DDGS_MINIMO_RESULTADOS", "15"))
+
+# Orçamento de requisições ao DuckDuckGo, compartilhado por todo o processo
+DDGS_REQUISICOES_POR_SEGUNDO = float(os.environ.get("DDGS_REQUISICOES_POR_SEGUNDO", "1.0"))
+DDGS_BURST = os.environ.get("DDGS_BURST")
+
+limitador = LimitadorTokenBucket(DDGS_REQUISICOES_POR_SEGUNDO, DDGS_BURST)
+
+# Concorrência adaptativa (AIMD) entre 1 e DDGS_MAX_WORKERS requisições em voo
+controle_concorrencia = ControleConcorrenciaAIMD(
+    limite_inicial=int(os.environ.get("DDGS_CONCORRENCIA_INICIAL", str(DDGS_MAX_WORKERS))),
+    limite_maximo=max(DDGS_MAX_WORKERS, 1),
+    fator_reducao=float(os.environ.get("DDGS_FATOR_REDUCAO", "0.5"))
+)
+
+# Disjuntor: após N limites de taxa seguidos, pausa todas as buscas durante o resfriamento
+disjuntor = DisjuntorCircuito(
+    limiar_falhas=int(os.environ.get("DDGS_DISJUNTOR_LIMIAR", "3")),
+    resfriamento=float(os.environ.get("DDGS_DISJUNTOR_RESFRIAMENTO", "30")),
+    resfriamento_maximo=float(os.environ.get("DDGS_DISJUNTOR_RESFRIAMENTO_MAX", "300"))
+)
+DDGS_TENTATIVAS_LIMITE_TAXA = int(os.environ.get("DDGS_TENTATIVAS_LIMITE_TAXA", "2"))
+
+# Cache em disco das respostas brutas do DuckDuckGo (DDGS_CACHE_IGNORAR=1 força a rede)
+DDGS_CACHE_TTL = int(os.environ.get("DDGS_CACHE_TTL", str(24 * 3600)))
+DDGS_CACHE_MAX_ENTRADAS = int(os.environ.get("DDGS_CACHE_MAX_ENTRADAS", "20000"))
+DDGS_CACHE_IGNORAR = os.environ.get("DDGS_CACHE_IGNORAR", "0") == "1"
+
+cache_ddgs = CachePersistente(
+    namespace="ddgs",
+    ttl_segundos=DDGS_CACHE_TTL,
+    max_entradas=DDGS_CACHE_MAX_ENTRADAS,
+    ignorar=DDGS_CACHE_IGNORAR
+)
+
+planejador = PlanejadorQueries()
+# Marca, na thread que executou a query, se a resposta veio do cache_ddgs (ver _executar_com_origem)
+_origem_query = threading.local()
+
+# Backend de busca (DDGS real, gravação ou replay de fixtures - ver BUSCA_BACKEND)
+duck = criar_backend()
+
+# Threads das queries concorrentes, compartilhadas por todas as buscas do processo
+_executor_queries = None
+_pid_executor_queries = None
+_lock_executor_queries = threading.Lock()
+
+def _obter_executor_queries():
+    """Pool de threads do processo para as queries.
+
+    As threads vivem entre uma busca e outra, então cada uma reaproveita o seu
+    cliente DDGS do pool_clientes (um por thread) em vez de criar um novo a
+    cada fase. Criado no primeiro uso e recriado após um fork (preload_app).
+    """
+    global _executor_queries, _pid_executor_queries
+    with _lock_executor_queries:
+        if _executor_queries is None or _pid_executor_queries != os.getpid():
+            _executor_queries = ThreadPoolExecutor(max_workers=max(DDGS_MAX_WORKERS, 1), thread_name_prefix="ddgs")
+            _pid_executor_queries = os.getpid()
+        return _executor_queries
 
 def buscar_dados_duckduckgo_completo(nome_pessoa, cargo_publico=None, estado=None):
     """Busca INTELIGENTE no DuckDuckGo com queries contextuais"""
+    return ordenar_por_relevancia(list(buscar_dados_duckduckgo_stream(nome_pessoa, cargo_publico, estado)))
+
+def buscar_dados_duckduckgo_stream(nome_pessoa, cargo_publico=None, estado=None):
+    """Versão em streaming da busca: produz cada resultado validado e inédito
+    assim que a query que o trouxe termina, sem a ordenação por relevância.
+
+    Quem consome pode pontuar os resultados enquanto as outras queries ainda
+    rodam (a pré-triagem de buscar.py faz isso). `duplicatas`/`fontes_similares`
+    de um resultado já produzido continuam sendo atualizados até a busca acabar.
+    """
     print(f"🔍 Buscando dados para: {nome_pessoa}")
     
     # Extrair contexto do cargo
     contexto = _extrair_contexto_cargo(cargo_publico, estado)
     
-    # Queries PRIMÁRIAS (mais específicas)
-    queries_primarias = _gerar_queries_primarias(nome_pessoa, contexto)
+    # Queries PRIMÁRIAS (mais específicas), ordenadas pelo rendimento histórico
+    plano_primario = planejador.montar_plano(_gerar_queries_primarias(nome_pessoa, contexto))
     
-    # Queries SECUNDÁRIAS (backup - mais genéricas)
-    queries_secundarias = _gerar_queries_secundarias(nome_pessoa, contexto)
+    # Queries SECUNDÁRIAS (backup - mais genéricas), sem repetir as primárias
+    plano_secundario = planejador.montar_plano(
+        _gerar_queries_secundarias(nome_pessoa, contexto),
+        ja_planejadas=[query for _, query in plano_primario]
+    )
     
-    todos_resultados = []
+    total_brutos = 0
+    sessao = planejador.iniciar_sessao()
+    filtro = FiltroIncremental(nome_pessoa)
     
     # Buscar PRIMEIRO com queries específicas
     print("🎯 FASE 1: Buscas específicas...")
-    for i, query in enumerate(queries_primarias, 1):
-        resultados = _executar_query_segura(query, i, len(queries_primarias))
-        if resultados:
-            todos_resultados.extend(resultados)
+    inicio_fase = time.monotonic()
+    for resultados in _executar_plano(plano_primario, sessao):
+        total_brutos += len(resultados)
+        for resultado in resultados:
+            if filtro.aceitar(resultado):
+                yield resultado
+    duracao_fase_busca.observar(time.monotonic() - inicio_fase, fase="primaria")
     
     # Se poucos resultados, buscar com queries secundárias
-    if len(todos_resultados) < 15:
+    if total_brutos < DDGS_MINIMO_RESULTADOS:
         print("🔄 FASE 2: Buscas complementares...")
-        for i, query in enumerate(queries_secundarias, 1):
-            resultados = _executar_query_segura(query, i, len(queries_secundarias))
-            if resultados:
-                todos_resultados.extend(resultados)
-    
-    # FILTRAGEM INTELIGENTE
-    resultados_filtrados = _filtrar_resultados_inteligente(todos_resultados, nome_pessoa)
+        sessao.nova_fase()
+        inicio_fase = time.monotonic()
+        for resultados in _executar_plano(plano_secundario, sessao):
+            for resultado in resultados:
+                if filtro.aceitar(resultado):
+                    yield resultado
+        duracao_fase_busca.observar(time.monotonic() - inicio_fase, fase="secundaria")
+    
+    print(f"📈 Queries executadas: {sessao.queries_executadas} "
+          f"(plano: {len(plano_primario) + len(plano_secundario)})")
+
+def ordenar_por_relevancia(resultados_filtrados):
+    """Ordena (no lugar) pela relevância, fontes oficiais primeiro, e devolve a lista"""
+    resultados_filtrados.sort(key=lambda x: _calcular_peso_relevancia(x))
     
     print(f"🎯 Resultados após filtragem: {len(resultados_filtrados)}")
     return resultados_filtrados
@@ -74,65 +173,70 @@ def _extrair_contexto_cargo(cargo_publico, estado):
     return contexto
 
 def _gerar_queries_primarias(nome_pessoa, contexto):
-    """Gera queries ALTAMENTE específicas baseadas no contexto"""
-    queries = []
+    """Gera queries ALTAMENTE específicas baseadas no contexto.
+
+    Retorna pares (modelo, query); o modelo identifica a query no planejador.
+    """
+    modelos = []
     
     # Query base com nome exato
-    queries.append(f'"{nome_pessoa}"')
+    modelos.append('"{nome}"')
     
     # Adicionar contexto de governo se disponível
     if contexto.get('nivel') == 'federal':
-        queries.extend([
-            f'"{nome_pessoa}" ministério',
-            f'"{nome_pessoa}" governo federal',
-            f'"{nome_pessoa}" brasília',
+        modelos.extend([
+            '"{nome}" ministério',
+            '"{nome}" governo federal',
+            '"{nome}" brasília',
         ])
     elif contexto.get('nivel') == 'estadual':
-        estado = contexto.get('estado', '')
-        queries.extend([
-            f'"{nome_pessoa}" {estado}',
-            f'"{nome_pessoa}" governo {estado}',
-            f'"{nome_pessoa}" secretaria {estado}',
+        modelos.extend([
+            '"{nome}" {estado}',
+            '"{nome}" governo {estado}',
+            '"{nome}" secretaria {estado}',
         ])
     
     # Adicionar contexto de área específica
     if contexto.get('area'):
-        area = contexto['area']
-        queries.extend([
-            f'"{nome_pessoa}" {area}',
-            f'"{nome_pessoa}" secretário {area}',
+        modelos.extend([
+            '"{nome}" {area}',
+            '"{nome}" secretário {area}',
         ])
     
     # Queries jurídicas específicas
-    queries.extend([
-        f'"{nome_pessoa}" processo judicial',
-        f'"{nome_pessoa}" ação judicial',
-        f'"{nome_pessoa}" tribunal de contas',
-        f'"{nome_pessoa}" TCU',
-        f'"{nome_pessoa}" MPF',
-        f'"{nome_pessoa}" PF',
-        f'"{nome_pessoa}" investigação',
+    modelos.extend([
+        '"{nome}" processo judicial',
+        '"{nome}" ação judicial',
+        '"{nome}" tribunal de contas',
+        '"{nome}" TCU',
+        '"{nome}" MPF',
+        '"{nome}" PF',
+        '"{nome}" investigação',
     ])
     
     # Queries de licitações/contratos
-    queries.extend([
-        f'"{nome_pessoa}" licitação',
-        f'"{nome_pessoa}" contrato governo',
-        f'"{nome_pessoa}" pregão',
-        f'"{nome_pessoa}" diário oficial',
+    modelos.extend([
+        '"{nome}" licitação',
+        '"{nome}" contrato governo',
+        '"{nome}" pregão',
+        '"{nome}" diário oficial',
     ])
     
-    return queries
+    valores = {
+        'nome': nome_pessoa,
+        'estado': contexto.get('estado') or '',
+        'area': contexto.get('area', ''),
+    }
+    return [(modelo, modelo.format(**valores).strip()) for modelo in modelos]
 
 def _gerar_queries_secundarias(nome_pessoa, contexto):
-    """Gera queries mais genéricas como backup"""
-    queries = []
+    """Gera queries mais genéricas como backup, em pares (modelo, query)"""
+    modelos = []
     
     # Dividir nome para buscas parciais
     partes_nome = nome_pessoa.split()
     if len(partes_nome) >= 2:
-        primeiro_ultimo = f'"{partes_nome[0]} {partes_nome[-1]}"'
-        queries.append(primeiro_ultimo)
+        modelos.append('"{primeiro} {ultimo}"')
     
     # Queries genéricas mas relevantes
     termos_relevantes = [
@@ -142,151 +246,266 @@ def _gerar_queries_secundarias(nome_pessoa, contexto):
     ]
     
     for termo in termos_relevantes:
-        queries.append(f'"{nome_pessoa}" {termo}')
+        modelos.append('"{nome}" ' + termo)
     
     # Adicionar contexto se disponível
     if contexto.get('nivel'):
-        nivel = contexto['nivel']
-        queries.append(f'"{nome_pessoa}" {nivel}')
-    
-    return queries
+        modelos.append('"{nome}" {nivel}')
+    
+    valores = {
+        'nome': nome_pessoa,
+        'primeiro': partes_nome[0] if partes_nome else '',
+        'ultimo': partes_nome[-1] if partes_nome else '',
+        'nivel': contexto.get('nivel', ''),
+    }
+    return [(modelo, modelo.format(**valores).strip()) for modelo in modelos]
+
+def _executar_plano(plano, sessao):
+    """Executa um plano (modelo, query) até o ganho marginal de URLs cair abaixo do limiar,
+    produzindo os resultados de cada query assim que ela termina"""
+    modelos = {query: modelo for modelo, query in plano}
+    
+    for query, resultados, em_cache in _executar_queries([query for _, query in plano], sessao.deve_continuar):
+        sessao.registrar(modelos[query], resultados, em_cache=em_cache)
+        yield resultados
+    
+    if sessao.queries_fase < len(plano):
+        print(f"⏹️  Parada antecipada: ganho marginal {sessao.ganho_marginal():.2f} URLs/query "
+              f"após {sessao.queries_fase}/{len(plano)} queries")
+
+def _executar_com_origem(query, numero, total):
+    """_executar_query_segura() + se a resposta veio do cache_ddgs, e não da rede"""
+    _origem_query.em_cache = False
+    resultados = _executar_query_segura(query, numero, total)
+    return resultados, _origem_query.em_cache
+
+def _executar_queries(queries, continuar=None):
+    """Executa as queries e devolve (query, resultados, em_cache) na ordem original.
+
+    No modo concorrente as queries rodam no pool de threads do processo, no
+    máximo DDGS_MAX_WORKERS por busca; o ritmo é controlado pelo token bucket
+    compartilhado, não por sleeps fixos.
+    `continuar` é consultado antes de cada nova query (parada antecipada).
+    """
+    total = len(queries)
+    if not DDGS_MODO_CONCORRENTE or DDGS_MAX_WORKERS <= 1 or total <= 1:
+        for i, query in enumerate(queries, 1):
+            if continuar and not continuar():
+                return
+            yield (query, *_executar_com_origem(query, i, total))
+        return
+    
+    executor = _obter_executor_queries()
+    pendentes = deque()
+    proximas = iter(enumerate(queries, 1))
+    try:
+        for i, query in proximas:
+            pendentes.append((query, executor.submit(_executar_com_origem, query, i, total)))
+            if len(pendentes) >= DDGS_MAX_WORKERS:
+                break
+        
+        parar = False
+        while pendentes:
+            query, futuro = pendentes.popleft()
+            if futuro.cancelled():
+                continue
+            yield (query, *futuro.result())
+            
+            if not parar and continuar and not continuar():
+                # Queries já em voo foram pagas: seus resultados ainda são aproveitados
+                parar = True
+                for _, futuro_pendente in pendentes:
+                    futuro_pendente.cancel()
+            
+            proxima = None if parar else next(proximas, None)
+            if proxima:
+                i, query = proxima
+                pendentes.append((query, executor.submit(_executar_com_origem, query, i, total)))
+    finally:
+        # Busca interrompida: o que ainda não começou não ocupa o pool compartilhado
+        for _, futuro_pendente in pendentes:
+            futuro_pendente.cancel()
 
 def _executar_query_segura(query, numero_atual, total_queries):
-    """Executa query com tratamento de erro e rate limiting inteligente"""
+    """Executa query com tratamento de erro e rate limiting pelo token bucket.
+
+    Erros de limite de taxa são tentados de novo (após o disjuntor liberar)
+    em vez de virarem uma lista vazia.
+    """
     print(f"  📝 Query {numero_atual}/{total_queries}: {query}")
     
-    try:
-        results = list(duck.text(
-            query=query,
-            region='br-pt',
-            max_results=10,  # Aumentado para captar mais contexto
-            timelimit='y'  # Último ano apenas
-        ))
-        
-        # Filtrar resultados irrelevantes
-        results = [r for r in results if _validar_relevancia_resultado(r, query)]
-        
-        print(f"    ✅ Encontrados: {len(results)} resultados válidos")
-        
-        # Rate limiting adaptativo
-        if len(results) > 5:
-            time.sleep(2)  # Mais resultados = mais tempo
-        else:
-            time.sleep(1)
+    for tentativa in range(1, DDGS_TENTATIVAS_LIMITE_TAXA + 1):
+        try:
+            results = _buscar_com_cache(query, region='br-pt', max_results=10, timelimit='y')
+            
+            # Filtrar resultados irrelevantes
+            results = [r for r in results if _validar_relevancia_resultado(r, query)]
+            
+            print(f"    ✅ Encontrados: {len(results)} resultados válidos")
+            return results
             
+        except Exception as e:
+            print(f"    ❌ Erro na query '{query}': {e}")
+            if not _eh_limite_taxa(e) or tentativa == DDGS_TENTATIVAS_LIMITE_TAXA:
+                return []
+            print(f"    🔁 Limite de taxa, nova tentativa ({tentativa + 1}/{DDGS_TENTATIVAS_LIMITE_TAXA})")
+    return []
+
+def _buscar_com_cache(query, region, max_results, timelimit):
+    """Consulta o cache antes do DuckDuckGo; hits não consomem o orçamento de requisições.
+
+    Gravação e replay de fixtures não usam o cache_ddgs (ver BackendBusca);
+    o replay também não passa pelo limitador, concorrência e disjuntor.
+    """
+    inicio = time.monotonic()
+    chave = gerar_chave(query, region, max_results, timelimit)
+    if duck.usa_cache:
+        results = cache_ddgs.obter(chave)
+        if results is not None:
+            print("    💾 Resultado em cache")
+            _origem_query.em_cache = True
+            duracao_query_ddgs.observar(time.monotonic() - inicio, origem="cache", status="ok")
+            return results
+
+    if not duck.usa_rede:
+        try:
+            results = duck.text(query=query, region=region, max_results=max_results, timelimit=timelimit)
+        except Exception:
+            duracao_query_ddgs.observar(time.monotonic() - inicio, origem="replay", status="erro")
+            raise
+        duracao_query_ddgs.observar(time.monotonic() - inicio, origem="replay", status="ok")
         return results
-        
+    
+    disjuntor.aguardar()
+    controle_concorrencia.adquirir()
+    try:
+        limitador.adquirir()
+        results = duck.text(
+            query=query,
+            region=region,
+            max_results=max_results,  # Aumentado para captar mais contexto
+            timelimit=timelimit  # Último ano apenas
+        )
     except Exception as e:
-        print(f"    ❌ Erro na query '{query}': {e}")
-        time.sleep(3)  # Mais tempo em caso de erro
-        return []
+        # Inclui as esperas no disjuntor/limitador: é o tempo que a busca realmente gastou
+        duracao_query_ddgs.observar(time.monotonic() - inicio, origem="rede", status="erro")
+        erros.inc(componente="ddgs_limite_taxa" if _eh_limite_taxa(e) else "ddgs")
+        if _eh_limite_taxa(e):
+            controle_concorrencia.liberar(False)
+            disjuntor.registrar_falha()
+        else:
+            # Outros erros (ex.: "No results found") não indicam sobrecarga
+            controle_concorrencia.liberar(None)
+            disjuntor.registrar_sucesso()
+        raise
+    
+    controle_concorrencia.liberar(True)
+    disjuntor.registrar_sucesso()
+    duracao_query_ddgs.observar(time.monotonic() - inicio, origem="rede", status="ok")
+    if duck.usa_cache:
+        cache_ddgs.gravar(chave, results)
+    return results
+
+def _eh_limite_taxa(erro):
+    """Erros que indicam limite de taxa/sobrecarga do DuckDuckGo"""
+    if type(erro).__name__ in ('RatelimitException', 'TimeoutException'):
+        return True
+    mensagem = str(erro).lower()
+    return '429' in mensagem or 'ratelimit' in mensagem or 'rate limit' in mensagem
+
+def estado_busca():
+    """Estado atual dos controles de taxa, concorrência, disjuntor e cache"""
+    return {
+        'limitador': limitador.estado(),
+        'concorrencia': controle_concorrencia.estado(),
+        'disjuntor': disjuntor.estado(),
+        'cache': cache_ddgs.estatisticas(),
+    }
+
+registro.coletor("busca", estado_busca)
 
 def _validar_relevancia_resultado(resultado, query_original):
     """Valida se o resultado é relevante baseado em múltiplos critérios"""
-    title = resultado.get('title', '').lower()
-    body = resultado.get('body', '').lower()
-    href = resultado.get('href', '').lower()
+    fonte = termos_fonte(resultado)
     
     # Critérios de EXCLUSÃO (fontes irrelevantes)
-    fontes_irrelevantes = [
-        'wikipedia.org', 'instagram.com', 'facebook.com', 'youtube.com',
-        'linkedin.com', 'blogspot.com', 'wordpress.com'
-    ]
-    
-    if any(fonte in href for fonte in fontes_irrelevantes):
+    if fonte.tem('fonte_irrelevante'):
         return False
     
-    # Critérios de QUALIDADE (fontes preferenciais)
-    fontes_preferenciais = [
-        '.gov', '.jus', '.mp', 'tcu', 'tse', 'stf', 'stj',
-        'g1.globo.com', 'oglobo.globo.com', 'folha.com.br',
-        'estadao.com.br', 'valor.com.br', 'poder360.com.br',
-        'congressoemfoco.uol.com.br', 'metropoles.com'
-    ]
-    
     # Pontuação de relevância
     pontuacao = 0
     
     # Bônus por fonte confiável
-    if any(fonte in href for fonte in fontes_preferenciais):
+    if fonte.tem('fonte_preferencial'):
         pontuacao += 3
     
-    # Bônus por termos jurídicos/importantes
-    termos_importantes = [
-        'processo', 'ação', 'tribunal', 'ministério público', 'justiça',
-        'condenação', 'prisão', 'investigação', 'denúncia', 'licitação',
-        'contrato', 'desvio', 'corrupção', 'fraude'
-    ]
-    
-    texto_completo = f"{title} {body}"
-    for termo in termos_importantes:
-        if termo in texto_completo:
-            pontuacao += 1
-    
-    # Penalizar por irrelevância
-    termos_irrelevantes = [
-        'receita federal', 'nota fiscal', 'certidão', 'agendamento',
-        'marcar horário', 'agendar', 'consulta simples'
-    ]
-    
-    for termo in termos_irrelevantes:
-        if termo in texto_completo:
-            pontuacao -= 2
+    # Bônus por termos jurídicos/importantes, penalidade por irrelevância
+    conteudo = termos_resultado(resultado)
+    pontuacao += conteudo.contar('relevancia_importante')
+    pontuacao -= 2 * conteudo.contar('relevancia_irrelevante')
     
     return pontuacao >= 1  # Pelo menos um critério de relevância
 
-def _filtrar_resultados_inteligente(resultados, nome_pessoa):
-    """Filtragem inteligente para remover duplicatas e irrelevâncias"""
-    resultados_unicos = []
-    urls_vistas = set()
-    conteudos_similares = set()
-    
-    nome_pattern = re.compile(re.escape(nome_pessoa.lower()))
-    
-    for resultado in resultados:
+class FiltroIncremental:
+    """Filtragem inteligente para remover duplicatas e irrelevâncias, um resultado por vez.
+
+    Notícias replicadas em vários portais são agrupadas por SimHash: só o
+    primeiro resultado de cada grupo é aceito, com `duplicatas` e
+    `fontes_similares` indicando as demais fontes.
+    """
+    
+    def __init__(self, nome_pessoa):
+        self.urls_vistas = set()
+        self.titulos_vistos = {}
+        self.agrupador = AgrupadorDuplicatas()
+        self.nome_pattern = re.compile(re.escape(nome_pessoa.lower()))
+    
+    def aceitar(self, resultado):
         url = resultado.get('href', '')
         title = resultado.get('title', '').lower()
         body = resultado.get('body', '').lower()
         
         # Pular URLs duplicadas
-        if url in urls_vistas:
-            continue
+        if url in self.urls_vistas:
+            return False
         
         # Verificar se o nome aparece no resultado
         texto_completo = f"{title} {body}"
-        if not nome_pattern.search(texto_completo):
-            continue  # Pular se não menciona o nome
+        if not self.nome_pattern.search(texto_completo):
+            return False  # Pular se não menciona o nome
+        
+        self.urls_vistas.add(url)
         
         # Detectar conteúdo similar (evitar notícias duplicadas)
-        hash_conteudo = hash(title[:100])  # Hash do título como identificador
-        if hash_conteudo in conteudos_similares:
-            continue
+        titulo_chave = title[:100]  # Título idêntico = mesma notícia
+        representante = self.titulos_vistos.get(titulo_chave)
+        if representante is not None:
+            representante['duplicatas'] = representante.get('duplicatas', 0) + 1
+            representante.setdefault('fontes_similares', []).append(url)
+            return False
         
-        urls_vistas.add(url)
-        conteudos_similares.add(hash_conteudo)
-        resultados_unicos.append(resultado)
-    
-    # Ordenar por relevância (fontes oficiais primeiro)
-    resultados_unicos.sort(key=lambda x: _calcular_peso_relevancia(x))
-    
-    return resultados_unicos
+        # Título diferente, mas texto quase igual (SimHash sobre título + corpo)
+        if not self.agrupador.adicionar(resultado):
+            return False
+        
+        self.titulos_vistos[titulo_chave] = resultado
+        return True
 
 def _calcular_peso_relevancia(resultado):
     """Calcula peso de relevância para ordenação"""
-    href = resultado.get('href', '').lower()
+    fonte = termos_fonte(resultado)
     peso = 0
     
     # Fontes oficiais têm máxima prioridade
-    if any(dominio in href for dominio in ['.gov', '.jus', '.mp', 'tcu', 'tse']):
+    if fonte.tem('fonte_oficial'):
         peso += 100
     
     # Fontes jornalísticas confiáveis
-    elif any(dominio in href for dominio in ['g1.globo.com', 'oglobo.globo.com', 'folha.com.br']):
+    elif fonte.tem('fonte_jornal'):
         peso += 50
     
     # Conteúdo jurídico tem alta prioridade
-    title_body = f"{resultado.get('title', '')} {resultado.get('body', '')}".lower()
-    if any(termo in title_body for termo in ['processo', 'tribunal', 'ministério público']):
+    if termos_resultado(resultado).tem('peso_juridico'):
         peso += 30
     
     return peso
\ No newline at end of file
@@ -4,44 +4,102 @@ from datetime import datetime
 from typing import List, Optional
 from enum import Enum
 from pydantic import BaseModel, Field
-from ddgs import DDGS
 import pandas as pd
 import time
-from buscador_duck import buscar_dados_duckduckgo_completo
+import threading
+from buscador_duck import buscar_dados_duckduckgo_stream, duck, ordenar_por_relevancia, _calcular_peso_relevancia
 from models import AnalisePessoa, GravidadeEnum, Polemica, TipoFonteEnum
-from script_grok import analisar_com_grok
+from roteador_llm import roteador_llm
+from armazem_artefatos import armazem_artefatos
+from checkpoints import armazem_checkpoints
+from metricas import duracao_analise, duracao_fase_analise, erros, registro
+from pool_clientes import pool_clientes
+from executor_llm import executor_llm
+from script_grok import LLM_LOTE_TAMANHO, analisar_lote_com_grok
 from schemas import AnalisePessoaSchema, PolemicaSchema
+from termos import DICIONARIO_CONTEUDO, termos_resultado
 
 
 # Configuração da API do Grok
 XAI_API_KEY = os.environ.get("XAI_API_KEY")
 
+# Pré-triagem local: pula o LLM quando nenhum resultado traz sinal de risco
+TRIAGEM_ATIVA = os.environ.get("TRIAGEM_ATIVA", "1") == "1"
+TRIAGEM_GRAVIDADE_MAXIMA = os.environ.get("TRIAGEM_GRAVIDADE_MAXIMA", "baixa")
+TRIAGEM_MAX_TERMOS_NEGATIVOS = int(os.environ.get("TRIAGEM_MAX_TERMOS_NEGATIVOS", "0"))
+TRIAGEM_PESO_MAXIMO = int(os.environ.get("TRIAGEM_PESO_MAXIMO", "100"))
+
+ORDEM_GRAVIDADE = ["baixa", "media", "alta", "critica"]
+
+# Análise em lote: pessoas sem resultados acima desta gravidade dividem um prompt
+LOTE_GRAVIDADE_MAXIMA = os.environ.get("LOTE_GRAVIDADE_MAXIMA", "media")
+# Tempo máximo de cada prompt em lote (até LLM_LOTE_TAMANHO pessoas)
+LOTE_TIMEOUT = float(os.environ.get("LOTE_TIMEOUT", "120"))
+
+analises_por_caminho = registro.contador(
+    "analises_total", "Análises concluídas por caminho (llm, triagem_local, fallback_ddgs, sem_resultados)", ("caminho",))
+
+def registrar_caminho(analise, caminho):
+    analise['caminho_analise'] = caminho
+    analises_por_caminho.inc(caminho=caminho)
+    print(f"🧭 Caminho da análise: {caminho}")
+    return analise
+
+def _avisar_fase(ao_mudar_fase, fase):
+    if ao_mudar_fase:
+        ao_mudar_fase(fase)
+
+class SinaisRisco:
+    """Sinais da pré-triagem acumulados resultado a resultado.
+
+    A busca em streaming alimenta adicionar() enquanto as outras queries
+    ainda rodam; quando a última termina, a pré-triagem só compara os
+    máximos e contagens já calculados.
+    """
+
+    def __init__(self, classificar_gravidade):
+        self._classificar_gravidade = classificar_gravidade
+        self.total = 0
+        self.gravidade_maxima = "baixa"
+        self.fonte_gravidade = ''
+        self.negativos = set()
+        self.peso_maximo = None
+
+    def adicionar(self, resultado):
+        self.total += 1
+        gravidade = self._classificar_gravidade(f"{resultado.get('title', '')} {resultado.get('body', '')}")
+        if ORDEM_GRAVIDADE.index(gravidade) > ORDEM_GRAVIDADE.index(self.gravidade_maxima):
+            self.gravidade_maxima = gravidade
+            self.fonte_gravidade = resultado.get('href', '')
+        self.negativos |= termos_resultado(resultado).termos('contexto_negativo')
+        peso = _calcular_peso_relevancia(resultado)
+        self.peso_maximo = peso if self.peso_maximo is None else max(self.peso_maximo, peso)
+
 class BuscadorTwitterUnificado:
     def __init__(self):
-        self.ddgs = DDGS()
+        self.ddgs = duck  # Backend de busca compartilhado com o buscador
         try:
-            from xai_sdk import Client
-            self.client = Client(api_key=XAI_API_KEY)
+            import xai_sdk  # noqa: F401
             self.grok_available = True
         except ImportError:
             print("⚠️ SDK do Grok não disponível")
             self.grok_available = False
     
-    def _classificar_fonte_simples(self, url):
-        """Classificação simples da fonte para contexto"""
-        url = url.lower()
-        if 'twitter.com' in url or 'x.com' in url:
-            return "Twitter"
-        elif any(site in url for site in ['.gov', '.jus', '.mp', 'tribunal', 'justiça']):
-            return "Site Oficial"
-        elif any(site in url for site in ['g1', 'uol', 'folha', 'estadao', 'oglobo']):
-            return "Notícia"
-        else:
-            return "Blog/Forum"
+    @property
+    def client(self):
+        """Cliente xai compartilhado do pool (não abre um canal novo por analisador)"""
+        return pool_clientes.obter('grok')
 
 class AnalisadorUnificado:
-    def __init__(self):
+    def __init__(self, triagem_ativa=TRIAGEM_ATIVA, triagem_gravidade_maxima=TRIAGEM_GRAVIDADE_MAXIMA,
+                 triagem_max_termos_negativos=TRIAGEM_MAX_TERMOS_NEGATIVOS,
+                 triagem_peso_maximo=TRIAGEM_PESO_MAXIMO, tamanho_lote_llm=LLM_LOTE_TAMANHO):
         self.buscador = BuscadorTwitterUnificado()
+        self.tamanho_lote_llm = tamanho_lote_llm
+        self.triagem_ativa = triagem_ativa
+        self.triagem_gravidade_maxima = triagem_gravidade_maxima
+        self.triagem_max_termos_negativos = triagem_max_termos_negativos
+        self.triagem_peso_maximo = triagem_peso_maximo
     
 
     def validar_dados_analise(data):
@@ -52,45 +110,193 @@ class AnalisadorUnificado:
             return False, "Nome muito longo"
         return True, ""
 
-    def analisar_pessoa(self, nome_pessoa, cargo_publico=None, estado="Paraná"):
-        """Fluxo unificado com buscas melhoradas"""
+    def analisar_pessoa(self, nome_pessoa, cargo_publico=None, estado="Paraná", ao_mudar_fase=None):
+        """Fluxo unificado com buscas melhoradas.
+
+        ao_mudar_fase(fase), se informado, é chamado no início de cada fase
+        (busca, llm, consolidacao, salvando) — usado pelos jobs assíncronos.
+
+        A saída de cada fase vai para um checkpoint (checkpoints.py); se uma
+        tentativa anterior para a mesma pessoa ficou incompleta, as fases já
+        gravadas são reaproveitadas. Uma análise que caiu no fallback sem LLM
+        fica incompleta, para que a próxima tentativa refaça só o LLM.
+        """
+        execucao, analise_final, resultados_ddgs, motivo = self.etapa_busca(
+            nome_pessoa, cargo_publico, estado, ao_mudar_fase
+        )
+        if analise_final is not None:
+            return analise_final
+        return self.etapa_llm(nome_pessoa, cargo_publico, execucao, resultados_ddgs, motivo, ao_mudar_fase)
+    
+    def etapa_busca(self, nome_pessoa, cargo_publico=None, estado="Paraná", ao_mudar_fase=None):
+        """Primeira metade de analisar_pessoa: checkpoint, busca e pré-triagem.
+
+        Retorna (execucao, analise_final, resultados_ddgs, motivo). analise_final
+        vem preenchida (e já salva) quando o LLM não é necessário; senão a
+        análise continua em etapa_llm. O motor de lote roda cada metade num
+        pool próprio.
+        """
+        execucao = armazem_checkpoints.retomar_ou_iniciar(nome_pessoa, cargo_publico)
+
+        analise_final = execucao.obter('consolidacao')
+        if analise_final is not None:
+            print("♻️  Análise consolidada reaproveitada do checkpoint")
+            self._salvar(analise_final, nome_pessoa, cargo_publico, execucao.run_id, ao_mudar_fase)
+            execucao.concluir()
+            return execucao, analise_final, None, None
+
+        resultados_ddgs, analise_pronta, motivo = self._buscar_e_triar(
+            nome_pessoa, cargo_publico, estado, ao_mudar_fase, execucao
+        )
+        if analise_pronta is not None:
+            execucao.concluir()
+        return execucao, analise_pronta, resultados_ddgs, motivo
+    
+    def etapa_llm(self, nome_pessoa, cargo_publico, execucao, resultados_ddgs, motivo, ao_mudar_fase=None):
+        """Segunda metade de analisar_pessoa: LLM (ou checkpoint), consolidação e salvamento"""
+        analise_grok = execucao.obter('llm')
+        if analise_grok is not None:
+            print("♻️  Resposta do LLM reaproveitada do checkpoint")
+        else:
+            _avisar_fase(ao_mudar_fase, 'llm')
+            print(f"\n🤖 FASE 2: ANÁLISE COM LLM (Grok, Gemini como reserva)... ({motivo})")
+            with duracao_fase_analise.medir(fase='llm'):
+                analise_grok = roteador_llm.analisar(nome_pessoa, resultados_ddgs)
+            if isinstance(analise_grok, dict) and "error" not in analise_grok:
+                execucao.gravar('llm', analise_grok)
+
+        return self._finalizar(analise_grok, resultados_ddgs, nome_pessoa, cargo_publico, execucao, ao_mudar_fase)
+    
+    def etapa_llm_lote(self, pessoas):
+        """etapa_llm para um grupo de pessoas de baixo sinal (ver candidato_lote) num único prompt.
+
+        pessoas: lista de (nome, cargo, execucao, resultados_ddgs), no máximo
+        tamanho_lote_llm — o motor de lote chama uma vez por grupo. Retorna as
+        análises finais na mesma ordem, com checkpoint e artefatos como em
+        etapa_llm. Se o prompt do grupo estourar o tempo ainda no provedor, as
+        pessoas caem no fallback sem LLM (e ficam para a próxima tentativa,
+        que encontra a resposta no cache) em vez de pagar outra chamada.
+        """
+        respostas = [execucao.obter('llm') for _, _, execucao, _ in pessoas]
+        pendentes = [i for i, resposta in enumerate(respostas) if resposta is None]
+
+        if pendentes:
+            print(f"\n🤖 FASE 2: ANÁLISE EM LOTE COM GROK ({len(pendentes)} pessoas de baixo sinal)...")
+            with duracao_fase_analise.medir(fase='llm'):
+                lote, em_andamento = executor_llm.executar_ou_cancelar(
+                    analisar_lote_com_grok,
+                    [(pessoas[i][0], pessoas[i][3]) for i in pendentes],
+                    timeout=LOTE_TIMEOUT
+                )
+                if not isinstance(lote, list):
+                    lote = [lote] * len(pendentes)
+
+                for i, analise_grok in zip(pendentes, lote):
+                    nome_pessoa, _, execucao, resultados_ddgs = pessoas[i]
+                    if "error" in analise_grok and not em_andamento:
+                        print(f"⚠️ Lote falhou para {nome_pessoa}: tentando análise individual")
+                        analise_grok = roteador_llm.analisar(nome_pessoa, resultados_ddgs)
+                    if isinstance(analise_grok, dict) and "error" not in analise_grok:
+                        execucao.gravar('llm', analise_grok)
+                    respostas[i] = analise_grok
+
+        return [
+            self._finalizar(analise_grok, resultados_ddgs, nome_pessoa, cargo_publico, execucao)
+            for (nome_pessoa, cargo_publico, execucao, resultados_ddgs), analise_grok in zip(pessoas, respostas)
+        ]
+    
+    def _finalizar(self, analise_grok, resultados_ddgs, nome_pessoa, cargo_publico, execucao, ao_mudar_fase=None):
+        """Fases 3 e 4 com checkpoint: consolida, salva e conclui a execução (exceto no fallback)"""
+        analise_final = self._consolidar(analise_grok, resultados_ddgs, nome_pessoa, cargo_publico, ao_mudar_fase)
+        if analise_final.get('caminho_analise') == "llm":
+            execucao.gravar('consolidacao', analise_final)
+
+        self._salvar(analise_final, nome_pessoa, cargo_publico, execucao.run_id, ao_mudar_fase)
+        if analise_final.get('caminho_analise') != "fallback_ddgs":
+            execucao.concluir()
+        return analise_final
+    
+    def _buscar_e_triar(self, nome_pessoa, cargo_publico, estado, ao_mudar_fase=None, execucao=None):
+        """Fase 1 + pré-triagem.
+
+        Retorna (resultados_ddgs, analise_pronta, motivo); analise_pronta vem
+        preenchida (e já salva) quando o LLM não é necessário. Com `execucao`,
+        a busca é lida do checkpoint se já tiver sido feita e os artefatos
+        ficam registrados no run dela.
+        """
+        run_id = execucao.run_id if execucao else None
         print(f"\n🎯 INICIANDO ANÁLISE: {nome_pessoa}")
         if cargo_publico:
             print(f"🏛️  Contexto: {cargo_publico}")
         print("=" * 60)
         
-        print("\n🔍 FASE 1: BUSCA INTELIGENTE DUCKDUCKGO...")
-        resultados_ddgs = buscar_dados_duckduckgo_completo(nome_pessoa, cargo_publico, estado)
-        
-        if not resultados_ddgs:
-            print("❌ Nenhum resultado relevante encontrado")
-            return self._criar_analise_vazia(nome_pessoa, cargo_publico)
-        
-        print(f"✅ Encontrados {len(resultados_ddgs)} resultados relevantes")
-        self._salvar_resultados_brutos(resultados_ddgs, nome_pessoa)
+        sinais = None
+        resultados_ddgs = execucao.obter('busca') if execucao else None
+        if resultados_ddgs is not None:
+            print(f"♻️  Busca reaproveitada do checkpoint: {len(resultados_ddgs)} resultados")
+        else:
+            _avisar_fase(ao_mudar_fase, 'busca')
+            print("\n🔍 FASE 1: BUSCA INTELIGENTE DUCKDUCKGO...")
+            with duracao_fase_analise.medir(fase='busca'):
+                # Pontua cada resultado assim que a query dele termina, com as demais ainda em voo
+                sinais = SinaisRisco(self._classificar_gravidade)
+                resultados_ddgs = []
+                for resultado in buscar_dados_duckduckgo_stream(nome_pessoa, cargo_publico, estado):
+                    resultados_ddgs.append(resultado)
+                    sinais.adicionar(resultado)
+                ordenar_por_relevancia(resultados_ddgs)
+            
+            if not resultados_ddgs:
+                print("❌ Nenhum resultado relevante encontrado")
+                return resultados_ddgs, registrar_caminho(self._criar_analise_vazia(nome_pessoa, cargo_publico), "sem_resultados"), None
+            
+            print(f"✅ Encontrados {len(resultados_ddgs)} resultados relevantes")
+            self._salvar_resultados_brutos(resultados_ddgs, nome_pessoa, cargo_publico, run_id)
+            if execucao:
+                execucao.gravar('busca', resultados_ddgs)
 
-        print("\n🤖 FASE 2: ANÁLISE COM GROK...")
-        analise_grok = analisar_com_grok(nome_pessoa, resultados_ddgs)
-        
-        # Fase 3: Consolidação final
+        sem_sinal, motivo = self._pre_triagem(resultados_ddgs, sinais)
+        if sem_sinal:
+            print(f"\n⚡ PRÉ-TRIAGEM: {motivo} - dispensando o Grok")
+            analise_final = self._criar_analise_triagem(resultados_ddgs, nome_pessoa, cargo_publico, motivo)
+            registrar_caminho(analise_final, "triagem_local")
+            _avisar_fase(ao_mudar_fase, 'salvando')
+            print("\n💾 FASE 4: SALVANDO RESULTADOS...")
+            self._salvar_analise_completa(analise_final, nome_pessoa, cargo_publico, run_id)
+            return resultados_ddgs, analise_final, motivo
+
+        return resultados_ddgs, None, motivo
+    
+    def _consolidar(self, analise_grok, resultados_ddgs, nome_pessoa, cargo_publico, ao_mudar_fase=None):
+        _avisar_fase(ao_mudar_fase, 'consolidacao')
         print("\n📊 FASE 3: CONSOLIDAÇÃO DOS RESULTADOS...")
-        analise_final = self._processar_analise_final(analise_grok, resultados_ddgs, nome_pessoa, cargo_publico)
-        
+        with duracao_fase_analise.medir(fase='consolidacao'):
+            return self._processar_analise_final(analise_grok, resultados_ddgs, nome_pessoa, cargo_publico)
+    
+    def _salvar(self, analise_final, nome_pessoa, cargo_publico=None, run_id=None, ao_mudar_fase=None):
+        _avisar_fase(ao_mudar_fase, 'salvando')
         print("\n💾 FASE 4: SALVANDO RESULTADOS...")
-        self._salvar_analise_completa(analise_final, nome_pessoa)
-        
-        return analise_final
+        with duracao_fase_analise.medir(fase='salvando'):
+            self._salvar_analise_completa(analise_final, nome_pessoa, cargo_publico, run_id)
+    
+    def candidato_lote(self, resultados_ddgs):
+        """Nenhum resultado passa de LOTE_GRAVIDADE_MAXIMA: pode dividir um prompt em lote (etapa_llm_lote)"""
+        limite = ORDEM_GRAVIDADE.index(LOTE_GRAVIDADE_MAXIMA)
+        return all(
+            ORDEM_GRAVIDADE.index(self._classificar_gravidade(f"{r.get('title', '')} {r.get('body', '')}")) <= limite
+            for r in resultados_ddgs
+        )
     
     def _processar_analise_final(self, analise_grok, resultados_ddgs, nome_pessoa, cargo_publico):
         """Processa e consolida a análise final com lógica melhorada"""
 
         if not analise_grok or "error" in analise_grok:
-            print("⚠️ Usando fallback DuckDuckGo (Grok indisponível)")
-            return self._criar_analise_ddgs(resultados_ddgs, nome_pessoa, cargo_publico)
+            print("⚠️ Usando fallback DuckDuckGo (LLM indisponível)")
+            return registrar_caminho(self._criar_analise_ddgs(resultados_ddgs, nome_pessoa, cargo_publico), "fallback_ddgs")
         
         if not isinstance(analise_grok, dict):
             print("⚠️ Resposta do Grok inválida, usando fallback")
-            return self._criar_analise_ddgs(resultados_ddgs, nome_pessoa, cargo_publico)
+            return registrar_caminho(self._criar_analise_ddgs(resultados_ddgs, nome_pessoa, cargo_publico), "fallback_ddgs")
         
         if 'fontes_consultadas' not in analise_grok:
             analise_grok['fontes_consultadas'] = []
@@ -121,24 +327,7 @@ class AnalisadorUnificado:
             analise_grok['tweets_relevantes'] = tweets
         
         # ANÁLISE DE CONTEXTO MELHORADA
-        texto_completo = " ".join([
-            str(resultado.get('title', '')) + " " + str(resultado.get('body', '')) 
-            for resultado in resultados_ddgs
-        ]).lower()
-        
-        # Verificar se há predominantemente conteúdo positivo
-        termos_positivos_contexto = [
-            'positivo', 'favorável', 'elogio', 'reconhecimento', 'competente',
-            'eficiente', 'confiança', 'honesto', 'íntegro', 'trabalho'
-        ]
-        
-        termos_negativos_contexto = [
-            'corrupção', 'fraude', 'crime', 'condenado', 'prisão',
-            'irregularidade', 'denúncia', 'processo', 'investigação'
-        ]
-        
-        count_positivo = sum(1 for termo in termos_positivos_contexto if termo in texto_completo)
-        count_negativo = sum(1 for termo in termos_negativos_contexto if termo in texto_completo)
+        count_positivo, count_negativo = self._contar_termos_contexto(resultados_ddgs)
         
         # Se contexto é predominantemente positivo, ajustar risco
         if count_positivo > count_negativo * 2:  # Muito mais positivo que negativo
@@ -167,20 +356,82 @@ class AnalisadorUnificado:
         if 'resumo_analise' not in analise_grok:
             analise_grok['resumo_analise'] = "Análise realizada com sucesso"
         
-        return analise_grok
+        return registrar_caminho(analise_grok, "llm")
+    
+    def _pre_triagem(self, resultados_ddgs, sinais=None):
+        """Decide localmente se nenhum resultado carrega sinal de risco.
+
+        Usa as mesmas heurísticas da consolidação: gravidade por resultado,
+        termos negativos de contexto e peso de relevância. `sinais` vem da
+        busca em streaming; sem ele (busca lida do checkpoint) os sinais são
+        calculados aqui. Retorna (sem_sinal, motivo).
+        """
+        if not self.triagem_ativa:
+            return False, "pré-triagem desativada"
+        
+        if sinais is None:
+            sinais = SinaisRisco(self._classificar_gravidade)
+            for resultado in resultados_ddgs:
+                sinais.adicionar(resultado)
+        
+        if ORDEM_GRAVIDADE.index(sinais.gravidade_maxima) > ORDEM_GRAVIDADE.index(self.triagem_gravidade_maxima):
+            return False, f"gravidade '{sinais.gravidade_maxima}' em {sinais.fonte_gravidade}"
+        
+        if len(sinais.negativos) > self.triagem_max_termos_negativos:
+            return False, f"{len(sinais.negativos)} termos negativos no contexto"
+        
+        if sinais.peso_maximo > self.triagem_peso_maximo:
+            return False, f"peso de relevância {sinais.peso_maximo} acima de {self.triagem_peso_maximo}"
+        
+        return True, f"nenhum sinal de risco em {sinais.total} resultados"
+    
+    def _criar_analise_triagem(self, resultados_ddgs, nome_pessoa, cargo_publico, motivo):
+        """Análise determinística de baixo risco para quem não tem sinal nos resultados"""
+        analise = AnalisePessoa(
+            resumo_analise=f"Pré-triagem local: {motivo}. Nenhuma polêmica identificada nas fontes consultadas.",
+            polemicas=[],
+            empresas_associadas=[],
+            risco_reputacao="BAIXO",
+            recomendacoes="",
+            tweets_relevantes=[]
+        ).dict()
+        analise.update({
+            'nome': nome_pessoa,
+            'cargo_publico': cargo_publico,
+            'total_polemicas': 0,
+            'data_analise': datetime.now().isoformat(),
+            'fontes_consultadas': ["DuckDuckGo (Busca Consolidada)", "Pré-triagem local"],
+        })
+        return analise
+    
+    def _contar_termos_contexto(self, resultados_ddgs):
+        """Conta termos distintos positivos/negativos em todos os resultados.
+
+        Os termos de contexto não têm espaços, então a união por resultado
+        equivale à busca no texto concatenado de todos eles.
+        """
+        positivos = set()
+        negativos = set()
+        for resultado in resultados_ddgs:
+            ocorrencias = termos_resultado(resultado)
+            positivos |= ocorrencias.termos('contexto_positivo')
+            negativos |= ocorrencias.termos('contexto_negativo')
+        return len(positivos), len(negativos)
     
     def _criar_analise_ddgs(self, resultados_ddgs, nome_pessoa, cargo_publico):
         """Cria análise baseada apenas no DuckDuckGo"""
         polemicas = []
         
         for resultado in resultados_ddgs:
+            # Mesmo texto usado na validação da busca: reaproveita o cache de termos
+            texto = f"{resultado.get('title', '')} {resultado.get('body', '')}"
             polemica = Polemica(
                 titulo=resultado.get('title', 'Sem título')[:100],
                 descricao=resultado.get('body', 'Sem descrição')[:200],
                 fonte=resultado.get('href', ''),
                 tipo_fonte=self._classificar_fonte(resultado.get('href', '')),
-                gravidade=self._classificar_gravidade(resultado.get('title', '') + resultado.get('body', '')),
-                categorias=self._extrair_categorias(resultado.get('title', '') + resultado.get('body', '')),
+                gravidade=self._classificar_gravidade(texto),
+                categorias=self._extrair_categorias(texto),
                 evidencias=[resultado.get('body', '')[:100]],
                 impacto_publico="A ser avaliado",
                 relevancia="Média"
@@ -229,70 +480,37 @@ class AnalisadorUnificado:
     
 
     def _classificar_gravidade(self, texto):
-        """Classificação de gravidade MAIS PRECISA"""
+        """Classificação de gravidade MAIS PRECISA (termos em termos.TERMOS_CONTEUDO)"""
         if not texto:
             return "baixa"
-            
-        texto = texto.lower()
         
-        # Termos CRÍTICOS - crimes graves
-        termos_criticos = [
-            'condenado', 'prisão', 'crime', 'lavagem de dinheiro', 'tráfico',
-            'assassinato', 'homicídio', 'pedofilia', 'estupro', 'racismo'
-        ]
-        
-        # Termos ALTOS - corrupção, fraudes graves
-        termos_altos = [
-            'corrupção', 'desvio', 'propina', 'improbidade', 'fraude',
-            'superfaturamento', 'licitação fraudulenta', 'caixa dois',
-            'sonegação fiscal', 'lavagem de capitais'
-        ]
-        
-        # Termos MÉDIOS - investigações, processos
-        termos_medios = [
-            'investigação', 'processo', 'denúncia', 'inquérito', 'apuração',
-            'irregularidade', 'tribunal de contas', 'tce', 'mpf', 'pf'
-        ]
-        
-        # Termos BAIXOS - polêmicas leves, críticas
-        termos_baixos = [
-            'polêmica', 'controvérsia', 'crítica', 'questionamento',
-            'acórdão', 'escrutínio', 'auditoria', 'recomendação'
-        ]
-        
-        # Termos POSITIVOS - que devem reduzir gravidade
-        termos_positivos = [
-            'absolvido', 'inocente', 'arquivado', 'improcedente',
-            'favorável', 'positivo', 'elogio', 'reconhecimento'
-        ]
+        ocorrencias = DICIONARIO_CONTEUDO.analisar(texto)
         
         # Verificar termos positivos primeiro (reduzem gravidade)
-        if any(termo in texto for termo in termos_positivos):
+        if ocorrencias.tem('gravidade_positiva'):
             return "baixa"
         
         # Classificar por gravidade
-        if any(termo in texto for termo in termos_criticos):
+        if ocorrencias.tem('gravidade_critica'):
             return "critica"
-        elif any(termo in texto for termo in termos_altos):
+        elif ocorrencias.tem('gravidade_alta'):
             return "alta"
-        elif any(termo in texto for termo in termos_medios):
+        elif ocorrencias.tem('gravidade_media'):
             return "media"
-        elif any(termo in texto for termo in termos_baixos):
-            return "baixa"
         else:
-            return "baixa"  # Padrão conservador: quando não sabe, classifica como baixo
+            return "baixa"  # Polêmicas leves ou padrão conservador
     
     def _extrair_categorias(self, texto):
+        ocorrencias = DICIONARIO_CONTEUDO.analisar(texto)
         categorias = []
-        texto = texto.lower()
         
-        if any(termo in texto for termo in ['licitação', 'contrato', 'pregão']):
+        if ocorrencias.tem('categoria_licitacoes'):
             categorias.append("Licitações")
-        if any(termo in texto for termo in ['eleição', 'campanha', 'doação']):
+        if ocorrencias.tem('categoria_eleitoral'):
             categorias.append("Eleitoral")
-        if any(termo in texto for termo in ['corrupção', 'desvio', 'propina']):
+        if ocorrencias.tem('categoria_corrupcao'):
             categorias.append("Corrupção")
-        if any(termo in texto for termo in ['processo', 'judicial', 'tribunal']):
+        if ocorrencias.tem('categoria_judicial'):
             categorias.append("Judicial")
             
         return categorias if categorias else ["Outros"]
@@ -322,29 +540,21 @@ class AnalisadorUnificado:
         else:
             return "BAIXO"  # Apenas polêmicas baixas = risco baixo
     
-    def _salvar_resultados_brutos(self, resultados_ddgs, nome_pessoa):
-        """Salva resultados brutos do DuckDuckGo"""
-        arquivo_bruto = f"resultados_brutos_{nome_pessoa.replace(' ', '_')}.json"
+    def _salvar_resultados_brutos(self, resultados_ddgs, nome_pessoa, cargo_publico=None, run_id=None):
+        """Enfileira os resultados brutos do DuckDuckGo no armazém de artefatos"""
         dados_brutos = {
             'nome_pessoa': nome_pessoa,
             'data_busca': datetime.now().isoformat(),
             'total_resultados': len(resultados_ddgs),
             'resultados': resultados_ddgs
         }
-        
-        with open(arquivo_bruto, 'w', encoding='utf-8') as f:
-            json.dump(dados_brutos, f, ensure_ascii=False, indent=2)
-        
-        print(f"💾 Dados brutos salvos: {arquivo_bruto}")
+        run_id = armazem_artefatos.gravar(nome_pessoa, 'resultados_brutos', dados_brutos, run_id, cargo_publico)
+        print(f"💾 Dados brutos enfileirados (run {run_id[:8]})")
     
-    def _salvar_analise_completa(self, analise, nome_pessoa):
-        """Salva análise completa em JSON"""
-        arquivo = f"analise_completa_{nome_pessoa.replace(' ', '_')}.json"
-        
-        with open(arquivo, 'w', encoding='utf-8') as f:
-            json.dump(analise, f, ensure_ascii=False, indent=2)
-        
-        print(f"✅ Análise salva: {arquivo}")
+    def _salvar_analise_completa(self, analise, nome_pessoa, cargo_publico=None, run_id=None):
+        """Enfileira a análise completa no armazém de artefatos"""
+        run_id = armazem_artefatos.gravar(nome_pessoa, 'analise_completa', analise, run_id, cargo_publico)
+        print(f"✅ Análise enfileirada para gravação (run {run_id[:8]})")
         
         # Gerar relatório resumido
         self._gerar_relatorio_console(analise)
@@ -370,9 +580,20 @@ class AnalisadorUnificado:
                 print(f"   📝 {descricao[:100]}...")
                 print(f"   🔗 Fonte: {polemica.get('tipo_fonte', 'N/A')}")
 
-def executar_analise(nome_pessoa, cargo=None):
+_analisador = None
+_lock_analisador = threading.Lock()
+
+def obter_analisador():
+    """AnalisadorUnificado do processo: só guarda configuração, então é compartilhado entre requisições"""
+    global _analisador
+    with _lock_analisador:
+        if _analisador is None:
+            _analisador = AnalisadorUnificado()
+        return _analisador
+
+def executar_analise(nome_pessoa, cargo=None, ao_mudar_fase=None):
     """Função principal para executar análise"""
-    analisador = AnalisadorUnificado()
+    analisador = obter_analisador()
     
     print(f"\n{'#'*60}")
     print(f"🚀 INICIANDO ANÁLISE UNIFICADA: {nome_pessoa}")
@@ -380,13 +601,16 @@ def executar_analise(nome_pessoa, cargo=None):
     
     try:
         inicio = time.time()
-        analise = analisador.analisar_pessoa(nome_pessoa, cargo)
+        analise = analisador.analisar_pessoa(nome_pessoa, cargo, ao_mudar_fase=ao_mudar_fase)
         tempo_total = time.time() - inicio
+        duracao_analise.observar(tempo_total, status="ok")
         
         print(f"\n✅ ANÁLISE CONCLUÍDA em {tempo_total:.1f} segundos")
         return analise
         
     except Exception as e:
+        duracao_analise.observar(time.time() - inicio, status="erro")
+        erros.inc(componente="analise")
         print(f"❌ Erro na análise: {e}")
         import traceback
         traceback.print_exc()
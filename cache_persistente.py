@@ -0,0 +1,171 @@
+# cache_persistente.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metricas import registro
+
+CACHE_DB_PATH = os.environ.get("CACHE_DB_PATH", "cache_sistema.db")
+
+
+def gerar_chave(*partes):
+    """Gera chave estável (sha256) a partir das partes informadas"""
+    bruto = json.dumps(partes, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+
+class ConexaoSqlite:
+    """Conexão SQLite aberta no primeiro uso e reaberta em cada processo.
+
+    Com preload_app o master do gunicorn importa os módulos antes do fork, e
+    o SQLite não suporta usar no filho uma conexão aberta no pai. Como no
+    PoolClientes, nada é aberto no import e, se o pid mudar, a conexão
+    herdada é descartada e uma nova é aberta. `inicializar(conn)` cria as
+    tabelas a cada abertura.
+    """
+
+    def __init__(self, caminho, inicializar=None):
+        self.caminho = caminho
+        self.inicializar = inicializar
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def obter(self):
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                conn = sqlite3.connect(self.caminho, check_same_thread=False, timeout=30)
+                if self.inicializar:
+                    self.inicializar(conn)
+                    conn.commit()
+                self._conn, self._pid = conn, os.getpid()
+            return self._conn
+
+
+consultas_cache = registro.contador(
+    "cache_consultas_total", "Consultas aos caches persistentes", ("namespace", "resultado"))
+
+
+class CachePersistente:
+    """Cache em SQLite com TTL por entrada e despejo LRU limitado por namespace"""
+
+    def __init__(self, namespace, ttl_segundos, max_entradas, caminho=None, ignorar=False):
+        self.namespace = namespace
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self.caminho = caminho or CACHE_DB_PATH
+        self.ignorar = ignorar  # True = não lê do cache (sempre busca na rede), mas atualiza
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+        self.despejados = 0
+        self._lock = threading.Lock()
+        self._banco = ConexaoSqlite(self.caminho, self._criar_tabelas)
+
+    @staticmethod
+    def _criar_tabelas(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                chave TEXT NOT NULL,
+                valor TEXT NOT NULL,
+                criado REAL NOT NULL,
+                expira REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                PRIMARY KEY (namespace, chave)
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache (namespace, ultimo_acesso)"
+        )
+
+    @property
+    def _conn(self):
+        return self._banco.obter()
+
+    def obter(self, chave):
+        """Retorna o valor armazenado ou None (ausente, expirado ou cache ignorado)"""
+        if self.ignorar:
+            self.misses += 1
+            consultas_cache.inc(namespace=self.namespace, resultado="ignorado")
+            return None
+
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT valor, expira FROM cache WHERE namespace = ? AND chave = ?",
+                (self.namespace, chave)
+            ).fetchone()
+
+            if linha is None:
+                self.misses += 1
+                consultas_cache.inc(namespace=self.namespace, resultado="miss")
+                return None
+
+            valor, expira = linha
+            if expira < agora:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND chave = ?",
+                    (self.namespace, chave)
+                )
+                self._conn.commit()
+                self.expirados += 1
+                self.misses += 1
+                consultas_cache.inc(namespace=self.namespace, resultado="expirado")
+                return None
+
+            self._conn.execute(
+                "UPDATE cache SET ultimo_acesso = ? WHERE namespace = ? AND chave = ?",
+                (agora, self.namespace, chave)
+            )
+            self._conn.commit()
+            self.hits += 1
+            consultas_cache.inc(namespace=self.namespace, resultado="hit")
+
+        return json.loads(valor)
+
+    def gravar(self, chave, valor, ttl_segundos=None):
+        """Grava o valor (serializável em JSON) e aplica o limite de entradas"""
+        agora = time.time()
+        ttl = ttl_segundos if ttl_segundos is not None else self.ttl_segundos
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, chave, valor, criado, expira, ultimo_acesso) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, chave, json.dumps(valor, ensure_ascii=False), agora, agora + ttl, agora)
+            )
+            cursor = self._conn.execute("""
+                DELETE FROM cache WHERE namespace = ? AND chave IN (
+                    SELECT chave FROM cache WHERE namespace = ?
+                    ORDER BY ultimo_acesso DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.namespace, self.namespace, self.max_entradas))
+            self.despejados += max(cursor.rowcount, 0)
+            self._conn.commit()
+
+    def limpar(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def estatisticas(self):
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        consultas = self.hits + self.misses
+        return {
+            'namespace': self.namespace,
+            'entradas': total,
+            'max_entradas': self.max_entradas,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirados': self.expirados,
+            'despejados': self.despejados,
+            'taxa_acerto': round(self.hits / consultas, 3) if consultas else 0.0,
+            'ignorar': self.ignorar,
+        }
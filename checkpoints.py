@@ -0,0 +1,181 @@
+# checkpoints.py
+import json
+import os
+import threading
+import time
+import uuid
+
+from cache_persistente import CACHE_DB_PATH, ConexaoSqlite
+from metricas import registro
+
+CHECKPOINTS_ATIVOS = os.environ.get("CHECKPOINTS_ATIVOS", "1") == "1"
+# Execuções incompletas mais antigas que isso não são retomadas (busca velha demais)
+CHECKPOINT_TTL = int(os.environ.get("CHECKPOINT_TTL", str(6 * 3600)))
+
+
+def chave_pessoa(nome_pessoa, cargo_publico=None):
+    """Nome + cargo normalizados (caixa e espaços não mudam a pessoa)"""
+    nome = ' '.join((nome_pessoa or '').lower().split())
+    cargo = ' '.join((cargo_publico or '').lower().split())
+    return f"{nome}|{cargo}"
+
+
+class Execucao:
+    """Uma execução (run) da análise de uma pessoa e os checkpoints de cada fase"""
+
+    def __init__(self, armazem, run_id, fases, retomada, persistente=True):
+        self.armazem = armazem
+        self.run_id = run_id
+        self._fases = fases
+        self.retomada = retomada
+        self.persistente = persistente  # False = só identifica o run (artefatos), sem checkpoints
+
+    def obter(self, fase):
+        """Saída gravada da fase ou None se a fase ainda não foi concluída"""
+        return self._fases.get(fase)
+
+    def gravar(self, fase, dados):
+        self._fases[fase] = dados
+        if self.persistente:
+            self.armazem.gravar(self.run_id, fase, dados)
+
+    def concluir(self):
+        if self.persistente:
+            self.armazem.concluir(self.run_id)
+
+
+class ArmazemCheckpoints:
+    """Checkpoints por fase em SQLite, chaveados por pessoa e run_id.
+
+    Cada análise abre (ou retoma) uma execução; cada fase concluída grava sua
+    saída. Uma nova tentativa para a mesma pessoa retoma a execução incompleta
+    mais recente e pula as fases já gravadas. Execuções concluídas não são
+    retomadas: a próxima análise da pessoa começa do zero.
+    """
+
+    def __init__(self, caminho=None, ttl_segundos=CHECKPOINT_TTL, ativo=CHECKPOINTS_ATIVOS):
+        self.caminho = caminho or CACHE_DB_PATH
+        self.ttl_segundos = ttl_segundos
+        self.ativo = ativo
+        self.retomadas = 0
+        self.fases_reaproveitadas = 0
+        self._lock = threading.Lock()
+        self._banco = ConexaoSqlite(self.caminho, self._criar_tabelas)
+
+    @staticmethod
+    def _criar_tabelas(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS execucoes (
+                run_id TEXT PRIMARY KEY,
+                chave_pessoa TEXT NOT NULL,
+                criado REAL NOT NULL,
+                atualizado REAL NOT NULL,
+                concluida INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_execucoes_pessoa ON execucoes (chave_pessoa, concluida, atualizado)"
+        )
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                run_id TEXT NOT NULL,
+                fase TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                criado REAL NOT NULL,
+                PRIMARY KEY (run_id, fase)
+            )
+        """)
+
+    @property
+    def _conn(self):
+        return self._banco.obter()
+
+    def avulsa(self):
+        """Execução com run_id próprio mas sem checkpoints (lote ou checkpoints desativados)"""
+        return Execucao(self, uuid.uuid4().hex, {}, retomada=False, persistente=False)
+
+    def retomar_ou_iniciar(self, nome_pessoa, cargo_publico=None):
+        if not self.ativo:
+            return self.avulsa()
+
+        chave = chave_pessoa(nome_pessoa, cargo_publico)
+        agora = time.time()
+        with self._lock:
+            self._remover_antigos(agora)
+            linha = self._conn.execute(
+                "SELECT run_id FROM execucoes WHERE chave_pessoa = ? AND concluida = 0 "
+                "ORDER BY atualizado DESC LIMIT 1",
+                (chave,)
+            ).fetchone()
+
+            if linha is None:
+                run_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO execucoes (run_id, chave_pessoa, criado, atualizado) VALUES (?, ?, ?, ?)",
+                    (run_id, chave, agora, agora)
+                )
+                self._conn.commit()
+                return Execucao(self, run_id, {}, retomada=False)
+
+            run_id = linha[0]
+            fases = {
+                fase: json.loads(dados)
+                for fase, dados in self._conn.execute(
+                    "SELECT fase, dados FROM checkpoints WHERE run_id = ?", (run_id,)
+                )
+            }
+            self.retomadas += 1
+            self.fases_reaproveitadas += len(fases)
+
+        print(f"♻️  Retomando execução {run_id[:8]} de {nome_pessoa} "
+              f"(fases concluídas: {', '.join(fases) or 'nenhuma'})")
+        return Execucao(self, run_id, fases, retomada=True)
+
+    def gravar(self, run_id, fase, dados):
+        if run_id is None:
+            return
+        agora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, fase, dados, criado) VALUES (?, ?, ?, ?)",
+                (run_id, fase, json.dumps(dados, ensure_ascii=False, default=str), agora)
+            )
+            self._conn.execute("UPDATE execucoes SET atualizado = ? WHERE run_id = ?", (agora, run_id))
+            self._conn.commit()
+
+    def concluir(self, run_id):
+        """Marca a execução como concluída (os checkpoints ficam até expirar o TTL)"""
+        if run_id is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE execucoes SET concluida = 1, atualizado = ? WHERE run_id = ?",
+                (time.time(), run_id)
+            )
+            self._conn.commit()
+
+    def _remover_antigos(self, agora):
+        limite = agora - self.ttl_segundos
+        self._conn.execute(
+            "DELETE FROM checkpoints WHERE run_id IN (SELECT run_id FROM execucoes WHERE atualizado < ?)",
+            (limite,)
+        )
+        self._conn.execute("DELETE FROM execucoes WHERE atualizado < ?", (limite,))
+        self._conn.commit()
+
+    def estatisticas(self):
+        with self._lock:
+            incompletas = self._conn.execute(
+                "SELECT COUNT(*) FROM execucoes WHERE concluida = 0"
+            ).fetchone()[0]
+        return {
+            'ativo': self.ativo,
+            'execucoes_incompletas': incompletas,
+            'retomadas': self.retomadas,
+            'fases_reaproveitadas': self.fases_reaproveitadas,
+        }
+
+
+armazem_checkpoints = ArmazemCheckpoints()
+registro.coletor("checkpoints", armazem_checkpoints.estatisticas)
@@ -0,0 +1,178 @@
+# coalescencia.py
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from metricas import registro
+
+# Quanto um seguidor espera a execução do líder antes de desistir (segundos); rede de segurança
+COALESCENCIA_TIMEOUT = float(os.environ.get("COALESCENCIA_TIMEOUT", "1800"))
+
+execucoes_coalescidas = registro.contador(
+    "coalescencia_chamadas_total", "Chamadas que executaram (lider) ou aguardaram outra igual (seguidor)", ("papel",))
+
+
+class _Voo:
+    def __init__(self, chave):
+        self.chave = chave
+        self.concluido = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.seguidores = 0
+        self.callbacks = []
+
+
+class Coalescedor:
+    """Single-flight: chamadas simultâneas com a mesma chave executam uma vez só.
+
+    A primeira chamada (líder) executa a função; as que chegam enquanto ela
+    está em voo esperam e recebem o mesmo resultado (ou a mesma exceção).
+    Nada fica guardado depois: a próxima chamada com a chave executa de novo.
+
+    Um seguidor só bloqueia a própria thread: quem coalesce trabalho que
+    passa por uma fila com vagas (agendador) deve coalescer ANTES de pedir a
+    vaga, senão um seguidor pode ocupar a vaga de que o líder precisa.
+
+    executar() cobre o caso comum. Quem não pode bloquear uma thread por
+    pessoa (o motor de lote) usa as partes separadas: iniciar() diz se é
+    líder, o líder chama concluir() ao terminar e o seguidor registra um
+    callback com acompanhar(). Esse callback também tem prazo (timeout):
+    uma única thread vigia os prazos e, vencido, entrega TimeoutError.
+    """
+
+    def __init__(self, nome, timeout=COALESCENCIA_TIMEOUT):
+        self.nome = nome
+        self.timeout = timeout
+        self._em_voo = {}
+        self._lock = threading.Condition()
+        self._prazos = []  # heap de (prazo, desempate, voo, callback) dos acompanhar()
+        self._contador_prazos = itertools.count()
+        self._vigia = None
+        self.lideres = 0
+        self.seguidores = 0
+        self.timeouts = 0
+
+    def executar(self, chave, funcao, *args, ao_aguardar=None, **kwargs):
+        """Retorna (resultado, compartilhado); ao_aguardar() é chamado se for seguidor"""
+        voo, lider = self.iniciar(chave)
+
+        if not lider:
+            if ao_aguardar:
+                ao_aguardar()
+            if not voo.concluido.wait(self.timeout):
+                with self._lock:
+                    voo.seguidores -= 1
+                    self.timeouts += 1
+                raise TimeoutError(f"{self.nome}: execução em andamento para '{chave}' "
+                                   f"não terminou em {self.timeout:.0f}s")
+            if voo.erro is not None:
+                raise voo.erro
+            return voo.resultado, True
+
+        try:
+            resultado = funcao(*args, **kwargs)
+        except BaseException as e:
+            self.concluir(chave, voo, erro=e)
+            raise
+        self.concluir(chave, voo, resultado=resultado)
+        return resultado, False
+
+    def iniciar(self, chave):
+        """Entra no voo da chave; retorna (voo, lider). Só o líder executa e chama concluir()"""
+        with self._lock:
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _Voo(chave)
+                self.lideres += 1
+            else:
+                voo.seguidores += 1
+                self.seguidores += 1
+
+        if lider:
+            execucoes_coalescidas.inc(papel="lider")
+        else:
+            execucoes_coalescidas.inc(papel="seguidor")
+            print(f"🔗 {self.nome}: aguardando execução em andamento para '{chave}'")
+        return voo, lider
+
+    def concluir(self, chave, voo, resultado=None, erro=None):
+        """Encerra o voo do líder e entrega resultado (ou erro) a quem estiver esperando"""
+        with self._lock:
+            # Um voo abandonado já saiu do mapa; outro pode ter ocupado a chave
+            if self._em_voo.get(chave) is voo:
+                del self._em_voo[chave]
+            voo.resultado = resultado
+            voo.erro = erro
+            voo.concluido.set()
+            callbacks, voo.callbacks = voo.callbacks, []
+        for callback in callbacks:
+            callback(resultado, erro)
+        if voo.seguidores:
+            print(f"🔗 {self.nome}: resultado de '{chave}' compartilhado com {voo.seguidores} chamada(s)")
+
+    def acompanhar(self, voo, callback):
+        """Seguidor sem thread esperando: callback(resultado, erro) roda na thread do líder ao concluir.
+
+        Se o líder não concluir em self.timeout, o seguidor sai do voo e o
+        callback recebe TimeoutError (na thread vigia), uma vez só.
+        """
+        with self._lock:
+            if not voo.concluido.is_set():
+                voo.callbacks.append(callback)
+                heapq.heappush(self._prazos, (time.monotonic() + self.timeout, next(self._contador_prazos),
+                                              voo, callback))
+                # Criada na primeira espera, não no import (preload_app do gunicorn)
+                if self._vigia is None or not self._vigia.is_alive():
+                    self._vigia = threading.Thread(target=self._vigiar, name=f"coalescencia-{self.nome}",
+                                                   daemon=True)
+                    self._vigia.start()
+                self._lock.notify()
+                return
+        callback(voo.resultado, voo.erro)
+
+    def _vigiar(self):
+        while True:
+            with self._lock:
+                while not self._prazos or self._prazos[0][0] > time.monotonic():
+                    self._lock.wait(self._prazos[0][0] - time.monotonic() if self._prazos else None)
+                _, _, voo, callback = heapq.heappop(self._prazos)
+                # Voo já concluído: o callback já saiu da lista
+                if not any(outro is callback for outro in voo.callbacks):
+                    continue
+                voo.callbacks = [outro for outro in voo.callbacks if outro is not callback]
+                voo.seguidores -= 1
+                self.timeouts += 1
+            callback(None, TimeoutError(f"{self.nome}: execução em andamento para '{voo.chave}' "
+                                        f"não terminou em {self.timeout:.0f}s"))
+
+    def abandonar(self, chave, voo):
+        """Líder desiste sem executar, desde que ninguém esteja seguindo o voo; retorna se desistiu"""
+        with self._lock:
+            if voo.seguidores:
+                return False
+            if self._em_voo.get(chave) is voo:
+                del self._em_voo[chave]
+            voo.concluido.set()
+            return True
+
+    def em_voo(self, chave):
+        """Há uma execução em andamento para a chave (uma chamada agora seria seguidora)"""
+        with self._lock:
+            return chave in self._em_voo
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'em_voo': len(self._em_voo),
+                'aguardando': sum(voo.seguidores for voo in self._em_voo.values()),
+                'lideres': self.lideres,
+                'seguidores': self.seguidores,
+                'timeouts': self.timeouts,
+            }
+
+
+coalescedor_analises = Coalescedor("análises")
+registro.coletor("coalescencia", coalescedor_analises.estatisticas)
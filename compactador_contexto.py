@@ -0,0 +1,75 @@
+# compactador_contexto.py
+import json
+import os
+import re
+
+from buscador_duck import _calcular_peso_relevancia
+from duplicatas import AgrupadorDuplicatas
+
+# Orçamento aproximado (em tokens) para os resultados enviados ao LLM
+LLM_ORCAMENTO_TOKENS = int(os.environ.get("LLM_ORCAMENTO_TOKENS", "6000"))
+LLM_MAX_CARACTERES_CORPO = int(os.environ.get("LLM_MAX_CARACTERES_CORPO", "500"))
+CARACTERES_POR_TOKEN = 4  # Estimativa conservadora para português
+
+_FIM_DE_FRASE = re.compile(r'(?<=[.!?;])\s+')
+
+
+def estimar_tokens(texto):
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def _frases_com_nome(corpo, nome_pessoa):
+    """Mantém só as frases que citam a pessoa (nome completo ou primeiro + último nome)"""
+    frases = [f for f in _FIM_DE_FRASE.split(corpo) if f.strip()]
+    if not frases:
+        return corpo
+
+    nome = nome_pessoa.lower()
+    partes = nome.split()
+    primeiro, ultimo = (partes[0], partes[-1]) if len(partes) >= 2 else (nome, nome)
+
+    relevantes = [
+        frase for frase in frases
+        if nome in frase.lower() or (primeiro in frase.lower() and ultimo in frase.lower())
+    ]
+    # Sem menção explícita (o nome pode estar só no título): fica a primeira frase
+    return ' '.join(relevantes) if relevantes else frases[0]
+
+
+def compactar_resultados(nome_pessoa, resultados, orcamento_tokens=None):
+    """Seleciona e enxuga os resultados que vão para o prompt.
+
+    1. Ordena pelo peso de relevância (fontes oficiais e jurídicas primeiro);
+    2. Reduz cada corpo às frases que citam a pessoa;
+    3. Junta trechos quase idênticos após o corte (somando em `duplicatas`);
+    4. Para quando o orçamento de tokens acaba.
+    Retorna novos dicts com title/body/href/duplicatas; a entrada não é alterada.
+    """
+    orcamento = orcamento_tokens or LLM_ORCAMENTO_TOKENS
+    ordenados = sorted(resultados, key=_calcular_peso_relevancia, reverse=True)
+
+    agrupador = AgrupadorDuplicatas()
+    compactados = []
+    tokens_usados = 0
+
+    for resultado in ordenados:
+        corpo = _frases_com_nome(resultado.get('body', '') or '', nome_pessoa)[:LLM_MAX_CARACTERES_CORPO]
+        item = {
+            'title': resultado.get('title', 'N/A'),
+            'body': corpo,
+            'href': resultado.get('href', 'N/A'),
+            'duplicatas': resultado.get('duplicatas', 0),
+        }
+
+        if not agrupador.adicionar(item):
+            continue  # Contagem somada ao representante pelo agrupador
+
+        custo = estimar_tokens(json.dumps(item, ensure_ascii=False))
+        if tokens_usados + custo > orcamento and compactados:
+            break
+        tokens_usados += custo
+        compactados.append(item)
+
+    print(f"🗜️  Contexto compactado: {len(resultados)} → {len(compactados)} resultados "
+          f"(~{tokens_usados}/{orcamento} tokens)")
+    return compactados
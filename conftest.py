@@ -0,0 +1,16 @@
+import time
+
+import pytest
+
+
+def _esperar(condicao, timeout=5):
+    limite = time.monotonic() + timeout
+    while not condicao():
+        assert time.monotonic() < limite, "condição não atingida a tempo"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def esperar():
+    """esperar(condicao, timeout=5): repete condicao() até ser verdadeira ou falha o teste"""
+    return _esperar
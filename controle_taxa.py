@@ -0,0 +1,192 @@
+# controle_taxa.py
+import threading
+import time
+
+
+class LimitadorTokenBucket:
+    """Token bucket compartilhado por todas as threads do processo"""
+
+    def __init__(self, taxa_por_segundo, capacidade=None):
+        self.taxa = float(taxa_por_segundo)
+        self.capacidade = float(capacidade) if capacidade else 1.0
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+        self.total_adquiridos = 0
+        self.tempo_total_espera = 0.0
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def adquirir(self, tokens=1.0):
+        """Bloqueia até haver tokens disponíveis e retorna o tempo esperado"""
+        if self.taxa <= 0:
+            return 0.0  # Taxa 0 = sem limite
+
+        esperado = 0.0
+        while True:
+            with self._lock:
+                self._reabastecer()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self.total_adquiridos += 1
+                    self.tempo_total_espera += esperado
+                    return esperado
+                falta = (tokens - self._tokens) / self.taxa
+            time.sleep(falta)
+            esperado += falta
+
+    def estado(self):
+        with self._lock:
+            self._reabastecer()
+            return {
+                'taxa_por_segundo': self.taxa,
+                'capacidade': self.capacidade,
+                'tokens_disponiveis': round(self._tokens, 3),
+                'total_adquiridos': self.total_adquiridos,
+                'tempo_total_espera': round(self.tempo_total_espera, 3),
+            }
+
+
+class ControleConcorrenciaAIMD:
+    """Limite de requisições em voo com aumento aditivo e redução multiplicativa.
+
+    Cada sucesso soma incremento/limite (≈ +incremento por "janela" cheia de
+    sucessos); cada erro de limite de taxa multiplica o limite por
+    fator_reducao, no máximo uma vez por intervalo_reducao (erros simultâneos
+    do mesmo episódio não derrubam o limite várias vezes).
+    """
+
+    def __init__(self, limite_inicial, limite_minimo=1, limite_maximo=None,
+                 incremento=1.0, fator_reducao=0.5, intervalo_reducao=2.0):
+        self.limite_minimo = float(limite_minimo)
+        self.limite_maximo = float(limite_maximo or limite_inicial)
+        self.limite = min(max(float(limite_inicial), self.limite_minimo), self.limite_maximo)
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.intervalo_reducao = intervalo_reducao
+        self.em_voo = 0
+        self.sucessos = 0
+        self.erros = 0
+        self.reducoes = 0
+        self._ultima_reducao = 0.0
+        self._cond = threading.Condition()
+
+    def adquirir(self):
+        with self._cond:
+            while self.em_voo >= int(self.limite):
+                self._cond.wait()
+            self.em_voo += 1
+
+    def liberar(self, sucesso):
+        """sucesso=True aumenta o limite, False reduz, None só libera a vaga"""
+        with self._cond:
+            self.em_voo -= 1
+            if sucesso is True:
+                self.sucessos += 1
+                self.limite = min(self.limite_maximo, self.limite + self.incremento / self.limite)
+            elif sucesso is False:
+                self.erros += 1
+                agora = time.monotonic()
+                if agora - self._ultima_reducao >= self.intervalo_reducao:
+                    self.limite = max(self.limite_minimo, self.limite * self.fator_reducao)
+                    self._ultima_reducao = agora
+                    self.reducoes += 1
+            self._cond.notify_all()
+
+    def estado(self):
+        with self._cond:
+            return {
+                'limite': round(self.limite, 2),
+                'em_voo': self.em_voo,
+                'sucessos': self.sucessos,
+                'erros': self.erros,
+                'reducoes': self.reducoes,
+            }
+
+
+class DisjuntorCircuito:
+    """Circuit breaker compartilhado: após N falhas seguidas pausa TODOS os workers.
+
+    FECHADO -> ABERTO (falhas consecutivas >= limiar) -> MEIO_ABERTO (fim do
+    resfriamento, uma única requisição de sonda) -> FECHADO se a sonda passar,
+    ou ABERTO de novo com resfriamento dobrado (até resfriamento_maximo).
+    """
+
+    FECHADO = "fechado"
+    ABERTO = "aberto"
+    MEIO_ABERTO = "meio_aberto"
+
+    def __init__(self, limiar_falhas=3, resfriamento=30.0, resfriamento_maximo=300.0):
+        self.limiar_falhas = limiar_falhas
+        self.resfriamento_base = resfriamento
+        self.resfriamento_maximo = resfriamento_maximo
+        self.estado_atual = self.FECHADO
+        self.falhas_consecutivas = 0
+        self.aberturas = 0
+        self._resfriamento = resfriamento
+        self._aberto_ate = 0.0
+        self._sonda_em_voo = False
+        self._cond = threading.Condition()
+
+    def aguardar(self):
+        """Bloqueia enquanto o circuito estiver aberto (ou com sonda em andamento)"""
+        with self._cond:
+            while True:
+                if self.estado_atual == self.FECHADO:
+                    return
+                if self.estado_atual == self.ABERTO:
+                    restante = self._aberto_ate - time.monotonic()
+                    if restante <= 0:
+                        self.estado_atual = self.MEIO_ABERTO
+                        self._sonda_em_voo = True
+                        print("🟡 Disjuntor meio-aberto: enviando requisição de teste")
+                        return
+                    self._cond.wait(restante)
+                elif not self._sonda_em_voo:
+                    self._sonda_em_voo = True
+                    return
+                else:
+                    self._cond.wait(1.0)
+
+    def registrar_sucesso(self):
+        with self._cond:
+            if self.estado_atual == self.ABERTO:
+                return  # Resposta de requisição anterior à abertura: só a sonda fecha o circuito
+            if self.estado_atual == self.MEIO_ABERTO:
+                print("🟢 Disjuntor fechado: buscas retomadas")
+            self.estado_atual = self.FECHADO
+            self.falhas_consecutivas = 0
+            self._resfriamento = self.resfriamento_base
+            self._sonda_em_voo = False
+            self._cond.notify_all()
+
+    def registrar_falha(self):
+        with self._cond:
+            self.falhas_consecutivas += 1
+            if self.estado_atual == self.MEIO_ABERTO:
+                self._resfriamento = min(self._resfriamento * 2, self.resfriamento_maximo)
+                self._abrir()
+            elif self.estado_atual == self.FECHADO and self.falhas_consecutivas >= self.limiar_falhas:
+                self._abrir()
+            self._sonda_em_voo = False
+            self._cond.notify_all()
+
+    def _abrir(self):
+        self.estado_atual = self.ABERTO
+        self._aberto_ate = time.monotonic() + self._resfriamento
+        self.aberturas += 1
+        print(f"🔴 Disjuntor aberto: buscas pausadas por {self._resfriamento:.1f}s")
+
+    def estado(self):
+        with self._cond:
+            restante = max(0.0, self._aberto_ate - time.monotonic()) if self.estado_atual == self.ABERTO else 0.0
+            return {
+                'estado': self.estado_atual,
+                'falhas_consecutivas': self.falhas_consecutivas,
+                'aberturas': self.aberturas,
+                'resfriamento_atual': self._resfriamento,
+                'segundos_para_reabrir': round(restante, 1),
+            }
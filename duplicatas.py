@@ -0,0 +1,88 @@
+# duplicatas.py
+import hashlib
+import os
+import re
+import unicodedata
+
+# Distância de Hamming máxima (em 64 bits) para considerar dois resultados a mesma notícia
+DUPLICATA_DISTANCIA_MAXIMA = int(os.environ.get("DUPLICATA_DISTANCIA_MAXIMA", "12"))
+DUPLICATA_TAMANHO_SHINGLE = int(os.environ.get("DUPLICATA_TAMANHO_SHINGLE", "2"))
+
+_PALAVRA = re.compile(r"\w+")
+
+
+def _palavras(texto):
+    """Minúsculas, sem acentos e sem pontuação"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _PALAVRA.findall(texto)
+
+
+def shingles(texto, tamanho=DUPLICATA_TAMANHO_SHINGLE):
+    palavras = _palavras(texto)
+    if len(palavras) <= tamanho:
+        return [' '.join(palavras)] if palavras else []
+    return [' '.join(palavras[i:i + tamanho]) for i in range(len(palavras) - tamanho + 1)]
+
+
+def simhash(texto):
+    """SimHash de 64 bits sobre os shingles de palavras do texto"""
+    pesos = [0] * 64
+    for shingle in shingles(texto):
+        valor = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            pesos[bit] += 1 if (valor >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(64) if pesos[bit] > 0)
+
+
+def distancia_hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def texto_resultado(resultado):
+    return f"{resultado.get('title', '')} {resultado.get('body', '')}"
+
+
+class AgrupadorDuplicatas:
+    """Agrupa resultados quase idênticos (notícias replicadas em vários portais).
+
+    O primeiro resultado de cada grupo é o representante; os demais só
+    incrementam `duplicatas` e entram em `fontes_similares` do representante.
+    A busca de candidatos usa bandas do SimHash: se a distância é <= d, pelo
+    menos uma das d+1 bandas é idêntica (princípio da casa dos pombos).
+    """
+
+    def __init__(self, distancia_maxima=DUPLICATA_DISTANCIA_MAXIMA):
+        self.distancia_maxima = distancia_maxima
+        self._num_bandas = distancia_maxima + 1
+        self._largura_banda = -(-64 // self._num_bandas)
+        self._bandas = [{} for _ in range(self._num_bandas)]
+        self._representantes = []
+
+    def _chaves_bandas(self, assinatura):
+        mascara = (1 << self._largura_banda) - 1
+        return [(assinatura >> (i * self._largura_banda)) & mascara for i in range(self._num_bandas)]
+
+    def encontrar_representante(self, assinatura):
+        for banda, chave in zip(self._bandas, self._chaves_bandas(assinatura)):
+            for indice in banda.get(chave, ()):
+                assinatura_rep, representante = self._representantes[indice]
+                if distancia_hamming(assinatura, assinatura_rep) <= self.distancia_maxima:
+                    return representante
+        return None
+
+    def adicionar(self, resultado):
+        """Retorna True se o resultado é novo (representante) e False se é duplicata"""
+        assinatura = simhash(texto_resultado(resultado))
+        representante = self.encontrar_representante(assinatura)
+        if representante is not None:
+            # O resultado descartado pode já representar outras cópias
+            representante['duplicatas'] = representante.get('duplicatas', 0) + 1 + resultado.get('duplicatas', 0)
+            representante.setdefault('fontes_similares', []).append(resultado.get('href', ''))
+            return False
+
+        indice = len(self._representantes)
+        self._representantes.append((assinatura, resultado))
+        for banda, chave in zip(self._bandas, self._chaves_bandas(assinatura)):
+            banda.setdefault(chave, []).append(indice)
+        return True
@@ -0,0 +1,120 @@
+# executor_llm.py
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from metricas import registro
+
+# Máximo de chamadas ao provedor de LLM em andamento ao mesmo tempo (por processo)
+LLM_MAX_EM_VOO = int(os.environ.get("LLM_MAX_EM_VOO", "8"))
+# Tempo máximo (fila + chamada) que quem pediu a análise espera pela resposta
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", "90"))
+
+
+class ExecutorLLM:
+    """Pool limitado para chamadas bloqueantes de LLM (Grok/Gemini).
+
+    As chamadas de todas as requisições dividem as mesmas `max_em_voo` vagas;
+    quem espera por uma vaga fica na fila e o tempo de fila é medido. Em caso
+    de timeout quem chamou recebe {"error": ...} (o mesmo formato dos scripts),
+    mas a chamada em andamento só libera a vaga quando o provedor responder.
+    """
+
+    def __init__(self, max_em_voo=LLM_MAX_EM_VOO, timeout=LLM_TIMEOUT):
+        self.max_em_voo = max_em_voo
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_em_voo, thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self.na_fila = 0
+        self.em_voo = 0
+        self.concluidas = 0
+        self.erros = 0
+        self.timeouts = 0
+        self.espera_fila_total = 0.0
+        self.espera_fila_maxima = 0.0
+        self.duracao_total = 0.0
+
+    def _executar_medindo(self, enfileirado_em, funcao, args, kwargs):
+        espera = time.monotonic() - enfileirado_em
+        with self._lock:
+            self.na_fila -= 1
+            self.em_voo += 1
+            self.espera_fila_total += espera
+            self.espera_fila_maxima = max(self.espera_fila_maxima, espera)
+
+        inicio = time.monotonic()
+        try:
+            resultado = funcao(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.erros += 1
+            raise
+        finally:
+            with self._lock:
+                self.em_voo -= 1
+                self.concluidas += 1
+                self.duracao_total += time.monotonic() - inicio
+
+        if isinstance(resultado, dict) and "error" in resultado:
+            with self._lock:
+                self.erros += 1
+        return resultado
+
+    def submeter(self, funcao, *args, **kwargs):
+        """Enfileira a chamada e retorna o Future"""
+        with self._lock:
+            self.na_fila += 1
+        futuro = self._executor.submit(self._executar_medindo, time.monotonic(), funcao, args, kwargs)
+        futuro.add_done_callback(self._ao_cancelar)
+        return futuro
+
+    def _ao_cancelar(self, futuro):
+        if futuro.cancelled():
+            with self._lock:
+                self.na_fila -= 1
+
+    def executar(self, funcao, *args, timeout=None, **kwargs):
+        """Executa no pool e espera o resultado (bloqueante, com timeout)"""
+        resultado, _ = self.executar_ou_cancelar(funcao, *args, timeout=timeout, **kwargs)
+        return resultado
+
+    def executar_ou_cancelar(self, funcao, *args, timeout=None, **kwargs):
+        """Como executar(), mas retorna (resultado, em_andamento).
+
+        em_andamento=True quando o timeout pegou a chamada já no provedor: ela
+        não pode ser cancelada e termina em segundo plano, então quem chamou
+        não deve repetir o mesmo trabalho em outra chamada (pagaria duas vezes).
+        """
+        futuro = self.submeter(funcao, *args, **kwargs)
+        limite = timeout if timeout is not None else self.timeout
+        try:
+            return futuro.result(timeout=limite), False
+        except FuturesTimeoutError:
+            cancelada = futuro.cancel()  # Só tem efeito se ainda estiver na fila
+            with self._lock:
+                self.timeouts += 1
+            print(f"⏰ Timeout de {limite:.0f}s na chamada ao LLM ({funcao.__name__})")
+            return {"error": f"timeout após {limite:.0f}s"}, not cancelada
+        except Exception as e:
+            return {"error": str(e)}, False
+
+    def estatisticas(self):
+        with self._lock:
+            iniciadas = self.concluidas + self.em_voo
+            return {
+                'max_em_voo': self.max_em_voo,
+                'em_voo': self.em_voo,
+                'na_fila': self.na_fila,
+                'concluidas': self.concluidas,
+                'erros': self.erros,
+                'timeouts': self.timeouts,
+                'espera_fila_media': round(self.espera_fila_total / iniciadas, 3) if iniciadas else 0.0,
+                'espera_fila_maxima': round(self.espera_fila_maxima, 3),
+                'duracao_media': round(self.duracao_total / self.concluidas, 3) if self.concluidas else 0.0,
+            }
+
+
+# Executor compartilhado por todas as análises do processo
+executor_llm = ExecutorLLM()
+registro.coletor("executor_llm", executor_llm.estatisticas)
@@ -3,11 +3,24 @@ import multiprocessing
 
 # Configurações para economizar memória no Render
 workers = 1
-threads = 2
+threads = 8  # Requisições síncronas só esperam na fila do agendador (AGENDADOR_CAPACIDADE limita as análises)
 worker_class = "sync"
 worker_connections = 1000
 timeout = 120
 keepalive = 5
 max_requests = 1000
 max_requests_jitter = 100
-preload_app = True
\ No newline at end of file
+preload_app = True
+
+def post_worker_init(worker):
+    # Clientes de busca/LLM nascem no worker, depois do fork: o canal gRPC do
+    # xai não sobrevive ao fork do master que fez o preload_app
+    try:
+        from buscar import obter_analisador
+        from pool_clientes import pool_clientes
+    except Exception as e:
+        worker.log.warning(f"Pool de clientes não aquecido: {e}")
+        return
+
+    obter_analisador()
+    pool_clientes.aquecer()
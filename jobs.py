@@ -0,0 +1,225 @@
+# jobs.py
+import atexit
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import CancelledError
+from datetime import datetime
+
+from agendador import agendador_analises
+from cache_persistente import CACHE_DB_PATH, ConexaoSqlite
+from coalescencia import coalescedor_analises
+from metricas import registro
+
+# Por quanto tempo um job terminado continua consultável
+JOBS_RETENCAO = int(os.environ.get("JOBS_RETENCAO", "3600"))
+
+MENSAGEM_INTERROMPIDO = ("job interrompido (worker reiniciado); envie de novo — "
+                         "as fases já concluídas são retomadas do checkpoint")
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class GerenciadorJobs:
+    """Análises em segundo plano com status consultável por id.
+
+    Os jobs rodam nas vagas do agendador (nenhuma thread por job). Com
+    `chave`, passam antes pelo coalescedor, como os pedidos síncronos: só o
+    líder entra na fila do agendador; um seguidor não ocupa vaga nem thread
+    e é concluído pelo callback do voo do líder. O job fica 'pendente' até
+    a tarefa informar a primeira fase.
+
+    O status é gravado também em SQLite a cada mudança. Quando o gunicorn
+    recicla o worker (max_requests), os jobs em andamento morrem com ele:
+    na saída do processo, ou na primeira consulta depois dela, viram 'erro'
+    com MENSAGEM_INTERROMPIDO; reenviar a análise retoma do checkpoint.
+    """
+
+    PENDENTE = "pendente"
+    EXECUTANDO = "executando"
+    CONCLUIDO = "concluido"
+    ERRO = "erro"
+
+    def __init__(self, agendador=agendador_analises, coalescedor=coalescedor_analises, caminho=None,
+                 retencao=JOBS_RETENCAO):
+        self.agendador = agendador
+        self.coalescedor = coalescedor
+        self.caminho = caminho or CACHE_DB_PATH
+        self.retencao = retencao
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._banco = ConexaoSqlite(self.caminho, self._criar_tabelas)
+
+    @staticmethod
+    def _criar_tabelas(conn):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                pid INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                job TEXT NOT NULL,
+                atualizado REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_atualizado ON jobs (atualizado)")
+
+    @property
+    def _conn(self):
+        return self._banco.obter()
+
+    @staticmethod
+    def _publico(job):
+        return {chave: valor for chave, valor in job.items() if not chave.startswith('_')}
+
+    def _gravar(self, job):
+        # Chamado com o lock
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, pid, status, job, atualizado) VALUES (?, ?, ?, ?, ?)",
+            (job['id'], os.getpid(), job['status'],
+             json.dumps(self._publico(job), ensure_ascii=False, default=str), time.time())
+        )
+        self._conn.commit()
+
+    def submeter(self, tarefa, prioridade=agendador_analises.INTERATIVA, cliente=None, chave=None, **dados):
+        """Enfileira tarefa(ao_mudar_fase) e retorna o id do job.
+
+        `cliente` é o rodízio do lote no agendador; `chave` (chave_pessoa)
+        liga o job ao coalescedor. `dados` (nome, cargo...) só são guardados
+        para aparecer no status.
+        """
+        self._limpar_antigos()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': self.PENDENTE,
+                'fase': 'na_fila',
+                'dados': dados,
+                'prioridade': prioridade,
+                'criado_em': datetime.now().isoformat(),
+                'iniciado_em': None,
+                'concluido_em': None,
+                'resultado': None,
+                'erro': None,
+                '_concluido_monotonic': None,
+            }
+            self._gravar(self._jobs[job_id])
+
+        voo, lider = self.coalescedor.iniciar(chave) if chave is not None else (None, True)
+        if lider:
+            futuro = self.agendador.submeter(self._executar, job_id, tarefa, prioridade=prioridade, cliente=cliente)
+            if voo is not None:
+                futuro.add_done_callback(lambda f: self._concluir_voo(chave, voo, f))
+        else:
+            self._mudar_fase(job_id, 'aguardando_analise_em_andamento')
+            self.coalescedor.acompanhar(voo, lambda resultado, erro: self._finalizar(job_id, resultado, erro))
+        print(f"📥 Job {job_id} enfileirado ({self.pendentes()} aguardando)")
+        return job_id
+
+    def _mudar_fase(self, job_id, fase):
+        with self._lock:
+            job = self._jobs[job_id]
+            if job['status'] in (self.CONCLUIDO, self.ERRO):
+                return
+            if job['status'] == self.PENDENTE:
+                job.update(status=self.EXECUTANDO, iniciado_em=datetime.now().isoformat())
+            job['fase'] = fase
+            self._gravar(job)
+
+    def _finalizar(self, job_id, resultado, erro):
+        with self._lock:
+            job = self._jobs[job_id]
+            # Já interrompido na saída do processo: o status gravado não muda mais
+            if job['status'] in (self.CONCLUIDO, self.ERRO):
+                return
+            if erro is None:
+                job.update(status=self.CONCLUIDO, fase='concluido', resultado=resultado)
+            else:
+                job.update(status=self.ERRO, erro=str(erro) or type(erro).__name__)
+            job.update(concluido_em=datetime.now().isoformat(), _concluido_monotonic=time.monotonic())
+            self._gravar(job)
+        if erro is None:
+            print(f"✅ Job {job_id} concluído")
+        else:
+            print(f"❌ Job {job_id} falhou: {erro}")
+
+    def _executar(self, job_id, tarefa):
+        try:
+            resultado = tarefa(lambda fase: self._mudar_fase(job_id, fase))
+        except Exception as e:
+            traceback.print_exc()
+            self._finalizar(job_id, None, e)
+            raise
+        self._finalizar(job_id, resultado, None)
+        return resultado
+
+    def _concluir_voo(self, chave, voo, futuro):
+        """Entrega o resultado do job líder a quem estiver acompanhando a mesma pessoa"""
+        erro = CancelledError() if futuro.cancelled() else futuro.exception()
+        self.coalescedor.concluir(chave, voo, resultado=None if erro else futuro.result(), erro=erro)
+
+    def obter(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._publico(job)
+            linha = self._conn.execute("SELECT pid, status, job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if linha is None:
+                return None
+
+            pid, status, dados = linha
+            job = json.loads(dados)
+            # Não está na memória deste processo e quem o executava morreu: não vai terminar
+            if status not in (self.CONCLUIDO, self.ERRO) and (pid == os.getpid() or not _processo_vivo(pid)):
+                job.update(status=self.ERRO, erro=MENSAGEM_INTERROMPIDO, concluido_em=datetime.now().isoformat())
+                self._gravar(job)
+            return job
+
+    def interromper_pendentes(self):
+        """Na saída do processo: jobs que não terminaram ficam como interrompidos"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job['status'] in (self.PENDENTE, self.EXECUTANDO):
+                    job.update(status=self.ERRO, erro=MENSAGEM_INTERROMPIDO, concluido_em=datetime.now().isoformat())
+                    self._gravar(job)
+
+    def pendentes(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job['status'] == self.PENDENTE)
+
+    def _limpar_antigos(self):
+        limite = time.monotonic() - self.retencao
+        with self._lock:
+            antigos = [
+                job_id for job_id, job in self._jobs.items()
+                if job['_concluido_monotonic'] is not None and job['_concluido_monotonic'] < limite
+            ]
+            for job_id in antigos:
+                del self._jobs[job_id]
+            # Jobs ativos regravam a cada fase; só linhas paradas há mais que a retenção saem
+            self._conn.execute("DELETE FROM jobs WHERE atualizado < ?", (time.time() - self.retencao,))
+            self._conn.commit()
+
+    def estatisticas(self):
+        with self._lock:
+            por_status = {}
+            for job in self._jobs.values():
+                por_status[job['status']] = por_status.get(job['status'], 0) + 1
+            return {'jobs': len(self._jobs), **por_status}
+
+
+gerenciador_jobs = GerenciadorJobs()
+registro.coletor("jobs", gerenciador_jobs.estatisticas)
+atexit.register(gerenciador_jobs.interromper_pendentes)
@@ -0,0 +1,180 @@
+# metricas.py
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites (em segundos) dos histogramas de latência: de cache local a LLM lento
+BUCKETS_PADRAO = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 300)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(pares):
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+def _formatar_valor(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valor=1, **rotulos):
+        chave = tuple(str(rotulos.get(nome, '')) for nome in self.rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} counter"]
+        with self._lock:
+            for chave, valor in sorted(self._valores.items()):
+                linhas.append(f"{self.nome}{_formatar_rotulos(zip(self.rotulos, chave))} {_formatar_valor(valor)}")
+        return linhas
+
+
+class Histograma:
+    def __init__(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}  # rótulos -> [contagens por bucket, soma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, **rotulos):
+        chave = tuple(str(rotulos.get(nome, '')) for nome in self.rotulos)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """Observa a duração do bloco; exceções são marcadas em status=erro se houver o rótulo"""
+        inicio = time.monotonic()
+        try:
+            yield
+        except Exception:
+            if 'status' in self.rotulos:
+                rotulos['status'] = 'erro'
+            raise
+        finally:
+            if 'status' in self.rotulos:
+                rotulos.setdefault('status', 'ok')
+            self.observar(time.monotonic() - inicio, **rotulos)
+
+    def exportar(self):
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            for chave, (contagens, soma, total) in sorted(self._series.items()):
+                pares = list(zip(self.rotulos, chave))
+                acumulado = 0
+                for limite, contagem in zip(self.buckets, contagens):
+                    acumulado += contagem
+                    rotulos = _formatar_rotulos(pares + [('le', _formatar_valor(float(limite)))])
+                    linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+                linhas.append(f"{self.nome}_sum{_formatar_rotulos(pares)} {_formatar_valor(soma)}")
+                linhas.append(f"{self.nome}_count{_formatar_rotulos(pares)} {total}")
+        return linhas
+
+
+def _achatar(prefixo, dados, saida):
+    """Converte dicts aninhados de estatisticas() em pares (nome_gauge, valor numérico)"""
+    for chave, valor in dados.items():
+        nome = f"{prefixo}_{chave}"
+        if isinstance(valor, dict):
+            _achatar(nome, valor, saida)
+        elif isinstance(valor, bool):
+            saida.append((nome, int(valor)))
+        elif isinstance(valor, (int, float)):
+            saida.append((nome, valor))
+
+
+class RegistroMetricas:
+    """Métricas do processo no formato texto do Prometheus (sem dependências).
+
+    Além de contadores e histogramas, aceita coletores: funções que retornam
+    os dicts de estatisticas() já existentes, exportados como gauges.
+    """
+
+    def __init__(self):
+        self._metricas = {}
+        self._coletores = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, classe, nome, *args, **kwargs):
+        with self._lock:
+            if nome not in self._metricas:
+                self._metricas[nome] = classe(nome, *args, **kwargs)
+            return self._metricas[nome]
+
+    def contador(self, nome, ajuda, rotulos=()):
+        return self._registrar(Contador, nome, ajuda, rotulos)
+
+    def histograma(self, nome, ajuda, rotulos=(), buckets=BUCKETS_PADRAO):
+        return self._registrar(Histograma, nome, ajuda, rotulos, buckets)
+
+    def coletor(self, prefixo, funcao):
+        with self._lock:
+            self._coletores[prefixo] = funcao
+
+    def exportar(self):
+        with self._lock:
+            metricas = list(self._metricas.values())
+            coletores = list(self._coletores.items())
+
+        linhas = []
+        for metrica in metricas:
+            linhas.extend(metrica.exportar())
+
+        for prefixo, funcao in coletores:
+            try:
+                pares = []
+                _achatar(prefixo, funcao(), pares)
+            except Exception as e:
+                print(f"⚠️ Coletor de métricas '{prefixo}' falhou: {e}")
+                continue
+            for nome, valor in pares:
+                linhas.append(f"# TYPE {nome} gauge")
+                linhas.append(f"{nome} {_formatar_valor(valor)}")
+
+        return '\n'.join(linhas) + '\n'
+
+
+registro = RegistroMetricas()
+
+# Métricas compartilhadas entre módulos
+duracao_query_ddgs = registro.histograma(
+    "ddgs_query_duracao_segundos", "Duração de cada query ao DuckDuckGo", ("origem", "status"))
+duracao_fase_busca = registro.histograma(
+    "busca_fase_duracao_segundos", "Duração das fases de busca (primária/secundária)", ("fase",))
+duracao_fase_analise = registro.histograma(
+    "analise_fase_duracao_segundos", "Duração de cada fase da análise", ("fase",))
+duracao_analise = registro.histograma(
+    "analise_duracao_segundos", "Duração total de executar_analise", ("status",))
+duracao_llm = registro.histograma(
+    "llm_chamada_duracao_segundos", "Duração de cada chamada a um provedor de LLM", ("provedor", "status"))
+duracao_persistencia = registro.histograma(
+    "db_persistencia_duracao_segundos", "Duração da gravação da análise no banco", ("status",))
+duracao_http = registro.histograma(
+    "http_requisicao_duracao_segundos", "Duração das requisições HTTP por rota", ("rota", "metodo", "status"))
+
+erros = registro.contador("erros_total", "Erros por componente", ("componente",))
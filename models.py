@@ -96,6 +96,12 @@ class AnalisePessoa(BaseModel):
     recomendacoes: Optional[str] = None
     tweets_relevantes: List[str] = []
 
+class AnalisePessoaNomeada(AnalisePessoa):
+    nome: str
+
+class AnaliseLote(BaseModel):
+    analises: List[AnalisePessoaNomeada] = []
+
 class AnalisePessoaCreate(BaseModel):
     nome: str
     cargo: Optional[str] = None
@@ -0,0 +1,492 @@
+# motor_lote.py
+import os
+import queue
+import threading
+import time
+import traceback
+
+from checkpoints import chave_pessoa
+from metricas import registro
+
+# Tamanho de cada pool: busca (DuckDuckGo), LLM (Grok/Gemini) e gravação no banco
+MOTOR_WORKERS_BUSCA = int(os.environ.get("MOTOR_WORKERS_BUSCA", "2"))
+MOTOR_WORKERS_LLM = int(os.environ.get("MOTOR_WORKERS_LLM", "2"))
+MOTOR_WORKERS_BANCO = int(os.environ.get("MOTOR_WORKERS_BANCO", "1"))
+# Itens aguardando entre uma etapa e a próxima; cheia, a etapa anterior espera (backpressure)
+MOTOR_TAMANHO_FILA = int(os.environ.get("MOTOR_TAMANHO_FILA", "4"))
+# Quanto uma pessoa de baixo sinal espera o grupo do prompt em lote encher antes de seguir com um grupo menor
+MOTOR_ESPERA_GRUPO_LLM = float(os.environ.get("MOTOR_ESPERA_GRUPO_LLM", "10"))
+
+
+# Marca de fim na fila de uma etapa: um por worker, depois de todos os itens
+_FIM = object()
+
+
+class Etapa:
+    """Pool de threads de uma etapa do motor: lê da fila de entrada e chama processar(item).
+
+    Cada worker sai ao ler _FIM da fila (encerrar() põe um por worker).
+    ocioso(), se informado, é chamado sempre que a fila fica vazia por um
+    instante (usado para despachar um grupo incompleto do LLM em lote).
+    """
+
+    def __init__(self, nome, workers, processar, entrada, ocioso=None):
+        self.nome = nome
+        self.workers = max(workers, 1)
+        self.processar = processar
+        self.entrada = entrada
+        self.ocioso = ocioso
+        self._lock = threading.Lock()
+        self._threads = []
+        self.ocupadas = 0
+        self.processados = 0
+        self.tempo_ocupado = 0.0
+        self.inicio = None
+
+    def iniciar(self):
+        self.inicio = time.monotonic()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._trabalhar, name=f"motor-{self.nome}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def encerrar(self):
+        """Os workers terminam o que já está na fila e saem; espera todos saírem"""
+        for _ in self._threads:
+            self.entrada.put(_FIM)
+        for thread in self._threads:
+            thread.join()
+
+    def _trabalhar(self):
+        while True:
+            try:
+                item = self.entrada.get(timeout=0.2)
+            except queue.Empty:
+                if self.ocioso is not None:
+                    self._medir(self.ocioso)
+                continue
+            if item is _FIM:
+                return
+            self._medir(self.processar, item)
+            with self._lock:
+                self.processados += 1
+
+    def _medir(self, funcao, *args):
+        with self._lock:
+            self.ocupadas += 1
+        inicio = time.monotonic()
+        try:
+            funcao(*args)
+        finally:
+            with self._lock:
+                self.ocupadas -= 1
+                self.tempo_ocupado += time.monotonic() - inicio
+
+    def estatisticas(self):
+        with self._lock:
+            decorrido = time.monotonic() - self.inicio if self.inicio else 0.0
+            return {
+                'workers': self.workers,
+                'ocupadas': self.ocupadas,
+                'fila': self.entrada.qsize(),
+                'processados': self.processados,
+                # Fração do tempo em que os workers da etapa estiveram trabalhando
+                'utilizacao': round(self.tempo_ocupado / (decorrido * self.workers), 3) if decorrido else 0.0,
+            }
+
+
+class MotorLote:
+    """Pipeline de análises em lote: busca -> LLM -> banco, cada etapa com seu pool.
+
+    As etapas se ligam por filas limitadas, então a pessoa N+1 já está
+    buscando enquanto a pessoa N está no LLM, e uma etapa lenta segura as
+    anteriores em vez de acumular memória. processar() devolve os resultados
+    na ordem em que terminam; a utilização e a fila de cada etapa (em
+    estatisticas()) mostram qual pool aumentar.
+
+    Na etapa de LLM, pessoas de baixo sinal (analisador.candidato_lote) são
+    juntadas em grupos de até analisador.tamanho_lote_llm e analisadas com
+    um único prompt (etapa_llm_lote). Um grupo sai quando enche, quando a
+    busca já entregou todo mundo ou quando a pessoa mais antiga esperou
+    espera_grupo_llm segundos.
+
+    Com um agendador, o lote ocupa UMA vaga de lote (prioridade LOTE,
+    rodízio por `cliente`) enquanto houver pessoas que ele lidera entre a
+    busca e o fim do LLM; dentro dela, quem limita busca e LLM são os pools
+    das etapas, que assim se sobrepõem. A vaga é devolvida quando não sobra
+    trabalho de líder (itens que só acompanham outro voo não a seguram) e
+    também quando há outro trabalho de lote na fila do agendador: o motor
+    para de admitir pessoas, termina as que estão na vaga, a solta e volta
+    ao fim do rodízio. Assim um líder de outro cliente, de quem um item do
+    lote depende, nunca espera o lote inteiro.
+
+    Com um coalescedor, cada pessoa entra no mesmo voo das análises
+    interativas (chave_pessoa) antes de pedir a vaga: se a pessoa já está
+    sendo analisada, o item só acompanha o resultado, sem ocupar worker nem
+    vaga; se o motor lidera, quem chegar depois recebe
+    {'id', 'analise'[, 'erro']}.
+
+    persistir(analise, nome, cargo) -> id é chamado na etapa de banco;
+    sem ele, a análise só passa pelos artefatos.
+    """
+
+    def __init__(self, analisador, persistir=None, agendador=None, cliente=None, coalescedor=None,
+                 workers_busca=MOTOR_WORKERS_BUSCA, workers_llm=MOTOR_WORKERS_LLM,
+                 workers_banco=MOTOR_WORKERS_BANCO, tamanho_fila=MOTOR_TAMANHO_FILA,
+                 espera_grupo_llm=MOTOR_ESPERA_GRUPO_LLM):
+        self.analisador = analisador
+        self.persistir = persistir
+        self.agendador = agendador
+        self.cliente = cliente
+        self.coalescedor = coalescedor
+        self.espera_grupo_llm = espera_grupo_llm
+        self._cancelado = threading.Event()
+        self._alimentado = threading.Event()
+        self._saida = queue.Queue()
+        self._grupo_llm = []  # (entrada, item) aguardando o prompt em lote
+        self._lock_grupo = threading.Lock()
+        self._cond_vaga = threading.Condition()
+        self._vaga = None  # (Future no agendador, Event que a devolve) da vaga de lote atual
+        self._com_vaga = False
+        self._lideres_na_vaga = 0  # itens entre a busca e o fim do LLM dentro da vaga
+        self._admitidos_na_vaga = 0
+        self.grupos_llm = 0
+        self.compartilhadas = 0
+        self.etapas = {
+            'busca': Etapa('busca', workers_busca, self._etapa_busca, queue.Queue(maxsize=tamanho_fila)),
+            'llm': Etapa('llm', workers_llm, self._etapa_llm, queue.Queue(maxsize=tamanho_fila),
+                         ocioso=self._despachar_grupo_llm),
+            'banco': Etapa('banco', workers_banco, self._etapa_banco, queue.Queue(maxsize=tamanho_fila)),
+        }
+
+    def _ocupar_vaga(self, devolver):
+        # Roda num trabalhador do agendador e segura a vaga de lote até o motor devolvê-la
+        with self._cond_vaga:
+            if devolver.is_set():
+                return
+            self._com_vaga = True
+            self._admitidos_na_vaga = 0
+            self._cond_vaga.notify_all()
+        devolver.wait()
+
+    def _outro_lote_aguardando(self):
+        # Com a vaga em mãos, o trabalhador do motor não está na fila: o que está lá é de outro
+        return self.agendador.estatisticas()['fila_lote'] > 0
+
+    def _devolver_vaga(self):
+        # Chamado com _cond_vaga; tira da fila do agendador a vaga ainda não obtida
+        if self._vaga is None:
+            return
+        futuro, devolver = self._vaga
+        self._vaga = None
+        self._com_vaga = False
+        devolver.set()
+        if futuro.cancel():
+            print("🧹 Motor de lote: vaga de lote retirada da fila do agendador")
+
+    def _entrar_na_vaga(self, item, cancelavel=True):
+        """Espera a vaga de lote para um item que o motor lidera; False se o lote foi cancelado antes"""
+        if self.agendador is None:
+            return True
+        with self._cond_vaga:
+            while True:
+                # Cada vaga obtida admite ao menos uma pessoa, senão dois lotes só trocariam a vez
+                if self._com_vaga and (self._admitidos_na_vaga == 0 or not self._outro_lote_aguardando()):
+                    break
+                if self._com_vaga and self._lideres_na_vaga == 0:
+                    self._devolver_vaga()  # Cede a vez a outro cliente e volta ao fim do rodízio
+                if cancelavel and self._cancelado.is_set():
+                    return False
+                if self._vaga is None:
+                    devolver = threading.Event()
+                    futuro = self.agendador.submeter(self._ocupar_vaga, devolver, prioridade=self.agendador.LOTE,
+                                                     cliente=self.cliente)
+                    self._vaga = (futuro, devolver)
+                self._cond_vaga.wait(0.2)
+            self._lideres_na_vaga += 1
+            self._admitidos_na_vaga += 1
+            item['_na_vaga'] = True
+            return True
+
+    def _sair_da_vaga(self, item):
+        """O item terminou o trabalho que precisava da vaga (LLM concluído, falha ou descarte)"""
+        if not item.pop('_na_vaga', False):
+            return
+        with self._cond_vaga:
+            self._lideres_na_vaga -= 1
+            # Sem ninguém para entrar agora, ou com outro lote esperando: a vaga volta ao agendador
+            if self._lideres_na_vaga == 0 and (self.etapas['busca'].entrada.empty() or self._outro_lote_aguardando()):
+                self._devolver_vaga()
+            self._cond_vaga.notify_all()
+
+    def _entrar_no_voo(self, item):
+        """Retorna True se o item deve ser analisado aqui (lidera o voo ou não há coalescedor)"""
+        if self.coalescedor is None:
+            return True
+        item['_chave'] = chave_pessoa(item['nome'], item['cargo'])
+        voo, lider = self.coalescedor.iniciar(item['_chave'])
+        if lider:
+            item['_voo'] = voo
+            return True
+
+        def receber(resultado, erro):
+            if erro is not None:
+                item['erro'] = str(erro)
+            else:
+                item.update(id=resultado['id'], analise=resultado['analise'], erro=resultado.get('erro'))
+            with self._lock_grupo:
+                self.compartilhadas += 1
+            self._saida.put(item)
+
+        self.coalescedor.acompanhar(voo, receber)
+        return False
+
+    def _abandonar_voo(self, item):
+        """Solta o voo que o item lidera se ninguém o acompanha; retorna se o item está livre"""
+        voo = item.get('_voo')
+        if voo is None:
+            return True
+        if not self.coalescedor.abandonar(item['_chave'], voo):
+            return False
+        item['_voo'] = None
+        return True
+
+    def _descartar(self, item):
+        """Lote cancelado: descarta o item, a menos que alguém acompanhe o voo dele"""
+        if not self._cancelado.is_set() or not self._abandonar_voo(item):
+            return False
+        self._sair_da_vaga(item)
+        self._saida.put(item)
+        return True
+
+    def _entregar(self, item):
+        """Resultado final do item; encerra o voo que ele lidera"""
+        self._saida.put(item)
+        voo = item.get('_voo')
+        if voo is None:
+            return
+        item['_voo'] = None
+        if item['analise'] is None:
+            self.coalescedor.concluir(item['_chave'], voo, erro=RuntimeError(item['erro'] or "Análise não concluída"))
+            return
+        resultado = {'id': item['id'], 'analise': item['analise']}
+        if item['erro']:
+            resultado['erro'] = item['erro']
+        self.coalescedor.concluir(item['_chave'], voo, resultado=resultado)
+
+    def _falhar(self, item, etapa, e):
+        self._sair_da_vaga(item)
+        print(f"❌ Motor de lote: {item['nome']} falhou na etapa {etapa}: {e}")
+        traceback.print_exc()
+        item['erro'] = f"{etapa}: {e}"
+        self._entregar(item)
+
+    def _etapa_busca(self, item):
+        if self._descartar(item) or not self._entrar_no_voo(item):
+            return
+        if not self._entrar_na_vaga(item):
+            if self._descartar(item):
+                return
+            self._entrar_na_vaga(item, cancelavel=False)  # Alguém acompanha a pessoa: a análise segue
+        try:
+            execucao, analise, resultados, motivo = self.analisador.etapa_busca(
+                item['nome'], item['cargo'], item['estado']
+            )
+        except Exception as e:
+            self._falhar(item, 'busca', e)
+            return
+        item.update(execucao=execucao, analise=analise, resultados=resultados, motivo=motivo)
+        # Sem LLM necessário (sem resultados, triagem, checkpoint): direto para o banco
+        self.etapas['banco' if analise is not None else 'llm'].entrada.put(item)
+
+    def _etapa_llm(self, item):
+        if self._descartar(item):
+            return
+        if self.analisador.tamanho_lote_llm > 1 and self.analisador.candidato_lote(item['resultados']):
+            with self._lock_grupo:
+                self._grupo_llm.append((time.monotonic(), item))
+                cheio = len(self._grupo_llm) >= self.analisador.tamanho_lote_llm
+            if cheio:
+                self._despachar_grupo_llm()
+            return
+        try:
+            item['analise'] = self.analisador.etapa_llm(
+                item['nome'], item['cargo'], item['execucao'], item['resultados'], item['motivo']
+            )
+        except Exception as e:
+            self._falhar(item, 'llm', e)
+            return
+        self.etapas['banco'].entrada.put(item)
+
+    def _busca_esgotada(self):
+        busca = self.etapas['busca']
+        return self._alimentado.is_set() and busca.entrada.empty() and busca.ocupadas == 0
+
+    def _despachar_grupo_llm(self, forcar=False):
+        """Analisa um grupo do prompt em lote se ele encheu ou não tem por que esperar mais"""
+        with self._lock_grupo:
+            if not self._grupo_llm:
+                return
+            tamanho = self.analisador.tamanho_lote_llm
+            esperou = time.monotonic() - self._grupo_llm[0][0]
+            if not (forcar or len(self._grupo_llm) >= tamanho or esperou >= self.espera_grupo_llm
+                    or self._cancelado.is_set() or self._busca_esgotada()):
+                return
+            grupo = [item for _, item in self._grupo_llm[:tamanho]]
+            del self._grupo_llm[:tamanho]
+            self.grupos_llm += 1
+
+        grupo = [item for item in grupo if not self._descartar(item)]
+        if not grupo:
+            return
+        print(f"📦 Motor de lote: prompt em lote com {len(grupo)} pessoas de baixo sinal")
+        try:
+            analises = self.analisador.etapa_llm_lote([
+                (item['nome'], item['cargo'], item['execucao'], item['resultados']) for item in grupo
+            ])
+        except Exception as e:
+            for item in grupo:
+                self._falhar(item, 'llm', e)
+            return
+        for item, analise in zip(grupo, analises):
+            item['analise'] = analise
+            self.etapas['banco'].entrada.put(item)
+
+    def _etapa_banco(self, item):
+        self._sair_da_vaga(item)
+        if self._descartar(item):
+            return
+        if self.persistir is not None:
+            try:
+                item['id'] = self.persistir(item['analise'], item['nome'], item['cargo'])
+            except Exception as e:
+                # Como no modo síncrono: a análise fica, com o erro ao lado
+                self._falhar(item, 'banco', e)
+                return
+        self._entregar(item)
+
+    def _alimentar(self, pessoas, estado):
+        try:
+            for posicao, pessoa in enumerate(pessoas):
+                item = {
+                    'posicao': posicao,
+                    'nome': pessoa['nome'],
+                    'cargo': pessoa.get('cargo') or None,
+                    'estado': estado,
+                    'analise': None,
+                    'id': None,
+                    'erro': None,
+                }
+                # Bloqueia se a busca estiver saturada, mas para se o lote for cancelado
+                while not self._cancelado.is_set():
+                    try:
+                        self.etapas['busca'].entrada.put(item, timeout=0.2)
+                        break
+                    except queue.Full:
+                        pass
+                if self._cancelado.is_set():
+                    break
+        finally:
+            self._alimentado.set()
+
+    def _cancelar(self):
+        """Cliente saiu: para de alimentar; quem espera a vaga e não tem quem acompanhe é descartado"""
+        self._cancelado.set()
+
+    def _encerrar(self, alimentador):
+        """Encerra as etapas em ordem: cada uma recebe as marcas de fim depois que a anterior parou"""
+        alimentador.join()
+        self.etapas['busca'].encerrar()
+        self.etapas['llm'].encerrar()
+        # Sobras do prompt em lote: o LLM já parou, então ninguém mais entra no grupo
+        while self._grupo_llm:
+            self._despachar_grupo_llm(forcar=True)
+        # Fim do trabalho na vaga de lote; se o lote foi cancelado antes de obtê-la, sai da fila do agendador
+        with self._cond_vaga:
+            self._devolver_vaga()
+        self.etapas['banco'].encerrar()
+        _motores_ativos.discard(self)
+        print(f"🏭 Motor de lote encerrado: {self.estatisticas()}")
+
+    @staticmethod
+    def _resultado(item):
+        analise = item['analise'] or {}
+        return {
+            'posicao': item['posicao'],
+            'nome': item['nome'],
+            'cargo': item['cargo'],
+            'status': 'erro' if item['erro'] else 'ok',
+            'id': item['id'],
+            'risco_reputacao': analise.get('risco_reputacao'),
+            'total_polemicas': analise.get('total_polemicas', len(analise.get('polemicas', []))),
+            'caminho_analise': analise.get('caminho_analise'),
+            'erro': item['erro'],
+            'analise': item['analise'],
+        }
+
+    def processar(self, pessoas, estado="Paraná"):
+        """Gera um resultado por pessoa, na ordem em que cada uma termina.
+
+        Interromper o gerador (cliente desconectou) cancela o que ainda não
+        começou, inclusive a vaga que esperava no agendador; o que já está em
+        andamento (ou é acompanhado por outra requisição) termina em segundo
+        plano, e as threads do motor saem logo depois.
+        """
+        for etapa in self.etapas.values():
+            etapa.iniciar()
+        _motores_ativos.add(self)
+        alimentador = threading.Thread(target=self._alimentar, args=(pessoas, estado),
+                                       name="motor-alimentador", daemon=True)
+        alimentador.start()
+        print(f"🏭 Motor de lote: {len(pessoas)} pessoas "
+              f"(busca={self.etapas['busca'].workers}, llm={self.etapas['llm'].workers}, "
+              f"banco={self.etapas['banco'].workers})")
+        entregues = 0
+        try:
+            while entregues < len(pessoas):
+                resultado = self._resultado(self._saida.get())
+                entregues += 1
+                yield resultado
+        finally:
+            if entregues < len(pessoas):
+                print(f"⚠️ Motor de lote interrompido após {entregues}/{len(pessoas)} resultados")
+                self._cancelar()
+            threading.Thread(target=self._encerrar, args=(alimentador,), name="motor-encerrador", daemon=True).start()
+
+    def estatisticas(self):
+        estatisticas = {nome: etapa.estatisticas() for nome, etapa in self.etapas.items()}
+        with self._lock_grupo:
+            estatisticas['llm']['grupos_lote'] = self.grupos_llm
+            estatisticas['llm']['aguardando_grupo'] = len(self._grupo_llm)
+            estatisticas['busca']['compartilhadas'] = self.compartilhadas
+        return estatisticas
+
+
+class _MotoresAtivos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._motores = set()
+
+    def add(self, motor):
+        with self._lock:
+            self._motores.add(motor)
+
+    def discard(self, motor):
+        with self._lock:
+            self._motores.discard(motor)
+
+    def estatisticas(self):
+        """Soma das etapas de todos os lotes em andamento neste processo"""
+        with self._lock:
+            motores = list(self._motores)
+        total = {'lotes_ativos': len(motores)}
+        for motor in motores:
+            for nome, dados in motor.estatisticas().items():
+                etapa = total.setdefault(nome, {'workers': 0, 'ocupadas': 0, 'fila': 0, 'processados': 0})
+                for chave in etapa:
+                    etapa[chave] += dados[chave]
+        return total
+
+
+_motores_ativos = _MotoresAtivos()
+registro.coletor("motor_lote", _motores_ativos.estatisticas)
@@ -2,12 +2,95 @@ import requests
 import json
 import time
 import csv
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Optional
 
+class RitmoAdaptativo:
+    """Espaçamento entre o início das requisições, compartilhado por todos os workers.
+
+    Cada resposta de sucesso encurta o intervalo aos poucos; um 429/503 dobra
+    o intervalo e pausa todos os workers pelo Retry-After do servidor (ou
+    pelo novo intervalo, se o servidor não informar).
+    """
+    
+    def __init__(self, intervalo_inicial: float, intervalo_minimo: float = 0.0, intervalo_maximo: float = 60.0):
+        self.intervalo = intervalo_inicial
+        self.intervalo_minimo = intervalo_minimo
+        self.intervalo_maximo = intervalo_maximo
+        self._proximo_inicio = 0.0
+        self._lock = threading.Lock()
+    
+    def aguardar_vez(self):
+        with self._lock:
+            agora = time.monotonic()
+            inicio = max(self._proximo_inicio, agora)
+            self._proximo_inicio = inicio + self.intervalo
+        if inicio > agora:
+            time.sleep(inicio - agora)
+    
+    def sucesso(self):
+        with self._lock:
+            self.intervalo = max(self.intervalo_minimo, self.intervalo * 0.9)
+    
+    def sobrecarga(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.intervalo = min(self.intervalo_maximo, max(self.intervalo * 2, 1.0))
+            pausa = retry_after if retry_after is not None else self.intervalo
+            self._proximo_inicio = max(self._proximo_inicio, time.monotonic() + pausa)
+        print(f"🐢 Servidor sobrecarregado: pausando {pausa:.0f}s, intervalo agora {self.intervalo:.1f}s")
+
+def _retry_after(response) -> Optional[float]:
+    """Retry-After em segundos (aceita número ou data HTTP)"""
+    valor = response.headers.get("Retry-After")
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def _formatar_duracao(segundos: float) -> str:
+    segundos = int(segundos)
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    if horas:
+        return f"{horas}h{minutos:02d}m"
+    return f"{minutos}m{segundos:02d}s"
+
+# Requisições simultâneas. O servidor executa no máximo AGENDADOR_CAPACIDADE - AGENDADOR_RESERVA_INTERATIVA
+# análises de lote por vez (1 no padrão) e enfileira até AGENDADOR_FILA_LOTE_MAXIMA (4 por vaga no padrão);
+# além disso responde 503 + Retry-After e o ritmo adaptativo desacelera. Workers acima de vagas + fila só
+# geram esses 503.
+WORKERS_PADRAO = 2
+
 class ProcessadorLote:
-    def __init__(self, base_url: str = "http://localhost:5000"):
+    def __init__(self, base_url: str = "http://localhost:5000", workers: int = 1, tentativas: int = 3,
+                 backoff_base: float = 5.0, timeout: float = 120):
         self.base_url = base_url
-        self.session = requests.Session()
+        self.workers = max(workers, 1)
+        self.tentativas = max(tentativas, 1)
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        # Uma Session (pool de conexões) por thread: requests.Session não é thread-safe
+        self._local = threading.local()
+        self.ritmo = RitmoAdaptativo(0.0)
+        # Prioridade de lote no servidor: consultas interativas passam na frente,
+        # e lotes diferentes (lote_id) se revezam
+        self.lote_id = uuid.uuid4().hex
+    
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
         
     def carregar_lista_csv(self, arquivo_csv: str) -> List[Dict]:
         """Carrega lista de pesquisas de um arquivo CSV"""
@@ -38,13 +121,35 @@ class ProcessadorLote:
             return []
     
     def executar_analise(self, nome: str, cargo: str = "") -> Dict:
-        """Executa uma análise individual via API"""
+        """Executa uma análise individual via API, com novas tentativas em timeout, 5xx e 429"""
         url = f"{self.base_url}/api/analises"
         payload = {
             "nome": nome,
-            "cargo": cargo
+            "cargo": cargo,
+            "prioridade": "lote",
+            "lote_id": self.lote_id
         }
         
+        falha = None
+        for tentativa in range(1, self.tentativas + 1):
+            self.ritmo.aguardar_vez()
+            falha = self._tentar_analise(url, payload, nome, cargo)
+            if falha["status"] == "sucesso":
+                self.ritmo.sucesso()
+                return falha
+            if not falha.pop("repetir", False) or tentativa == self.tentativas:
+                break
+            
+            # Backoff exponencial com jitter: workers que falharam juntos não voltam juntos
+            espera = self.backoff_base * 2 ** (tentativa - 1) * random.uniform(0.5, 1.5)
+            print(f"🔁 {nome}: nova tentativa ({tentativa + 1}/{self.tentativas}) em {espera:.1f}s")
+            time.sleep(espera)
+        
+        falha.pop("repetir", None)
+        return falha
+    
+    def _tentar_analise(self, url: str, payload: Dict, nome: str, cargo: str) -> Dict:
+        """Uma requisição; falhas transitórias voltam com 'repetir': True"""
         try:
             print(f"🔍 Processando: {nome}" + (f" - {cargo}" if cargo else ""))
             
@@ -52,10 +157,10 @@ class ProcessadorLote:
                 url, 
                 json=payload,
                 headers={"Content-Type": "application/json"},
-                timeout=120  # 2 minutos timeout
+                timeout=self.timeout
             )
             
-            if response.status_code == 201:
+            if response.status_code in (200, 201):  # 200 = análise recente reaproveitada
                 resultado = response.json()
                 print(f"✅ Sucesso: {nome} (ID: {resultado.get('id', 'N/A')})")
                 return {
@@ -67,16 +172,23 @@ class ProcessadorLote:
                     "total_polemicas": resultado.get("analise", {}).get("total_polemicas", 0),
                     "resposta": resultado
                 }
-            else:
+            
+            if response.status_code in (429, 503):
+                self.ritmo.sobrecarga(_retry_after(response))
+            
+            try:
                 erro = response.json().get("error", "Erro desconhecido")
-                print(f"❌ Erro na análise de {nome}: {erro}")
-                return {
-                    "status": "erro",
-                    "nome": nome,
-                    "cargo": cargo,
-                    "erro": erro,
-                    "status_code": response.status_code
-                }
+            except ValueError:
+                erro = f"HTTP {response.status_code}"
+            print(f"❌ Erro na análise de {nome}: {erro}")
+            return {
+                "status": "erro",
+                "nome": nome,
+                "cargo": cargo,
+                "erro": erro,
+                "status_code": response.status_code,
+                "repetir": response.status_code == 429 or response.status_code >= 500
+            }
                 
         except requests.exceptions.Timeout:
             print(f"⏰ Timeout na análise de {nome}")
@@ -84,7 +196,17 @@ class ProcessadorLote:
                 "status": "timeout",
                 "nome": nome,
                 "cargo": cargo,
-                "erro": "Timeout após 120 segundos"
+                "erro": f"Timeout após {self.timeout:.0f} segundos",
+                "repetir": True
+            }
+        except requests.exceptions.ConnectionError as e:
+            print(f"❌ Erro de conexão com {nome}: {e}")
+            return {
+                "status": "erro_conexao",
+                "nome": nome,
+                "cargo": cargo,
+                "erro": str(e),
+                "repetir": True
             }
         except Exception as e:
             print(f"❌ Erro de conexão com {nome}: {e}")
@@ -96,42 +218,123 @@ class ProcessadorLote:
             }
     
     def processar_lote(self, pesquisas: List[Dict], delay: float = 2.0) -> Dict:
-        """Processa um lote de pesquisas com delay entre requisições"""
+        """Processa um lote de pesquisas com `workers` requisições simultâneas.
+
+        `delay` é só o intervalo inicial entre requisições: ele diminui enquanto
+        o servidor responde bem e aumenta quando ele devolve 429/503.
+        """
         resultados = {
             "total": len(pesquisas),
             "sucessos": 0,
             "erros": 0,
             "timeouts": 0,
-            "resultados": []
+            "resultados": [None] * len(pesquisas)
         }
         
         print(f"\n🚀 INICIANDO PROCESSAMENTO EM LOTE")
         print(f"📊 Total de pesquisas: {len(pesquisas)}")
-        print(f"⏰ Delay entre requisições: {delay}s")
+        print(f"👷 Workers simultâneos: {self.workers}")
+        print(f"⏰ Intervalo inicial entre requisições: {delay}s (adaptativo)")
         print("=" * 50)
         
-        for i, pesquisa in enumerate(pesquisas, 1):
-            nome = pesquisa['nome']
-            cargo = pesquisa.get('cargo', '')
-            
-            print(f"\n[{i}/{len(pesquisas)}] Processando...")
+        self.ritmo = RitmoAdaptativo(delay)
+        inicio = time.monotonic()
+        concluidas = 0
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lote") as executor:
+            futuros = {
+                executor.submit(self.executar_analise, pesquisa['nome'], pesquisa.get('cargo', '')): posicao
+                for posicao, pesquisa in enumerate(pesquisas)
+            }
             
-            # Executar análise
-            resultado = self.executar_analise(nome, cargo)
-            resultados["resultados"].append(resultado)
+            for futuro in as_completed(futuros):
+                resultado = futuro.result()
+                resultados["resultados"][futuros[futuro]] = resultado
+                
+                # Atualizar contadores
+                if resultado["status"] == "sucesso":
+                    resultados["sucessos"] += 1
+                elif resultado["status"] == "timeout":
+                    resultados["timeouts"] += 1
+                else:
+                    resultados["erros"] += 1
+                
+                concluidas += 1
+                decorrido = time.monotonic() - inicio
+                por_minuto = concluidas / decorrido * 60 if decorrido else 0.0
+                restantes = len(pesquisas) - concluidas
+                eta = _formatar_duracao(restantes / por_minuto * 60) if por_minuto else "?"
+                print(f"📈 [{concluidas}/{len(pesquisas)}] {por_minuto:.1f} pessoas/min • "
+                      f"decorrido {_formatar_duracao(decorrido)} • ETA {eta}")
+        
+        return resultados
+    
+    def processar_lote_servidor(self, pesquisas: List[Dict], timeout_leitura: float = 600) -> Dict:
+        """Envia a lista inteira para /api/analises/lote e acompanha o progresso em NDJSON.
+
+        Uma conexão só para o lote todo; o servidor agenda as pessoas no motor
+        de lote e manda uma linha por pessoa concluída. timeout_leitura é o
+        máximo sem receber nenhuma linha.
+        """
+        resultados = {
+            "total": len(pesquisas),
+            "sucessos": 0,
+            "erros": 0,
+            "timeouts": 0,
+            "resultados": [None] * len(pesquisas)
+        }
+        
+        print(f"\n🚀 ENVIANDO LOTE PARA O SERVIDOR: {len(pesquisas)} pesquisas")
+        print("=" * 50)
+        
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/analises/lote",
+                json=[{"nome": p['nome'], "cargo": p.get('cargo', '')} for p in pesquisas],
+                stream=True,
+                timeout=(10, timeout_leitura)
+            )
+            if response.status_code != 200:
+                try:
+                    erro = response.json().get("error", "Erro desconhecido")
+                except ValueError:
+                    erro = f"HTTP {response.status_code}"
+                print(f"❌ Lote recusado: {erro}")
+                return resultados
             
-            # Atualizar contadores
-            if resultado["status"] == "sucesso":
-                resultados["sucessos"] += 1
-            elif resultado["status"] == "timeout":
-                resultados["timeouts"] += 1
-            else:
+            for linha in response.iter_lines(decode_unicode=True):
+                if not linha:
+                    continue
+                registro = json.loads(linha)
+                if registro["tipo"] == "resultado":
+                    sucesso = registro["status"] == "ok"
+                    resultados["sucessos" if sucesso else "erros"] += 1
+                    resultados["resultados"][registro["posicao"]] = {
+                        "status": "sucesso" if sucesso else "erro",
+                        "nome": registro["nome"],
+                        "cargo": registro.get("cargo") or '',
+                        "analise_id": registro.get("id"),
+                        "risco_reputacao": registro.get("risco_reputacao"),
+                        "total_polemicas": registro.get("total_polemicas"),
+                        "erro": registro.get("error")
+                    }
+                    print(f"{'✅' if sucesso else '❌'} [{registro['concluidas']}/{registro['total']}] "
+                          f"{registro['nome']}: {registro.get('risco_reputacao') or registro.get('error')}")
+                elif registro["tipo"] == "fim":
+                    print(f"🏁 Lote concluído no servidor em {registro['duracao']}s")
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Conexão com o servidor interrompida: {e}")
+        
+        # Pessoas sem linha de resultado (conexão caiu no meio do lote)
+        for posicao, pesquisa in enumerate(pesquisas):
+            if resultados["resultados"][posicao] is None:
                 resultados["erros"] += 1
-            
-            # Delay entre requisições (evitar sobrecarga)
-            if i < len(pesquisas):  # Não esperar após a última
-                print(f"⏳ Aguardando {delay} segundos...")
-                time.sleep(delay)
+                resultados["resultados"][posicao] = {
+                    "status": "erro",
+                    "nome": pesquisa['nome'],
+                    "cargo": pesquisa.get('cargo', ''),
+                    "erro": "Sem resultado do servidor"
+                }
         
         return resultados
     
@@ -168,10 +371,10 @@ class ProcessadorLote:
 def main():
     # Configurações
     BASE_URL = "http://localhost:5000"  # Altere se necessário
-    DELAY_ENTRE_REQUISICOES = 2.0  # Segundos entre cada análise
+    DELAY_ENTRE_REQUISICOES = 2.0  # Intervalo inicial entre requisições (ajustado conforme o servidor responde)
     
     # Inicializar processador
-    processador = ProcessadorLote(BASE_URL)
+    processador = ProcessadorLote(BASE_URL, workers=WORKERS_PADRAO)
     
     # OPÇÃO 1: Lista manual de pesquisas
     # pesquisas_manual = [
@@ -196,6 +399,8 @@ def main():
     
     # Executar processamento em lote
     resultados = processador.processar_lote(pesquisas, DELAY_ENTRE_REQUISICOES)
+    # Alternativa: o servidor processa a lista inteira e transmite o progresso
+    # resultados = processador.processar_lote_servidor(pesquisas)
     
     # Exibir resumo
     print("\n" + "=" * 50)
@@ -0,0 +1,127 @@
+# planejador_queries.py
+import os
+import threading
+from collections import deque
+
+from cache_persistente import CACHE_DB_PATH, ConexaoSqlite
+
+# Rendimento inicial assumido para modelos ainda não executados (favorece exploração)
+RENDIMENTO_PRIOR = float(os.environ.get("PLANO_RENDIMENTO_PRIOR", "3.0"))
+PESO_PRIOR = float(os.environ.get("PLANO_PESO_PRIOR", "2.0"))
+
+# Parada antecipada: média de URLs novas nas últimas N queries abaixo do limiar
+PLANO_LIMIAR_GANHO = float(os.environ.get("PLANO_LIMIAR_GANHO", "0.5"))
+PLANO_JANELA = int(os.environ.get("PLANO_JANELA", "4"))
+PLANO_MINIMO_QUERIES = int(os.environ.get("PLANO_MINIMO_QUERIES", "4"))
+
+
+class PlanejadorQueries:
+    """Ordena os modelos de query pelo rendimento histórico de URLs novas"""
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or CACHE_DB_PATH
+        self._lock = threading.Lock()
+        self._banco = ConexaoSqlite(self.caminho, self._criar_tabelas)
+
+    @staticmethod
+    def _criar_tabelas(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS estatisticas_queries (
+                modelo TEXT PRIMARY KEY,
+                execucoes INTEGER NOT NULL DEFAULT 0,
+                urls_novas INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    @property
+    def _conn(self):
+        return self._banco.obter()
+
+    def rendimentos(self):
+        """Rendimento esperado (URLs novas por execução) de cada modelo conhecido"""
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT modelo, execucoes, urls_novas FROM estatisticas_queries"
+            ).fetchall()
+        return {
+            modelo: (urls_novas + RENDIMENTO_PRIOR * PESO_PRIOR) / (execucoes + PESO_PRIOR)
+            for modelo, execucoes, urls_novas in linhas
+        }
+
+    def montar_plano(self, itens, ja_planejadas=None):
+        """Remove queries repetidas e ordena (modelo, query) pelo rendimento esperado"""
+        vistas = set(ja_planejadas or ())
+        unicos = []
+        for modelo, query in itens:
+            if query in vistas:
+                continue
+            vistas.add(query)
+            unicos.append((modelo, query))
+
+        rendimentos = self.rendimentos()
+        # sort é estável: empates mantêm a ordem original dos geradores
+        unicos.sort(key=lambda item: rendimentos.get(item[0], RENDIMENTO_PRIOR), reverse=True)
+        return unicos
+
+    def registrar(self, modelo, urls_novas):
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO estatisticas_queries (modelo, execucoes, urls_novas) VALUES (?, 1, ?)
+                ON CONFLICT(modelo) DO UPDATE SET
+                    execucoes = execucoes + 1,
+                    urls_novas = urls_novas + excluded.urls_novas
+            """, (modelo, urls_novas))
+            self._conn.commit()
+
+    def iniciar_sessao(self):
+        return SessaoPlano(self)
+
+
+class SessaoPlano:
+    """Acompanha o ganho marginal de URLs de uma análise e decide quando parar.
+
+    Todas as queries contam para o ganho marginal, mas só as que foram à
+    rede creditam URLs ao modelo no planejador: um acerto de cache não
+    atualiza as estatísticas nem toma o crédito das URLs que uma query
+    posterior buscou de fato.
+    """
+
+    def __init__(self, planejador):
+        self.planejador = planejador
+        self.urls_vistas = set()
+        self.urls_creditadas = set()  # URLs já creditadas a uma query que foi à rede
+        self.queries_executadas = 0
+        self.queries_fase = 0
+        self._ganhos = deque(maxlen=PLANO_JANELA)
+        self._lock = threading.Lock()
+
+    def nova_fase(self):
+        with self._lock:
+            self.queries_fase = 0
+            self._ganhos.clear()
+
+    def registrar(self, modelo, resultados, em_cache=False):
+        """Conta as URLs inéditas trazidas pela query e, se ela foi à rede, atualiza as estatísticas do modelo"""
+        with self._lock:
+            urls = {resultado.get('href', '') for resultado in resultados} - {''}
+            novas = len(urls - self.urls_vistas)
+            self.urls_vistas |= urls
+            self.queries_executadas += 1
+            self.queries_fase += 1
+            self._ganhos.append(novas)
+            if not em_cache:
+                creditadas = len(urls - self.urls_creditadas)
+                self.urls_creditadas |= urls
+        if not em_cache:
+            self.planejador.registrar(modelo, creditadas)
+        return novas
+
+    def ganho_marginal(self):
+        with self._lock:
+            return sum(self._ganhos) / len(self._ganhos) if self._ganhos else float('inf')
+
+    def deve_continuar(self):
+        with self._lock:
+            if self.queries_fase < PLANO_MINIMO_QUERIES:
+                return True
+        return self.ganho_marginal() >= PLANO_LIMIAR_GANHO
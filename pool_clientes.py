@@ -0,0 +1,108 @@
+# pool_clientes.py
+import os
+import threading
+import time
+
+from metricas import registro
+
+clientes_criados = registro.contador(
+    "clientes_criados_total", "Clientes de busca/LLM criados (conexões novas)", ("tipo",))
+clientes_reutilizados = registro.contador(
+    "clientes_reutilizados_total", "Usos de um cliente já existente (conexão reaproveitada)", ("tipo",))
+
+
+class PoolClientes:
+    """Clientes de busca e LLM criados uma vez por processo e compartilhados.
+
+    Cada tipo é registrado com uma fábrica. Clientes thread-safe (canal gRPC
+    do xai, modelo do Gemini) têm uma instância por processo; os que não são
+    (sessão HTTP do DDGS) usam `por_thread=True` e ganham uma instância por
+    thread, reaproveitada entre requisições.
+
+    Nada é criado no import: com preload_app o master importa a aplicação
+    antes do fork e um canal gRPC não sobrevive ao fork. O gunicorn aquece o
+    pool em post_worker_init (gunicorn.conf.py); fora dele os clientes nascem
+    no primeiro uso. Se o pid mudar, tudo é recriado no processo filho.
+    """
+
+    def __init__(self):
+        self._fabricas = {}  # tipo -> (fabrica, por_thread)
+        self._clientes = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._geracao = 0
+        self._criados = {}
+        self._reutilizados = {}
+        self._tempo_criacao = {}
+
+    def registrar(self, tipo, fabrica, por_thread=False):
+        with self._lock:
+            self._fabricas[tipo] = (fabrica, por_thread)
+
+    def _verificar_fork(self):
+        # Chamado com o lock: clientes herdados do processo pai são descartados
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._geracao += 1
+            self._clientes.clear()
+
+    def _criar(self, tipo, fabrica):
+        inicio = time.monotonic()
+        cliente = fabrica()
+        duracao = time.monotonic() - inicio
+        self._criados[tipo] = self._criados.get(tipo, 0) + 1
+        self._tempo_criacao[tipo] = self._tempo_criacao.get(tipo, 0.0) + duracao
+        clientes_criados.inc(tipo=tipo)
+        print(f"🔌 Cliente {tipo} criado em {duracao:.2f}s (pid {self._pid})")
+        return cliente
+
+    def obter(self, tipo):
+        with self._lock:
+            self._verificar_fork()
+            fabrica, por_thread = self._fabricas[tipo]
+            if por_thread:
+                locais = getattr(self._local, 'clientes', None)
+                if locais is None or self._local.geracao != self._geracao:
+                    locais = self._local.clientes = {}
+                    self._local.geracao = self._geracao
+                armazenados = locais
+            else:
+                armazenados = self._clientes
+
+            cliente = armazenados.get(tipo)
+            if cliente is None:
+                cliente = armazenados[tipo] = self._criar(tipo, fabrica)
+            else:
+                self._reutilizados[tipo] = self._reutilizados.get(tipo, 0) + 1
+                clientes_reutilizados.inc(tipo=tipo)
+            return cliente
+
+    def aquecer(self, tipos=None):
+        """Cria agora os clientes por processo (os por thread nascem em cada thread)"""
+        with self._lock:
+            pendentes = [
+                tipo for tipo, (_, por_thread) in self._fabricas.items()
+                if not por_thread and (tipos is None or tipo in tipos)
+            ]
+        for tipo in pendentes:
+            try:
+                self.obter(tipo)
+            except Exception as e:
+                print(f"⚠️ Não foi possível aquecer o cliente {tipo}: {e}")
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                tipo: {
+                    'por_thread': por_thread,
+                    'criados': self._criados.get(tipo, 0),
+                    'reutilizados': self._reutilizados.get(tipo, 0),
+                    'tempo_criacao': round(self._tempo_criacao.get(tipo, 0.0), 3),
+                }
+                for tipo, (_, por_thread) in self._fabricas.items()
+            }
+
+
+pool_clientes = PoolClientes()
+registro.coletor("pool_clientes", pool_clientes.estatisticas)
@@ -0,0 +1,287 @@
+# prompts.py
+import os
+import threading
+
+from cache_persistente import CachePersistente, gerar_chave
+from metricas import registro
+
+# Altere sempre que qualquer texto ou schema abaixo mudar: invalida as análises em cache
+PROMPT_VERSAO = "v2"
+
+# Cache das análises já interpretadas, chaveado por (modelo, versão do prompt, contexto)
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRADAS = int(os.environ.get("LLM_CACHE_MAX_ENTRADAS", "5000"))
+LLM_CACHE_IGNORAR = os.environ.get("LLM_CACHE_IGNORAR", "0") == "1"
+
+# Os prompts são montados como PREFIXO (fixo, byte a byte idêntico entre
+# chamadas) + DADOS (pessoa e resultados). Os provedores reaproveitam o
+# processamento de prefixos já vistos, então nada que varie por pessoa pode
+# aparecer antes dos dados — nem nome, nem data, nem contagens.
+
+INSTRUCOES_SISTEMA = """Você é um analista especializado em due diligence e análise de reputação pública.
+Siga STRITAMENTE estas regras:
+1. Para 'risco_reputacao' use APENAS: "BAIXO", "MÉDIO", "ALTO" ou "CRÍTICO"
+2. Seja conciso e objetivo em todas as respostas
+3. Use classificação padronizada para gravidade das polêmicas
+4. Mantenha títulos e descrições CURTOS
+5. Baseie-se apenas nas evidências fornecidas"""
+
+_CRITERIOS_GROK = """**INSTRUÇÕES CRÍTICAS:**
+- Para 'risco_reputacao' use APENAS UMA DESTAS OPÇÕES: "BAIXO", "MÉDIO", "ALTO", "CRÍTICO"
+- Seja CONCISO e OBJETIVO
+- Use classificação padronizada
+
+**ANALISE OS RESULTADOS E IDENTIFIQUE:**
+
+🔍 POLÊMICAS E CONTROVÉRSIAS:
+- Para CADA polêmica, inclua:
+  * titulo: breve e descritivo (máx 100 caracteres)
+  * descricao: resumo objetivo (máx 200 caracteres)
+  * gravidade: "baixa", "media", "alta" ou "critica"
+  * categoria: "Judicial", "Corrupção", "Licitações", "Eleitoral", etc.
+  * fonte_url: URL da fonte
+
+📊 CLASSIFICAÇÃO DE RISCO (USE APENAS UMA DESTAS):
+- "BAIXO": sem polêmicas significativas ou apenas questões menores
+- "MÉDIO": algumas questões problemáticas, mas sem gravidade extrema
+- "ALTO": múltiplas questões graves ou envolvimento em casos sérios
+- "CRÍTICO": envolvimento em crimes graves, corrupção, prisão, etc.
+
+🎯 DIRETRIZES:
+- Seja objetivo e factual
+- Baseie-se apenas nas informações fornecidas
+- Priorize fontes confiáveis (sites oficiais, notícias)
+- Para risco_reputacao: APENAS UMA PALAVRA das opções acima
+- Resumo deve ter no máximo 2-3 frases
+- Recomendações devem ser práticas e diretas
+- colocar os links completos para acessar
+
+Quando possível traga o CNPJ das empresas que estão sendo citadas ai, as que estão relacionadas com a pessoa buscada.
+"""
+
+PREFIXO_GROK = """ANÁLISE DE REPUTAÇÃO PÚBLICA
+
+Os dados vêm no FINAL desta mensagem, em JSON: n = nome da pessoa, r = resultados
+consolidados de busca (t = título, b = trecho, h = URL, d = nº de outras fontes com a mesma notícia).
+
+""" + _CRITERIOS_GROK
+
+PREFIXO_GROK_LOTE = """ANÁLISE DE REPUTAÇÃO PÚBLICA - LOTE DE PESSOAS
+
+Os dados vêm no FINAL desta mensagem: uma lista JSON em que cada item tem n = nome da pessoa e
+r = resultados consolidados de busca (t = título, b = trecho, h = URL, d = nº de outras fontes com a mesma notícia).
+Para CADA pessoa da lista devolva um item em 'analises' com o campo 'nome' IDÊNTICO ao 'n' recebido.
+Analise cada pessoa SOMENTE com os próprios resultados; não misture informações entre pessoas.
+
+""" + _CRITERIOS_GROK
+
+PREFIXO_GEMINI = """ANÁLISE DE REPUTAÇÃO PÚBLICA
+
+Os dados vêm no FINAL desta mensagem, em JSON: n = nome da pessoa, r = resultados
+da busca (t = título, b = trecho, d = nº de outras fontes com a mesma notícia).
+
+**INSTRUÇÕES CRÍTICAS - SEJA MUITO SELETIVO:**
+
+🎯 CRITÉRIOS PARA POLÊMICAS (APENAS INCLUA SE ATENDER):
+- EVIDÊNCIAS CONCRETAS de irregularidades, crimes, ou comportamentos éticos questionáveis
+- IMPACTO REAL na reputação pública
+- FONTES CONFIÁVEIS (evite blogs, fóruns sem credibilidade)
+- GRAVIDADE MÍNIMA: apenas inclua se for pelo menos "media"
+
+❌ NÃO INCLUA COMO POLÊMICA:
+- Notícias neutras ou positivas sobre a pessoa
+- Menções comuns em notícias sem acusações
+- Conteúdo irrelevante ou duvidoso
+- Informações sem evidências concretas
+
+📊 CLASSIFICAÇÃO DE RISCO (USE APENAS UMA):
+- "BAIXO": sem polêmicas significativas OU reputação predominantemente positiva
+- "MÉDIO": 1-2 questões menores comprovadas
+- "ALTO": múltiplas questões graves OU um caso sério com evidências
+- "CRÍTICO": crimes graves, corrupção, prisão, organização criminosa
+
+🔍 FILTRAGEM DE POLÊMICAS:
+- Analise CRITICAMENTE cada resultado
+- Descarte informações duvidosas ou sem fontes confiáveis
+- Priorize evidências de sites oficiais, notícias reputáveis
+- Inclua APENAS polêmicas com EVIDÊNCIAS CONCRETAS
+
+📝 FORMATO ESPERADO:
+- Seja EXTREMAMENTE seletivo nas polêmicas
+- Inclua APENAS o que for relevante e comprovado
+- Se não houver polêmicas reais, retorne array vazio
+- Risco_reputacao deve refletir APENAS as polêmicas válidas
+
+**SE NÃO HOUVER EVIDÊNCIAS DE POLÊMICAS REAIS, RETORNE:**
+- "polemicas": [] (array vazio)
+- "risco_reputacao": "BAIXO"
+- "resumo_analise": explicando a ausência de polêmicas significativas
+
+**SE HOUVER POLÊMICAS, SEJA MUITO ESPECÍFICO E BASEADO EM EVIDÊNCIAS**
+"""
+
+SCHEMA_GEMINI = {
+    "type": "object",
+    "properties": {
+        "resumo_analise": {"type": "string"},
+        "polemicas": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "titulo": {"type": "string"},
+                    "descricao": {"type": "string"},
+                    "gravidade": {"type": "string", "enum": ["baixa", "media", "alta", "critica"]},
+                    "categoria": {"type": "string"},
+                    "fonte_url": {"type": "string"}
+                },
+                "required": ["titulo", "descricao", "gravidade", "categoria"]
+            }
+        },
+        "empresas_associadas": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "nome_empresa": {"type": "string"},
+                    "cnpj": {"type": "string"},
+                    "relacao": {"type": "string"},
+                    "fonte_url": {"type": "string"}
+                },
+                "required": ["nome_empresa", "relacao"]
+            }
+        },
+        "risco_reputacao": {"type": "string", "enum": ["BAIXO", "MÉDIO", "ALTO", "CRÍTICO"]},
+        "recomendacoes": {"type": "string"},
+        "tweets_relevantes": {
+            "type": "array",
+            "items": {"type": "string"}
+        },
+        "fontes_consultadas": {
+            "type": "array",
+            "items": {"type": "string"}
+        }
+    },
+    "required": ["resumo_analise", "polemicas", "risco_reputacao"]
+}
+
+# Impressão digital dos prefixos: muda junto com qualquer byte do texto fixo
+ASSINATURA_PREFIXOS = gerar_chave(PROMPT_VERSAO, INSTRUCOES_SISTEMA, PREFIXO_GROK,
+                                  PREFIXO_GROK_LOTE, PREFIXO_GEMINI)[:12]
+
+
+def _com_dados(prefixo, contexto_compacto):
+    return f"{prefixo}\nDADOS DA BUSCA:\n{contexto_compacto}\n"
+
+
+def montar_prompt_grok(contexto_compacto):
+    """contexto_compacto: JSON {"n": nome, "r": [...]} já serializado"""
+    return _com_dados(PREFIXO_GROK, contexto_compacto)
+
+
+def montar_prompt_grok_lote(contexto_lote):
+    """contexto_lote: JSON [{"n": nome, "r": [...]}, ...] já serializado"""
+    return _com_dados(PREFIXO_GROK_LOTE, contexto_lote)
+
+
+def montar_prompt_gemini(contexto_compacto):
+    return _com_dados(PREFIXO_GEMINI, contexto_compacto)
+
+
+class EstatisticasCachePrompt:
+    """Tokens de prompt em cache x sem cache reportados por cada provedor"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._provedores = {}
+
+    def registrar(self, provedor, tokens_prompt, tokens_em_cache, latencia):
+        tokens_prompt = tokens_prompt or 0
+        tokens_em_cache = tokens_em_cache or 0
+        with self._lock:
+            dados = self._provedores.setdefault(provedor, {
+                'chamadas': 0,
+                'chamadas_com_cache': 0,
+                'tokens_prompt': 0,
+                'tokens_em_cache': 0,
+                'latencia_com_cache': 0.0,
+                'latencia_sem_cache': 0.0,
+            })
+            dados['chamadas'] += 1
+            dados['tokens_prompt'] += tokens_prompt
+            dados['tokens_em_cache'] += tokens_em_cache
+            if tokens_em_cache:
+                dados['chamadas_com_cache'] += 1
+                dados['latencia_com_cache'] += latencia
+            else:
+                dados['latencia_sem_cache'] += latencia
+
+    def resumo(self):
+        with self._lock:
+            resumo = {'prompt_versao': PROMPT_VERSAO, 'assinatura_prefixos': ASSINATURA_PREFIXOS}
+            for provedor, dados in self._provedores.items():
+                sem_cache = dados['chamadas'] - dados['chamadas_com_cache']
+                resumo[provedor] = {
+                    'chamadas': dados['chamadas'],
+                    'chamadas_com_cache': dados['chamadas_com_cache'],
+                    'tokens_prompt': dados['tokens_prompt'],
+                    'tokens_em_cache': dados['tokens_em_cache'],
+                    'tokens_sem_cache': dados['tokens_prompt'] - dados['tokens_em_cache'],
+                    'taxa_cache': round(dados['tokens_em_cache'] / dados['tokens_prompt'], 3) if dados['tokens_prompt'] else 0.0,
+                    'latencia_media_com_cache': round(dados['latencia_com_cache'] / dados['chamadas_com_cache'], 3) if dados['chamadas_com_cache'] else None,
+                    'latencia_media_sem_cache': round(dados['latencia_sem_cache'] / sem_cache, 3) if sem_cache else None,
+                }
+            return resumo
+
+
+estatisticas_prompt = EstatisticasCachePrompt()
+registro.coletor("prompt_cache", estatisticas_prompt.resumo)
+
+
+def registrar_uso_grok(response, latencia):
+    """xAI: usage.prompt_tokens e usage.cached_prompt_text_tokens"""
+    uso = getattr(response, 'usage', None)
+    if uso is None:
+        return
+    tokens_prompt = getattr(uso, 'prompt_tokens', 0)
+    tokens_em_cache = getattr(uso, 'cached_prompt_text_tokens', 0)
+    estatisticas_prompt.registrar('grok', tokens_prompt, tokens_em_cache, latencia)
+    print(f"🧮 Grok: {tokens_em_cache}/{tokens_prompt} tokens de prompt em cache ({latencia:.1f}s)")
+
+
+def registrar_uso_gemini(response, latencia):
+    """Gemini: usage_metadata.prompt_token_count e cached_content_token_count"""
+    uso = getattr(response, 'usage_metadata', None)
+    if uso is None:
+        return
+    tokens_prompt = getattr(uso, 'prompt_token_count', 0)
+    tokens_em_cache = getattr(uso, 'cached_content_token_count', 0)
+    estatisticas_prompt.registrar('gemini', tokens_prompt, tokens_em_cache, latencia)
+    print(f"🧮 Gemini: {tokens_em_cache}/{tokens_prompt} tokens de prompt em cache ({latencia:.1f}s)")
+
+
+def criar_cache_llm(namespace):
+    """Cache de análises de um provedor (cada um no seu namespace), com as mesmas configurações LLM_CACHE_*"""
+    return CachePersistente(
+        namespace=namespace,
+        ttl_segundos=LLM_CACHE_TTL,
+        max_entradas=LLM_CACHE_MAX_ENTRADAS,
+        ignorar=LLM_CACHE_IGNORAR
+    )
+
+
+# Acerto do cache de análises na chamada atual: marcado pelos scripts, lido pelo RoteadorLLM
+# na mesma thread, para que a análise devolvida (gravada em checkpoints e artefatos) não mude
+_chamada_llm = threading.local()
+
+
+def marcar_acerto_cache_llm():
+    """A análise desta chamada veio do cache, sem chegar ao provedor"""
+    _chamada_llm.acerto_cache = True
+
+
+def consumir_acerto_cache_llm():
+    """Retorna se a última chamada nesta thread veio do cache e limpa a marca"""
+    acerto = getattr(_chamada_llm, 'acerto_cache', False)
+    _chamada_llm.acerto_cache = False
+    return acerto
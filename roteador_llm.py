@@ -0,0 +1,195 @@
+# roteador_llm.py
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from executor_llm import executor_llm
+from metricas import duracao_llm, erros, registro
+from prompts import consumir_acerto_cache_llm
+from script_grok import analisar_com_grok
+
+try:
+    from script_gemini import analisar_com_gemini
+    GEMINI_DISPONIVEL = True
+except Exception as e:  # SDK ausente ou sem chave configurada
+    print(f"⚠️ Gemini indisponível para o roteador: {e}")
+    GEMINI_DISPONIVEL = False
+
+# Prazo para disparar a requisição de reserva (hedge) = p95 da latência do primário
+LLM_HEDGE_PRAZO_PADRAO = float(os.environ.get("LLM_HEDGE_PRAZO_PADRAO", "30"))
+LLM_HEDGE_PRAZO_MINIMO = float(os.environ.get("LLM_HEDGE_PRAZO_MINIMO", "5"))
+LLM_HEDGE_AMOSTRAS_MINIMAS = int(os.environ.get("LLM_HEDGE_AMOSTRAS_MINIMAS", "10"))
+# Se a taxa de erro recente do primário passar disso, o outro provedor assume como primário
+LLM_ROTEADOR_LIMIAR_ERRO = float(os.environ.get("LLM_ROTEADOR_LIMIAR_ERRO", "0.5"))
+
+# Enquanto o primário espera vaga no executor, de quanto em quanto tempo ver se ele já começou
+_INTERVALO_FILA = 0.25
+
+
+def _resultado_valido(resultado):
+    return isinstance(resultado, dict) and "error" not in resultado
+
+
+class EstatisticasProvedor:
+    """Latência e taxa de erro recentes de um provedor de LLM"""
+
+    def __init__(self, janela=100):
+        self.latencias = deque(maxlen=janela)
+        self.resultados = deque(maxlen=janela)  # True = sucesso
+        self.chamadas = 0
+        self.vitorias = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def registrar(self, latencia, sucesso):
+        with self._lock:
+            self.chamadas += 1
+            self.resultados.append(sucesso)
+            if sucesso:
+                self.latencias.append(latencia)
+
+    def percentil(self, p):
+        with self._lock:
+            if len(self.latencias) < LLM_HEDGE_AMOSTRAS_MINIMAS:
+                return None
+            ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+    def taxa_erro(self):
+        with self._lock:
+            if not self.resultados:
+                return 0.0
+            return 1 - sum(self.resultados) / len(self.resultados)
+
+    def resumo(self):
+        p50, p95 = self.percentil(0.5), self.percentil(0.95)
+        with self._lock:
+            return {
+                'chamadas': self.chamadas,
+                'vitorias': self.vitorias,
+                'hedges_disparados': self.hedges,
+                'p50': round(p50, 2) if p50 is not None else None,
+                'p95': round(p95, 2) if p95 is not None else None,
+                'taxa_erro': round(1 - sum(self.resultados) / len(self.resultados), 3) if self.resultados else 0.0,
+            }
+
+
+class RoteadorLLM:
+    """Chama o provedor primário e, se ele passar do p95 ou falhar, dispara o reserva.
+
+    Fica com a primeira resposta válida e cancela a outra (se ainda estiver na
+    fila do executor; chamadas já em andamento terminam em segundo plano e só
+    alimentam as estatísticas). O prazo do hedge conta a partir de quando a
+    chamada do primário começa: tempo na fila do executor não dispara o
+    reserva, que só aumentaria a fila.
+    """
+
+    def __init__(self, provedores, executor=executor_llm):
+        self.provedores = provedores  # nome -> função(nome_pessoa, resultados)
+        self.executor = executor
+        self.estatisticas = {nome: EstatisticasProvedor() for nome in provedores}
+
+    def _ordem(self):
+        nomes = list(self.provedores)
+        if len(nomes) > 1:
+            primario, reserva = nomes[0], nomes[1]
+            erro_primario = self.estatisticas[primario].taxa_erro()
+            if erro_primario > LLM_ROTEADOR_LIMIAR_ERRO and self.estatisticas[reserva].taxa_erro() < erro_primario:
+                nomes[0], nomes[1] = reserva, primario
+        return nomes
+
+    def _prazo_hedge(self, provedor):
+        p95 = self.estatisticas[provedor].percentil(0.95)
+        return max(LLM_HEDGE_PRAZO_MINIMO, p95 if p95 is not None else LLM_HEDGE_PRAZO_PADRAO)
+
+    def _chamar(self, provedor, nome_pessoa, resultados, comecos=None):
+        inicio = time.monotonic()
+        if comecos is not None:
+            comecos[provedor] = inicio
+        consumir_acerto_cache_llm()  # Marca que sobrou de outra chamada nesta thread
+        try:
+            resultado = self.provedores[provedor](nome_pessoa, resultados)
+        except Exception as e:
+            resultado = {"error": str(e)}
+        duracao = time.monotonic() - inicio
+        valido = _resultado_valido(resultado)
+        if consumir_acerto_cache_llm() and valido:
+            # Acerto de cache do script: só chamadas ao provedor entram no p95 que define o hedge
+            duracao_llm.observar(duracao, provedor=provedor, status="cache")
+            return resultado
+        self.estatisticas[provedor].registrar(duracao, valido)
+        duracao_llm.observar(duracao, provedor=provedor, status="ok" if valido else "erro")
+        if not valido:
+            erros.inc(componente=f"llm_{provedor}")
+        return resultado
+
+    def analisar(self, nome_pessoa, resultados, timeout=None):
+        limite = timeout if timeout is not None else self.executor.timeout
+        inicio = time.monotonic()
+        ordem = self._ordem()
+
+        comecos = {}  # provedor -> início da chamada, já fora da fila do executor
+        futuros = {self.executor.submeter(self._chamar, ordem[0], nome_pessoa, resultados, comecos): ordem[0]}
+        proximos = ordem[1:]
+        prazo_hedge = self._prazo_hedge(ordem[0])
+        ultimo_erro = {"error": "nenhum provedor respondeu"}
+
+        def passou_do_prazo():
+            comeco = comecos.get(ordem[0])
+            return comeco is not None and time.monotonic() - comeco >= prazo_hedge
+
+        while futuros:
+            restante = limite - (time.monotonic() - inicio)
+            if restante <= 0:
+                break
+
+            espera = restante
+            if proximos:
+                comeco = comecos.get(ordem[0])
+                if comeco is None:
+                    espera = min(restante, _INTERVALO_FILA)
+                else:
+                    espera = min(restante, max(0.0, prazo_hedge - (time.monotonic() - comeco)))
+            prontos, _ = wait(list(futuros), timeout=espera, return_when=FIRST_COMPLETED)
+
+            for futuro in prontos:
+                provedor = futuros.pop(futuro)
+                resultado = futuro.result()
+                if _resultado_valido(resultado):
+                    for outro in futuros:
+                        outro.cancel()
+                    with self.estatisticas[provedor]._lock:
+                        self.estatisticas[provedor].vitorias += 1
+                    resultado['provedor_llm'] = provedor
+                    print(f"🏁 Resposta de {provedor} em {time.monotonic() - inicio:.1f}s")
+                    return resultado
+                ultimo_erro = resultado
+                print(f"⚠️ {provedor} falhou: {resultado.get('error') if isinstance(resultado, dict) else resultado}")
+
+            # Primário falhou ou passou do prazo: dispara o reserva
+            if proximos and (not futuros or passou_do_prazo()):
+                reserva = proximos.pop(0)
+                with self.estatisticas[reserva]._lock:
+                    self.estatisticas[reserva].hedges += 1
+                motivo = "primário falhou" if not futuros else f"prazo de {prazo_hedge:.1f}s do primário"
+                print(f"🔀 Disparando {reserva} ({motivo})")
+                futuros[self.executor.submeter(self._chamar, reserva, nome_pessoa, resultados, comecos)] = reserva
+
+        for futuro in futuros:
+            futuro.cancel()
+        if futuros:
+            ultimo_erro = {"error": f"timeout após {limite:.0f}s"}
+        return ultimo_erro
+
+    def resumo(self):
+        return {nome: estatisticas.resumo() for nome, estatisticas in self.estatisticas.items()}
+
+
+_provedores = {"grok": analisar_com_grok}
+if GEMINI_DISPONIVEL:
+    _provedores["gemini"] = analisar_com_gemini
+
+roteador_llm = RoteadorLLM(_provedores)
+registro.coletor("roteador_llm", roteador_llm.resumo)
@@ -1,133 +1,69 @@
 import json
 import os
+import time
 from dotenv import load_dotenv
 import google.generativeai as genai
+from cache_persistente import gerar_chave
+from compactador_contexto import compactar_resultados
+from pool_clientes import pool_clientes
+from prompts import (PROMPT_VERSAO, SCHEMA_GEMINI, criar_cache_llm, marcar_acerto_cache_llm,
+                     montar_prompt_gemini, registrar_uso_gemini)
 
 load_dotenv()
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+MODELO_GEMINI = 'gemini-1.5-flash'
+
+pool_clientes.registrar('gemini', lambda: genai.GenerativeModel(MODELO_GEMINI))
+
+# Mesmo cache de análises do Grok, em namespace próprio
+cache_gemini = criar_cache_llm("llm_gemini")
+
 def analisar_com_gemini(nome_pessoa, resultados_ddgs):
     """Usa o Gemini para analisar os resultados do DuckDuckGo com JSON structured output"""
     
     try:
         # Criar payload otimizado
         resultados_otimizados = []
-        for resultado in resultados_ddgs:
-            resultados_otimizados.append({
+        for resultado in compactar_resultados(nome_pessoa, resultados_ddgs):
+            item = {
                 "t": resultado.get('title', 'N/A'),  # title
                 "b": resultado.get('body', 'N/A')    # body
-            })
+            }
+            if resultado.get('duplicatas'):
+                item["d"] = resultado['duplicatas']  # outras fontes com a mesma notícia
+            resultados_otimizados.append(item)
 
         contexto_compacto = json.dumps({
             "n": nome_pessoa,  # nome
             "r": resultados_otimizados  # resultados
         }, ensure_ascii=False)
 
-        # Configurar o modelo Gemini
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Definir o schema para structured output
-        schema = {
-            "type": "object",
-            "properties": {
-                "resumo_analise": {"type": "string"},
-                "polemicas": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "titulo": {"type": "string"},
-                            "descricao": {"type": "string"},
-                            "gravidade": {"type": "string", "enum": ["baixa", "media", "alta", "critica"]},
-                            "categoria": {"type": "string"},
-                            "fonte_url": {"type": "string"}
-                        },
-                        "required": ["titulo", "descricao", "gravidade", "categoria"]
-                    }
-                },
-                "empresas_associadas": {
-                    "type": "array", 
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "nome_empresa": {"type": "string"},
-                            "cnpj": {"type": "string"},
-                            "relacao": {"type": "string"},
-                            "fonte_url": {"type": "string"}
-                        },
-                        "required": ["nome_empresa", "relacao"]
-                    }
-                },
-                "risco_reputacao": {"type": "string", "enum": ["BAIXO", "MÉDIO", "ALTO", "CRÍTICO"]},
-                "recomendacoes": {"type": "string"},
-                "tweets_relevantes": {
-                    "type": "array",
-                    "items": {"type": "string"}
-                },
-                "fontes_consultadas": {
-                    "type": "array", 
-                    "items": {"type": "string"}
-                }
-            },
-            "required": ["resumo_analise", "polemicas", "risco_reputacao"]
-        }
-
-        prompt = f"""
-        ANALISE DE REPUTAÇÃO PÚBLICA - {nome_pessoa.upper()}
-
-        DADOS DA BUSCA (t=title, b=body):
-        {contexto_compacto}
-
-        **INSTRUÇÕES CRÍTICAS - SEJA MUITO SELETIVO:**
+        chave_cache = gerar_chave(MODELO_GEMINI, PROMPT_VERSAO, contexto_compacto)
+        em_cache = cache_gemini.obter(chave_cache)
+        if em_cache is not None:
+            print("💾 Análise Gemini em cache (contexto idêntico)")
+            marcar_acerto_cache_llm()
+            return em_cache
 
-        🎯 CRITÉRIOS PARA POLÊMICAS (APENAS INCLUA SE ATENDER):
-        - EVIDÊNCIAS CONCRETAS de irregularidades, crimes, ou comportamentos éticos questionáveis
-        - IMPACTO REAL na reputação pública
-        - FONTES CONFIÁVEIS (evite blogs, fóruns sem credibilidade)
-        - GRAVIDADE MÍNIMA: apenas inclua se for pelo menos "media"
-
-        ❌ NÃO INCLUA COMO POLÊMICA:
-        - Notícias neutras ou positivas sobre a pessoa
-        - Menções comuns em notícias sem acusações
-        - Conteúdo irrelevante ou duvidoso
-        - Informações sem evidências concretas
-
-        📊 CLASSIFICAÇÃO DE RISCO (USE APENAS UMA):
-        - "BAIXO": sem polêmicas significativas OU reputação predominantemente positiva
-        - "MÉDIO": 1-2 questões menores comprovadas
-        - "ALTO": múltiplas questões graves OU um caso sério com evidências
-        - "CRÍTICO": crimes graves, corrupção, prisão, organização criminosa
-
-        🔍 FILTRAGEM DE POLÊMICAS:
-        - Analise CRITICAMENTE cada resultado
-        - Descarte informações duvidosas ou sem fontes confiáveis
-        - Priorize evidências de sites oficiais, notícias reputáveis
-        - Inclua APENAS polêmicas com EVIDÊNCIAS CONCRETAS
-
-        📝 FORMATO ESPERADO:
-        - Seja EXTREMAMENTE seletivo nas polêmicas
-        - Inclua APENAS o que for relevante e comprovado
-        - Se não houver polêmicas reais, retorne array vazio
-        - Risco_reputacao deve refletir APENAS as polêmicas válidas
-
-        **SE NÃO HOUVER EVIDÊNCIAS DE POLÊMICAS REAIS, RETORNE:**
-        - "polemicas": [] (array vazio)
-        - "risco_reputacao": "BAIXO"
-        - "resumo_analise": explicando a ausência de polêmicas significativas
-
-        **SE HOUVER POLÊMICAS, SEJA MUITO ESPECÍFICO E BASEADO EM EVIDÊNCIAS**
-        """
+        # Modelo Gemini compartilhado (pool de clientes)
+        model = pool_clientes.obter('gemini')
+        
+        # Prefixo fixo primeiro (reaproveitado pelo cache de prompt do provedor), dados no final
+        prompt = montar_prompt_gemini(contexto_compacto)
 
         # Fazer a chamada com structured output
+        inicio = time.monotonic()
         response = model.generate_content(
             prompt,
             generation_config=genai.types.GenerationConfig(
                 response_mime_type="application/json",
-                response_schema=schema
+                response_schema=SCHEMA_GEMINI
             )
         )
+        registrar_uso_gemini(response, time.monotonic() - inicio)
         
         # Parsear a resposta JSON
         resultado_json = json.loads(response.text)
@@ -135,6 +71,7 @@ def analisar_com_gemini(nome_pessoa, resultados_ddgs):
         # PÓS-PROCESSAMENTO: Validar e limpar os resultados
         resultado_json = _validar_resultado_gemini(resultado_json)
         
+        cache_gemini.gravar(chave_cache, resultado_json)
         return resultado_json
         
     except Exception as e:
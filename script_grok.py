@@ -1,15 +1,30 @@
 import json
 import os
+import time
 from dotenv import load_dotenv
 from xai_sdk.chat import system, user
-from models import AnalisePessoa
+from models import AnaliseLote, AnalisePessoa
 from xai_sdk import Client
+from cache_persistente import gerar_chave
+from compactador_contexto import compactar_resultados
+from pool_clientes import pool_clientes
+from prompts import (INSTRUCOES_SISTEMA, PROMPT_VERSAO, criar_cache_llm, marcar_acerto_cache_llm,
+                     montar_prompt_grok, montar_prompt_grok_lote, registrar_uso_grok)
 
 
 load_dotenv()
 
 XAI_API_KEY = os.environ.get("XAI_API_KEY")
-client = Client(api_key=XAI_API_KEY)
+# Canal gRPC único por processo, criado no aquecimento do worker ou no primeiro uso
+pool_clientes.registrar('grok', lambda: Client(api_key=XAI_API_KEY))
+
+MODELO_GROK = "grok-4-fast-reasoning"
+
+# Modo em lote: várias pessoas de baixo sinal num único prompt
+LLM_LOTE_TAMANHO = int(os.environ.get("LLM_LOTE_TAMANHO", "5"))
+LLM_LOTE_MAX_TOKENS_SAIDA = int(os.environ.get("LLM_LOTE_MAX_TOKENS_SAIDA", "8000"))
+
+cache_grok = criar_cache_llm("llm_grok")
 
 def _classificar_fonte_simples(url):
     """Classificação simples da fonte para contexto"""
@@ -23,109 +38,186 @@ def _classificar_fonte_simples(url):
     else:
         return "Blog/Forum"
 
+def _itens_compactos(nome_pessoa, resultados_ddgs):
+    """Resultados compactados no formato curto enviado ao modelo (t/b/h/d)"""
+    resultados_otimizados = []
+    for resultado in compactar_resultados(nome_pessoa, resultados_ddgs):
+        item = {
+            "t": resultado.get('title', 'N/A'),  # title
+            "b": resultado.get('body', 'N/A'),    # body
+            "h": resultado.get('href', 'N/A')
+        }
+        if resultado.get('duplicatas'):
+            item["d"] = resultado['duplicatas']  # outras fontes com a mesma notícia
+        resultados_otimizados.append(item)
+    return resultados_otimizados
+
+def _contexto_pessoa(nome_pessoa, resultados_ddgs):
+    """(itens, contexto_compacto, chave_cache) de uma pessoa.
+
+    Os modos individual e em lote usam a mesma compactação e, portanto, a
+    mesma chave: um reaproveita o cache do outro.
+    """
+    itens = _itens_compactos(nome_pessoa, resultados_ddgs)
+    contexto_compacto = json.dumps({"n": nome_pessoa, "r": itens}, ensure_ascii=False)
+    return itens, contexto_compacto, gerar_chave(MODELO_GROK, PROMPT_VERSAO, contexto_compacto)
+
+def _normalizar_risco(resultado):
+    """Padroniza risco_reputacao em BAIXO/MÉDIO/ALTO/CRÍTICO"""
+    if 'risco_reputacao' in resultado:
+        risco = (resultado['risco_reputacao'] or '').upper().strip()
+        opcoes_validas = ["BAIXO", "MÉDIO", "ALTO", "CRÍTICO"]
+        
+        # Se não estiver nas opções válidas, tentar extrair
+        if risco not in opcoes_validas:
+            if any(palavra in risco for palavra in ["CRÍTIC", "CRITIC"]):
+                resultado['risco_reputacao'] = "CRÍTICO"
+            elif any(palavra in risco for palavra in ["ALT", "HIGH"]):
+                resultado['risco_reputacao'] = "ALTO"
+            elif any(palavra in risco for palavra in ["MÉDI", "MEDI", "MEDIUM"]):
+                resultado['risco_reputacao'] = "MÉDIO"
+            elif any(palavra in risco for palavra in ["BAIX", "LOW"]):
+                resultado['risco_reputacao'] = "BAIXO"
+            else:
+                # Fallback: calcular baseado nas polêmicas
+                gravidades = [p.get('gravidade', 'baixa') for p in resultado.get('polemicas', [])]
+                if any(g in ['critica'] for g in gravidades):
+                    resultado['risco_reputacao'] = "CRÍTICO"
+                elif any(g in ['alta'] for g in gravidades):
+                    resultado['risco_reputacao'] = "ALTO"
+                elif any(g in ['media'] for g in gravidades):
+                    resultado['risco_reputacao'] = "MÉDIO"
+                else:
+                    resultado['risco_reputacao'] = "BAIXO"
+    return resultado
+
 def analisar_com_grok(nome_pessoa, resultados_ddgs):
     """Usa o Grok para analisar os resultados do DuckDuckGo"""
     
     try:       
-        resultados_otimizados = []
-        for resultado in resultados_ddgs:
-            resultados_otimizados.append({
-                "t": resultado.get('title', 'N/A'),  # title
-                "b": resultado.get('body', 'N/A'),    # body
-                "h": resultado.get('href', 'N/A')
-            })
-
-        contexto_compacto = json.dumps({
-            "n": nome_pessoa,  
-            "r": resultados_otimizados  
-        }, ensure_ascii=False)
-
-        chat = client.chat.create(model="grok-4-fast-reasoning")
-        
-        prompt = f"""
-        ANALISE DE REPUTAÇÃO PÚBLICA - {nome_pessoa.upper()}
-
-        BASEADO NOS SEGUINTES RESULTADOS CONSOLIDADOS DE BUSCA:
-        {contexto_compacto}
-
-        **INSTRUÇÕES CRÍTICAS:**
-        - Para 'risco_reputacao' use APENAS UMA DESTAS OPÇÕES: "BAIXO", "MÉDIO", "ALTO", "CRÍTICO"
-        - Seja CONCISO e OBJETIVO
-        - Use classificação padronizada
-
-        **ANALISE ESTES RESULTADOS E IDENTIFIQUE:**
-
-        🔍 POLÊMICAS E CONTROVÉRSIAS:
-        - Para CADA polêmica, inclua:
-          * titulo: breve e descritivo (máx 100 caracteres)
-          * descricao: resumo objetivo (máx 200 caracteres)
-          * gravidade: "baixa", "media", "alta" ou "critica"
-          * categoria: "Judicial", "Corrupção", "Licitações", "Eleitoral", etc.
-          * fonte_url: URL da fonte
-
-        📊 CLASSIFICAÇÃO DE RISCO (USE APENAS UMA DESTAS):
-        - "BAIXO": sem polêmicas significativas ou apenas questões menores
-        - "MÉDIO": algumas questões problemáticas, mas sem gravidade extrema
-        - "ALTO": múltiplas questões graves ou envolvimento em casos sérios
-        - "CRÍTICO": envolvimento em crimes graves, corrupção, prisão, etc.
-
-        🎯 DIRETRIZES:
-        - Seja objetivo e factual
-        - Baseie-se apenas nas informações fornecidas
-        - Priorize fontes confiáveis (sites oficiais, notícias)
-        - Para risco_reputacao: APENAS UMA PALAVRA das opções acima
-        - Resumo deve ter no máximo 2-3 frases
-        - Recomendações devem ser práticas e diretas
-        - colocar os links completos para acessar 
-
-        Quando possível traga o CNPJ das empresas que estão sendo citadas ai, as que estão relacionadas com a pessoa buscada.
-
-        """
-
-        chat.append(system("""Você é um analista especializado em due diligence e análise de reputação pública. 
-        Siga STRITAMENTE estas regras:
-        1. Para 'risco_reputacao' use APENAS: "BAIXO", "MÉDIO", "ALTO" ou "CRÍTICO"
-        2. Seja conciso e objetivo em todas as respostas
-        3. Use classificação padronizada para gravidade das polêmicas
-        4. Mantenha títulos e descrições CURTOS
-        5. Baseie-se apenas nas evidências fornecidas"""))
+        _, contexto_compacto, chave_cache = _contexto_pessoa(nome_pessoa, resultados_ddgs)
+
+        em_cache = cache_grok.obter(chave_cache)
+        if em_cache is not None:
+            print("💾 Análise Grok em cache (contexto idêntico)")
+            marcar_acerto_cache_llm()
+            return em_cache
+
+        chat = pool_clientes.obter('grok').chat.create(model=MODELO_GROK)
         
-        chat.append(user(prompt))
+        # Prefixo fixo primeiro (reaproveitado pelo cache de prompt do provedor), dados no final
+        chat.append(system(INSTRUCOES_SISTEMA))
+        chat.append(user(montar_prompt_grok(contexto_compacto)))
         
+        inicio = time.monotonic()
         response, analise = chat.parse(AnalisePessoa)
+        registrar_uso_grok(response, time.monotonic() - inicio)
         
         # PÓS-PROCESSAMENTO: Garantir que risco_reputacao esteja padronizado
-        resultado = analise.dict()
-        
-        # Normalizar o campo risco_reputacao
-        if 'risco_reputacao' in resultado:
-            risco = resultado['risco_reputacao'].upper().strip()
-            opcoes_validas = ["BAIXO", "MÉDIO", "ALTO", "CRÍTICO"]
-            
-            # Se não estiver nas opções válidas, tentar extrair
-            if risco not in opcoes_validas:
-                if any(palavra in risco for palavra in ["CRÍTIC", "CRITIC"]):
-                    resultado['risco_reputacao'] = "CRÍTICO"
-                elif any(palavra in risco for palavra in ["ALT", "HIGH"]):
-                    resultado['risco_reputacao'] = "ALTO"
-                elif any(palavra in risco for palavra in ["MÉDI", "MEDI", "MEDIUM"]):
-                    resultado['risco_reputacao'] = "MÉDIO"
-                elif any(palavra in risco for palavra in ["BAIX", "LOW"]):
-                    resultado['risco_reputacao'] = "BAIXO"
-                else:
-                    # Fallback: calcular baseado nas polêmicas
-                    gravidades = [p.get('gravidade', 'baixa') for p in resultado.get('polemicas', [])]
-                    if any(g in ['critica'] for g in gravidades):
-                        resultado['risco_reputacao'] = "CRÍTICO"
-                    elif any(g in ['alta'] for g in gravidades):
-                        resultado['risco_reputacao'] = "ALTO"
-                    elif any(g in ['media'] for g in gravidades):
-                        resultado['risco_reputacao'] = "MÉDIO"
-                    else:
-                        resultado['risco_reputacao'] = "BAIXO"
+        resultado = _normalizar_risco(analise.dict())
         
+        cache_grok.gravar(chave_cache, resultado)
         return resultado
         
     except Exception as e:
         print(f"❌ Erro na análise Grok: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+def _chave_nome(nome):
+    return ' '.join(nome.lower().split())
+
+def _analisar_lote_unico(pessoas):
+    """Uma chamada para várias pessoas: [(nome, itens_compactos)] -> {chave_nome: análise}.
+
+    Lança exceção se a saída vier inválida (JSON cortado por tamanho, por
+    exemplo) ou sem a análise de alguma das pessoas.
+    """
+    contexto_lote = json.dumps(
+        [{"n": nome, "r": itens} for nome, itens in pessoas],
+        ensure_ascii=False
+    )
+
+    chat = pool_clientes.obter('grok').chat.create(model=MODELO_GROK, max_tokens=LLM_LOTE_MAX_TOKENS_SAIDA)
+    
+    chat.append(system(INSTRUCOES_SISTEMA))
+    chat.append(user(montar_prompt_grok_lote(contexto_lote)))
+
+    inicio = time.monotonic()
+    response, lote = chat.parse(AnaliseLote)
+    registrar_uso_grok(response, time.monotonic() - inicio)
+
+    analises = {}
+    for analise in lote.analises:
+        resultado = analise.dict()
+        chave = _chave_nome(resultado.pop('nome'))
+        analises[chave] = _normalizar_risco(resultado)
+
+    faltando = [nome for nome, _ in pessoas if _chave_nome(nome) not in analises]
+    if faltando:
+        raise ValueError(f"lote sem análise para: {', '.join(faltando)}")
+    return analises
+
+def _analisar_lote_dividindo(pessoas, originais):
+    """Tenta o lote inteiro; se falhar, divide ao meio até chegar em uma pessoa.
+
+    Uma pessoa sozinha volta para analisar_com_grok (prompt individual).
+    """
+    if len(pessoas) == 1:
+        nome = pessoas[0][0]
+        return {_chave_nome(nome): analisar_com_grok(nome, originais[_chave_nome(nome)])}
+
+    try:
+        return _analisar_lote_unico(pessoas)
+    except Exception as e:
+        meio = len(pessoas) // 2
+        print(f"✂️  Lote de {len(pessoas)} inválido ({e}): dividindo em {meio} + {len(pessoas) - meio}")
+        analises = _analisar_lote_dividindo(pessoas[:meio], originais)
+        analises.update(_analisar_lote_dividindo(pessoas[meio:], originais))
+        return analises
+
+def analisar_lote_com_grok(pessoas):
+    """Analisa várias pessoas com um prompt por lote.
+
+    pessoas: lista de (nome_pessoa, resultados_ddgs). Retorna uma lista de
+    análises (ou {"error": ...}) na mesma ordem. Cada pessoa usa a mesma chave
+    de cache do modo individual; só as que não estão em cache vão para o
+    modelo, em lotes de até LLM_LOTE_TAMANHO pessoas.
+    """
+    analises = [None] * len(pessoas)
+    pendentes = []  # (posição, nome, itens)
+    originais = {}
+    chaves_cache = {}
+
+    for posicao, (nome_pessoa, resultados_ddgs) in enumerate(pessoas):
+        chave = _chave_nome(nome_pessoa)
+        itens, _, chave_cache = _contexto_pessoa(nome_pessoa, resultados_ddgs)
+
+        em_cache = cache_grok.obter(chave_cache)
+        if em_cache is not None:
+            analises[posicao] = em_cache
+        elif chave in originais:
+            # Homônimo de alguém já no lote: as respostas são chaveadas por nome
+            analises[posicao] = analisar_com_grok(nome_pessoa, resultados_ddgs)
+        else:
+            originais[chave] = resultados_ddgs
+            chaves_cache[chave] = chave_cache
+            pendentes.append((posicao, nome_pessoa, itens))
+
+    print(f"📦 Lote Grok: {len(pessoas)} pessoas, {len(pendentes)} enviadas ao modelo")
+
+    for inicio in range(0, len(pendentes), LLM_LOTE_TAMANHO):
+        grupo = pendentes[inicio:inicio + LLM_LOTE_TAMANHO]
+        try:
+            resultado_grupo = _analisar_lote_dividindo([(nome, itens) for _, nome, itens in grupo], originais)
+        except Exception as e:
+            print(f"❌ Erro na análise Grok em lote: {e}")
+            resultado_grupo = {}
+
+        for posicao, nome_pessoa, _ in grupo:
+            chave = _chave_nome(nome_pessoa)
+            resultado = resultado_grupo.get(chave, {"error": "sem resposta no lote"})
+            if "error" not in resultado:
+                cache_grok.gravar(chaves_cache[chave], resultado)
+            analises[posicao] = resultado
+
+    return analises
@@ -0,0 +1,134 @@
+# termos.py
+from functools import lru_cache
+
+# ========== DICIONÁRIOS DE TERMOS ==========
+
+TERMOS_CONTEUDO = {
+    # Validação de relevância (buscador_duck._validar_relevancia_resultado)
+    'relevancia_importante': [
+        'processo', 'ação', 'tribunal', 'ministério público', 'justiça',
+        'condenação', 'prisão', 'investigação', 'denúncia', 'licitação',
+        'contrato', 'desvio', 'corrupção', 'fraude'
+    ],
+    'relevancia_irrelevante': [
+        'receita federal', 'nota fiscal', 'certidão', 'agendamento',
+        'marcar horário', 'agendar', 'consulta simples'
+    ],
+    # Peso para ordenação (buscador_duck._calcular_peso_relevancia)
+    'peso_juridico': ['processo', 'tribunal', 'ministério público'],
+    # Gravidade (AnalisadorUnificado._classificar_gravidade)
+    'gravidade_critica': [
+        'condenado', 'prisão', 'crime', 'lavagem de dinheiro', 'tráfico',
+        'assassinato', 'homicídio', 'pedofilia', 'estupro', 'racismo'
+    ],
+    'gravidade_alta': [
+        'corrupção', 'desvio', 'propina', 'improbidade', 'fraude',
+        'superfaturamento', 'licitação fraudulenta', 'caixa dois',
+        'sonegação fiscal', 'lavagem de capitais'
+    ],
+    'gravidade_media': [
+        'investigação', 'processo', 'denúncia', 'inquérito', 'apuração',
+        'irregularidade', 'tribunal de contas', 'tce', 'mpf', 'pf'
+    ],
+    'gravidade_baixa': [
+        'polêmica', 'controvérsia', 'crítica', 'questionamento',
+        'acórdão', 'escrutínio', 'auditoria', 'recomendação'
+    ],
+    'gravidade_positiva': [
+        'absolvido', 'inocente', 'arquivado', 'improcedente',
+        'favorável', 'positivo', 'elogio', 'reconhecimento'
+    ],
+    # Categorias (AnalisadorUnificado._extrair_categorias)
+    'categoria_licitacoes': ['licitação', 'contrato', 'pregão'],
+    'categoria_eleitoral': ['eleição', 'campanha', 'doação'],
+    'categoria_corrupcao': ['corrupção', 'desvio', 'propina'],
+    'categoria_judicial': ['processo', 'judicial', 'tribunal'],
+    # Contexto geral (AnalisadorUnificado._processar_analise_final)
+    'contexto_positivo': [
+        'positivo', 'favorável', 'elogio', 'reconhecimento', 'competente',
+        'eficiente', 'confiança', 'honesto', 'íntegro', 'trabalho'
+    ],
+    'contexto_negativo': [
+        'corrupção', 'fraude', 'crime', 'condenado', 'prisão',
+        'irregularidade', 'denúncia', 'processo', 'investigação'
+    ],
+}
+
+TERMOS_FONTES = {
+    'fonte_irrelevante': [
+        'wikipedia.org', 'instagram.com', 'facebook.com', 'youtube.com',
+        'linkedin.com', 'blogspot.com', 'wordpress.com'
+    ],
+    'fonte_preferencial': [
+        '.gov', '.jus', '.mp', 'tcu', 'tse', 'stf', 'stj',
+        'g1.globo.com', 'oglobo.globo.com', 'folha.com.br',
+        'estadao.com.br', 'valor.com.br', 'poder360.com.br',
+        'congressoemfoco.uol.com.br', 'metropoles.com'
+    ],
+    'fonte_oficial': ['.gov', '.jus', '.mp', 'tcu', 'tse'],
+    'fonte_jornal': ['g1.globo.com', 'oglobo.globo.com', 'folha.com.br'],
+}
+
+
+class Ocorrencias:
+    """Termos encontrados em um texto, agrupados por categoria.
+
+    Imutável: a mesma instância é devolvida pelo cache a todos que analisam o mesmo texto.
+    """
+
+    __slots__ = ('_por_categoria',)
+
+    def __init__(self, por_categoria):
+        self._por_categoria = por_categoria
+
+    def tem(self, categoria):
+        return categoria in self._por_categoria
+
+    def contar(self, categoria):
+        """Quantidade de termos DISTINTOS da categoria presentes no texto"""
+        return len(self._por_categoria.get(categoria, ()))
+
+    def termos(self, categoria):
+        return self._por_categoria.get(categoria, frozenset())
+
+
+class DicionarioTermos:
+    """Busca os termos de todas as categorias de uma vez, com cache por texto.
+
+    Cada termo distinto é testado uma única vez por texto (mesmo que apareça em
+    várias categorias) e o texto é convertido para minúsculas uma única vez.
+    `termo in texto` roda em C e, para dicionários deste tamanho, é mais rápido
+    no CPython do que uma alternação compilada ou um Aho-Corasick em Python puro;
+    a semântica de substring também é preservada ('ação' casa em 'investigação').
+    """
+
+    def __init__(self, categorias, tamanho_cache=8192):
+        self._categorias_por_termo = {}
+        for categoria, termos in categorias.items():
+            for termo in termos:
+                self._categorias_por_termo.setdefault(termo, []).append(categoria)
+        self._termos = tuple(self._categorias_por_termo)
+        self.analisar = lru_cache(maxsize=tamanho_cache)(self._analisar)
+
+    def _analisar(self, texto):
+        """Retorna as Ocorrencias de termos em `texto` (comparação sem caixa)"""
+        texto = texto.lower()
+        por_categoria = {}
+        for termo in [termo for termo in self._termos if termo in texto]:
+            for categoria in self._categorias_por_termo[termo]:
+                por_categoria.setdefault(categoria, set()).add(termo)
+        return Ocorrencias({categoria: frozenset(termos) for categoria, termos in por_categoria.items()})
+
+
+DICIONARIO_CONTEUDO = DicionarioTermos(TERMOS_CONTEUDO)
+DICIONARIO_FONTES = DicionarioTermos(TERMOS_FONTES)
+
+
+def termos_resultado(resultado):
+    """Termos de conteúdo do título + corpo de um resultado de busca"""
+    return DICIONARIO_CONTEUDO.analisar(f"{resultado.get('title', '')} {resultado.get('body', '')}")
+
+
+def termos_fonte(resultado):
+    """Termos de domínio da URL de um resultado de busca"""
+    return DICIONARIO_FONTES.analisar(resultado.get('href', ''))
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from agendador import AGENDADOR_FILA_LOTE_POR_VAGA, AGENDADOR_RETRY_AFTER_PADRAO, AgendadorAnalises
+
+
+def test_fila_do_lote_satura_no_limite(esperar):
+    agendador = AgendadorAnalises(capacidade=2, reserva_interativa=1, fila_lote_maxima=1)
+    assert agendador.fila_lote_maxima == agendador.vagas_lote == 1
+    assert agendador.estimar_espera_lote() == AGENDADOR_RETRY_AFTER_PADRAO
+
+    liberar = threading.Event()
+    rodando = agendador.submeter(liberar.wait, 5, prioridade=agendador.LOTE, cliente="a")
+    esperar(lambda: agendador.estatisticas()['ativas_lote'] == 1)
+    assert not agendador.lote_saturado()
+
+    na_fila = agendador.submeter(liberar.wait, 5, prioridade=agendador.LOTE, cliente="b")
+    assert agendador.lote_saturado()
+
+    # Interativas não contam para o limite do lote
+    assert agendador.submeter(lambda: "ok").result(5) == "ok"
+    assert agendador.lote_saturado()
+
+    liberar.set()
+    rodando.result(5)
+    na_fila.result(5)
+    assert not agendador.lote_saturado()
+
+
+def test_fila_padrao_tem_varios_itens_por_vaga_do_lote():
+    assert AgendadorAnalises(capacidade=2, reserva_interativa=1).fila_lote_maxima == AGENDADOR_FILA_LOTE_POR_VAGA
+    assert AgendadorAnalises(capacidade=5, reserva_interativa=1).fila_lote_maxima == 4 * AGENDADOR_FILA_LOTE_POR_VAGA
+
+
+def test_workers_padrao_do_pack_nao_saturam_o_servidor_padrao(esperar):
+    pack = pytest.importorskip("pack")
+    agendador = AgendadorAnalises()
+    liberar = threading.Event()
+
+    # Cada worker do pack segura uma análise de lote (rodando ou na fila) e já pede a próxima
+    futuros = []
+    for _ in range(pack.WORKERS_PADRAO):
+        assert not agendador.lote_saturado()
+        futuros.append(agendador.submeter(liberar.wait, 5, prioridade=agendador.LOTE, cliente="pack"))
+    esperar(lambda: agendador.estatisticas()['ativas_lote'] == min(pack.WORKERS_PADRAO, agendador.vagas_lote))
+    assert not agendador.lote_saturado()
+
+    liberar.set()
+    for futuro in futuros:
+        futuro.result(5)
+
+
+def test_retry_after_usa_a_duracao_media_do_lote():
+    agendador = AgendadorAnalises(capacidade=3, reserva_interativa=1)
+    for _ in range(2):
+        agendador.submeter(time.sleep, 0.2, prioridade=agendador.LOTE).result(5)
+    # Fila vazia: uma análise média dividida pelas 2 vagas do lote
+    assert agendador.estimar_espera_lote() == 1
+
+
+def test_limite_zero_desliga_a_saturacao():
+    agendador = AgendadorAnalises(capacidade=2, reserva_interativa=1, fila_lote_maxima=0)
+    liberar = threading.Event()
+    futuros = [agendador.submeter(liberar.wait, 5, prioridade=agendador.LOTE) for _ in range(5)]
+    assert not agendador.lote_saturado()
+    liberar.set()
+    for futuro in futuros:
+        futuro.result(5)
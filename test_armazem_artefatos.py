@@ -0,0 +1,64 @@
+import gzip
+import os
+
+from armazem_artefatos import ArmazemArtefatos
+
+
+def test_segmentos_giram_no_tamanho_e_cada_registro_e_lido_pelo_indice(tmp_path):
+    armazem = ArmazemArtefatos(diretorio=str(tmp_path), tamanho_segmento=600)
+    run_ids = [
+        armazem.gravar("Fulano de Tal", "resultados_busca", {'i': i, 'texto': os.urandom(200).hex()}, cargo_publico="Vereador")
+        for i in range(6)
+    ]
+    armazem.aguardar()
+
+    segmentos = sorted(nome for nome in os.listdir(tmp_path) if nome.startswith("segmento_"))
+    assert len(segmentos) > 1
+    assert all(os.path.getsize(tmp_path / nome) <= 600 for nome in segmentos)
+
+    artefatos = armazem.listar("fulano de tal", "vereador")
+    assert [a['run_id'] for a in artefatos] == run_ids[::-1]
+    assert {a['segmento'] for a in artefatos} == set(segmentos)
+    assert [armazem.ler(a['id'])['dados']['i'] for a in artefatos] == [5, 4, 3, 2, 1, 0]
+    assert armazem.ultimo("Fulano de Tal", "resultados_busca", "Vereador")['i'] == 5
+
+    # Membros gzip concatenados: zcat de um segmento devolve JSONL
+    with gzip.open(tmp_path / segmentos[0], 'rt', encoding='utf-8') as arquivo:
+        assert all(linha.startswith('{"nome":"Fulano de Tal"') for linha in arquivo)
+
+
+def test_reabrir_continua_no_ultimo_segmento(tmp_path):
+    armazem = ArmazemArtefatos(diretorio=str(tmp_path), tamanho_segmento=300)
+    for i in range(4):
+        armazem.gravar("Fulano", "analise", {'texto': os.urandom(150).hex()})
+    armazem.aguardar()
+    ultimo = armazem.estatisticas()['segmento_atual']
+    assert ultimo > 1
+
+    reaberto = ArmazemArtefatos(diretorio=str(tmp_path), tamanho_segmento=300)
+    assert len(reaberto.listar("Fulano")) == 4
+    assert reaberto.estatisticas()['segmento_atual'] == ultimo
+
+
+def test_worker_apos_fork_procura_o_segmento_atual(tmp_path, monkeypatch):
+    # Criado no master (preload_app), antes de qualquer worker gravar
+    armazem = ArmazemArtefatos(diretorio=str(tmp_path), tamanho_segmento=400)
+    armazem.gravar("Fulano", "analise", {'texto': 'master'})
+    armazem.aguardar()
+
+    # Outro worker enche segmentos depois do fork (um registro por segmento)
+    outro_worker = ArmazemArtefatos(diretorio=str(tmp_path), tamanho_segmento=400)
+    for i in range(4):
+        outro_worker.gravar("Beltrano", "analise", {'texto': os.urandom(150).hex()})
+    outro_worker.aguardar()
+    ultimo = outro_worker.estatisticas()['segmento_atual']
+    assert ultimo > 1
+
+    # Worker novo (fork ou reciclagem) herda o objeto do master
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    armazem.gravar("Fulano", "analise", {'texto': os.urandom(150).hex()})
+    armazem.aguardar()
+
+    assert armazem.listar("Fulano")[0]['segmento'] >= f"segmento_{ultimo:06d}.jsonl.gz"
+    segmentos = [nome for nome in os.listdir(tmp_path) if nome.startswith("segmento_")]
+    assert all(os.path.getsize(tmp_path / nome) <= 400 for nome in segmentos)
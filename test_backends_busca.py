@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+import backends_busca
+from backends_busca import BackendReplay
+
+
+@pytest.mark.parametrize("valor, esperado", [(None, None), ("", None), ("gravada", None), ("Gravada", None),
+                                             ("0", 0.0), ("0.25", 0.25)])
+def test_latencia_do_replay_vem_da_fixture_salvo_valor_explicito(valor, esperado):
+    assert backends_busca._latencia_replay(valor) == esperado
+
+
+def test_replay_dorme_a_latencia_gravada(tmp_path, monkeypatch):
+    caminho = backends_busca._caminho_fixture(str(tmp_path), 'q', 'br-pt', 10, 'y')
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump({'query': 'q', 'latencia': 1.5, 'resultados': [{'href': 'https://exemplo.com/q'}]}, f)
+
+    dormidas = []
+    monkeypatch.setattr(backends_busca.time, 'sleep', dormidas.append)
+
+    assert BackendReplay(diretorio=str(tmp_path), latencia=None).text('q', 'br-pt', 10, 'y')
+    assert BackendReplay(diretorio=str(tmp_path), latencia=0.2).text('q', 'br-pt', 10, 'y')
+    assert dormidas == [1.5, 0.2]
+
+
+def test_replay_sem_fixture_avisa_ou_falha(tmp_path, capsys):
+    replay = BackendReplay(diretorio=str(tmp_path), latencia=0)
+    assert replay.text('sem fixture', 'br-pt', 10, 'y') == []
+    assert replay.ausentes == 1
+    assert "sem fixture" in capsys.readouterr().out
+
+    with pytest.raises(backends_busca.FixtureAusente):
+        BackendReplay(diretorio=str(tmp_path), latencia=0, estrito=True).text('sem fixture', 'br-pt', 10, 'y')
@@ -0,0 +1,88 @@
+import threading
+
+import backends_busca
+import buscador_duck
+from pool_clientes import PoolClientes
+
+
+class DDGSFalso:
+    def text(self, query, region, max_results, timelimit):
+        return [{'href': f'https://exemplo.com/{query}', 'title': query, 'body': ''}]
+
+
+def test_clientes_ddgs_nao_sao_recriados_a_cada_busca(monkeypatch):
+    criados = []
+
+    def criar_ddgs():
+        criados.append(threading.current_thread().name)
+        return DDGSFalso()
+
+    pool = PoolClientes()
+    pool.registrar('ddgs', criar_ddgs, por_thread=True)
+    monkeypatch.setattr(backends_busca, 'pool_clientes', pool)
+    monkeypatch.setattr(buscador_duck, 'duck', backends_busca.BackendDDGS())
+    monkeypatch.setattr(buscador_duck, 'DDGS_MODO_CONCORRENTE', True)
+    monkeypatch.setattr(buscador_duck, '_executar_query_segura',
+                        lambda query, i, total: buscador_duck.duck.text(query, 'br-pt', 10, 'y'))
+
+    queries = [f'q{i}' for i in range(12)]
+    buscas = 5
+    for _ in range(buscas):
+        executadas = [query for query, _, _ in buscador_duck._executar_queries(queries)]
+        assert executadas == queries
+
+    # No máximo um cliente por thread do pool, não importa quantas buscas rodem
+    assert len(criados) <= buscador_duck.DDGS_MAX_WORKERS
+    assert len(set(criados)) == len(criados)
+    assert pool.estatisticas()['ddgs']['reutilizados'] == buscas * len(queries) - len(criados)
+
+
+def test_busca_em_streaming_entrega_resultados_antes_das_outras_queries(tmp_path, monkeypatch):
+    from planejador_queries import PlanejadorQueries
+
+    monkeypatch.setattr(buscador_duck, 'planejador', PlanejadorQueries(caminho=str(tmp_path / 'plano.db')))
+    monkeypatch.setattr(buscador_duck, 'DDGS_MODO_CONCORRENTE', False)
+    eventos = []
+
+    def query_falsa(query, numero, total):
+        eventos.append(('query', numero))
+        return [{'href': f'https://exemplo.com/{numero}', 'title': f'Fulano de Tal notícia {numero}',
+                 'body': f'texto distinto número {numero} ' * numero}]
+
+    monkeypatch.setattr(buscador_duck, '_executar_query_segura', query_falsa)
+
+    entregues = []
+    for resultado in buscador_duck.buscar_dados_duckduckgo_stream('Fulano de Tal', 'vereador', 'Paraná'):
+        eventos.append(('resultado', resultado['href']))
+        entregues.append(resultado)
+
+    # O primeiro resultado chega ao consumidor antes da segunda query rodar
+    assert eventos[:3] == [('query', 1), ('resultado', 'https://exemplo.com/1'), ('query', 2)]
+
+    completo = buscador_duck.buscar_dados_duckduckgo_completo('Fulano de Tal', 'vereador', 'Paraná')
+    assert [r['href'] for r in completo] == [r['href'] for r in buscador_duck.ordenar_por_relevancia(entregues)]
+
+
+def test_gravacao_e_replay_nao_passam_pelo_cache_de_producao(tmp_path, monkeypatch):
+    from cache_persistente import CachePersistente
+
+    cache = CachePersistente("ddgs", 3600, 100, caminho=str(tmp_path / 'cache.db'))
+    cache.gravar(buscador_duck.gerar_chave('q', 'br-pt', 10, 'y'), [{'href': 'https://cache.com/q'}])
+    monkeypatch.setattr(buscador_duck, 'cache_ddgs', cache)
+
+    # Gravar: a query já em cache ainda chega à rede e vira fixture
+    fixtures = str(tmp_path / 'fixtures')
+    monkeypatch.setattr(buscador_duck, 'duck', backends_busca.BackendGravacao(DDGSFalso(), diretorio=fixtures))
+    assert buscador_duck._buscar_com_cache('q', 'br-pt', 10, 'y')[0]['href'] == 'https://exemplo.com/q'
+    assert cache.obter(buscador_duck.gerar_chave('q', 'br-pt', 10, 'y'))[0]['href'] == 'https://cache.com/q'
+
+    # Replay: serve a fixture sem limitador e sem escrever no cache
+    def sem_limitador():
+        raise AssertionError("replay não passa pelo limitador")
+
+    monkeypatch.setattr(buscador_duck.limitador, 'adquirir', sem_limitador)
+    monkeypatch.setattr(buscador_duck, 'duck', backends_busca.BackendReplay(diretorio=fixtures, latencia=0))
+    assert buscador_duck._buscar_com_cache('q', 'br-pt', 10, 'y')[0]['href'] == 'https://exemplo.com/q'
+    assert buscador_duck._buscar_com_cache('outra', 'br-pt', 10, 'y') == []
+    assert buscador_duck.duck.ausentes == 1
+    assert cache.obter(buscador_duck.gerar_chave('outra', 'br-pt', 10, 'y')) is None
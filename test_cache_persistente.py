@@ -0,0 +1,58 @@
+import os
+import time
+
+import cache_persistente
+from cache_persistente import CachePersistente
+
+
+def test_entrada_expira_pelo_ttl(tmp_path, monkeypatch):
+    cache = CachePersistente("teste", ttl_segundos=60, max_entradas=10, caminho=str(tmp_path / "cache.db"))
+    cache.gravar("a", {"valor": 1})
+    assert cache.obter("a") == {"valor": 1}
+
+    agora = time.time()
+    monkeypatch.setattr(cache_persistente.time, "time", lambda: agora + 61)
+    assert cache.obter("a") is None
+    estado = cache.estatisticas()
+    assert (estado['hits'], estado['expirados'], estado['entradas']) == (1, 1, 0)
+
+
+def test_despeja_a_entrada_usada_ha_mais_tempo(tmp_path, monkeypatch):
+    cache = CachePersistente("teste", ttl_segundos=3600, max_entradas=2, caminho=str(tmp_path / "cache.db"))
+    relogio = [1000.0]
+    monkeypatch.setattr(cache_persistente.time, "time", lambda: relogio[0])
+
+    for chave in ("a", "b"):
+        cache.gravar(chave, chave)
+        relogio[0] += 1
+    cache.obter("a")  # "b" passa a ser a menos usada
+    relogio[0] += 1
+    cache.gravar("c", "c")
+
+    assert [cache.obter(chave) for chave in ("a", "b", "c")] == ["a", None, "c"]
+    assert cache.estatisticas()['despejados'] == 1
+
+
+def test_namespaces_nao_se_misturam(tmp_path):
+    caminho = str(tmp_path / "cache.db")
+    ddgs = CachePersistente("ddgs", ttl_segundos=60, max_entradas=1, caminho=caminho)
+    llm = CachePersistente("llm", ttl_segundos=60, max_entradas=1, caminho=caminho)
+    ddgs.gravar("x", 1)
+    llm.gravar("x", 2)
+    assert (ddgs.obter("x"), llm.obter("x")) == (1, 2)
+
+
+def test_conexao_abre_no_primeiro_uso_e_reabre_apos_fork(tmp_path, monkeypatch):
+    caminho = tmp_path / "cache.db"
+    cache = CachePersistente("teste", ttl_segundos=60, max_entradas=10, caminho=str(caminho))
+    # Nada aberto na construção (o master do gunicorn constrói e faz o fork)
+    assert not caminho.exists()
+
+    cache.gravar("a", 1)
+    conexao_pai = cache._conn
+    assert cache._conn is conexao_pai
+
+    pid_filho = os.getpid() + 1
+    monkeypatch.setattr(cache_persistente.os, "getpid", lambda: pid_filho)
+    assert cache._conn is not conexao_pai
+    assert cache.obter("a") == 1
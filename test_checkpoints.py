@@ -0,0 +1,46 @@
+from checkpoints import ArmazemCheckpoints, chave_pessoa
+
+
+def test_tentativa_incompleta_e_retomada_com_as_fases_gravadas(tmp_path):
+    armazem = ArmazemCheckpoints(caminho=str(tmp_path / "checkpoints.db"), ativo=True)
+    primeira = armazem.retomar_ou_iniciar("Fulano de Tal", "Vereador")
+    assert not primeira.retomada
+    primeira.gravar('busca', [{'href': 'https://exemplo.com/1'}])
+
+    # Caixa e espaços não mudam a pessoa
+    segunda = armazem.retomar_ou_iniciar("  fulano  DE tal ", "vereador")
+    assert segunda.retomada
+    assert segunda.run_id == primeira.run_id
+    assert segunda.obter('busca') == [{'href': 'https://exemplo.com/1'}]
+    assert segunda.obter('llm') is None
+    assert armazem.estatisticas()['fases_reaproveitadas'] == 1
+
+
+def test_execucao_concluida_nao_e_retomada(tmp_path):
+    armazem = ArmazemCheckpoints(caminho=str(tmp_path / "checkpoints.db"), ativo=True)
+    execucao = armazem.retomar_ou_iniciar("Fulano de Tal")
+    execucao.gravar('busca', [])
+    execucao.concluir()
+
+    nova = armazem.retomar_ou_iniciar("Fulano de Tal")
+    assert not nova.retomada
+    assert nova.run_id != execucao.run_id
+
+
+def test_execucao_velha_demais_comeca_do_zero(tmp_path, monkeypatch):
+    import checkpoints
+
+    armazem = ArmazemCheckpoints(caminho=str(tmp_path / "checkpoints.db"), ttl_segundos=60, ativo=True)
+    agora = 1_000_000.0
+    monkeypatch.setattr(checkpoints.time, 'time', lambda: agora)
+    armazem.retomar_ou_iniciar("Fulano de Tal").gravar('busca', [])
+
+    agora += 61
+    assert not armazem.retomar_ou_iniciar("Fulano de Tal").retomada
+
+
+def test_checkpoints_desativados_nao_gravam(tmp_path):
+    armazem = ArmazemCheckpoints(caminho=str(tmp_path / "checkpoints.db"), ativo=False)
+    armazem.retomar_ou_iniciar("Fulano de Tal").gravar('busca', [1])
+    assert armazem.retomar_ou_iniciar("Fulano de Tal").obter('busca') is None
+    assert chave_pessoa(" Fulano  de Tal ", None) == "fulano de tal|"
@@ -0,0 +1,90 @@
+import functools
+import threading
+
+import pytest
+
+from agendador import AgendadorAnalises
+from coalescencia import Coalescedor
+from jobs import GerenciadorJobs
+
+
+def test_jobs_e_pedido_sincrono_da_mesma_pessoa_nao_travam_o_agendador(tmp_path, esperar):
+    # Mesma composição do app: coalescedor primeiro, agendador só para o líder
+    agendador = AgendadorAnalises(capacidade=2, reserva_interativa=1)
+    coalescedor = Coalescedor("teste", timeout=10)
+    jobs = GerenciadorJobs(agendador, coalescedor, caminho=str(tmp_path / "jobs.db"))
+    execucoes = []
+
+    def analisar(nome, ao_mudar_fase=None):
+        execucoes.append(nome)
+        return {'id': 1, 'analise': nome}
+
+    def analisar_coalescido(nome):
+        saida, _ = coalescedor.executar(nome, agendador.executar, analisar, nome, prioridade=agendador.INTERATIVA)
+        return saida
+
+    # As duas vagas ocupadas por análises de outras pessoas
+    liberar = threading.Event()
+    ocupando = [agendador.submeter(liberar.wait, 10) for _ in range(2)]
+    esperar(lambda: agendador.estatisticas()['ativas_interativa'] == 2)
+
+    # Dois jobs assíncronos para X, depois um POST síncrono para X
+    ids = [jobs.submeter(functools.partial(analisar, "X"), chave="X", nome="X") for _ in range(2)]
+    resultado_sincrono = {}
+    sincrono = threading.Thread(target=lambda: resultado_sincrono.update(saida=analisar_coalescido("X")))
+    sincrono.start()
+
+    # Só o job líder espera vaga; o outro job e o síncrono acompanham o voo sem tocar no agendador
+    esperar(lambda: coalescedor.estatisticas()['aguardando'] == 2)
+    estado = agendador.estatisticas()
+    assert estado['ativas_interativa'] == 2
+    assert estado['fila_interativa'] == 1
+    assert jobs.obter(ids[1])['fase'] == 'aguardando_analise_em_andamento'
+
+    liberar.set()
+    sincrono.join(5)
+    assert not sincrono.is_alive()
+    for futuro in ocupando:
+        futuro.result(5)
+    esperar(lambda: all(jobs.obter(job_id)['status'] == jobs.CONCLUIDO for job_id in ids))
+
+    assert execucoes == ["X"]
+    assert resultado_sincrono['saida'] == {'id': 1, 'analise': "X"}
+    assert all(jobs.obter(job_id)['resultado'] == {'id': 1, 'analise': "X"} for job_id in ids)
+
+
+def test_seguidor_desiste_apos_timeout(esperar):
+    coalescedor = Coalescedor("teste", timeout=0.1)
+    liberar = threading.Event()
+    lider = threading.Thread(target=coalescedor.executar, args=("X", liberar.wait, 5))
+    lider.start()
+    esperar(lambda: coalescedor.estatisticas()['em_voo'] == 1)
+
+    with pytest.raises(TimeoutError):
+        coalescedor.executar("X", lambda: None)
+
+    liberar.set()
+    lider.join(5)
+    estado = coalescedor.estatisticas()
+    assert estado['timeouts'] == 1
+    assert estado['aguardando'] == 0
+    assert estado['em_voo'] == 0
+
+
+def test_acompanhar_desiste_apos_timeout(esperar):
+    coalescedor = Coalescedor("teste", timeout=0.1)
+    voo, _ = coalescedor.iniciar("X")
+    _, lider = coalescedor.iniciar("X")
+    assert not lider
+    recebidos = []
+    coalescedor.acompanhar(voo, lambda resultado, erro: recebidos.append((resultado, erro)))
+
+    esperar(lambda: recebidos)
+    [(resultado, erro)] = recebidos
+    assert resultado is None and isinstance(erro, TimeoutError)
+    assert coalescedor.estatisticas()['aguardando'] == 0
+
+    # O líder que termina depois não chama o callback de novo
+    coalescedor.concluir("X", voo, resultado=1)
+    assert len(recebidos) == 1
+    assert coalescedor.estatisticas()['timeouts'] == 1
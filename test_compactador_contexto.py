@@ -0,0 +1,44 @@
+import copy
+import json
+
+from compactador_contexto import compactar_resultados, estimar_tokens
+
+
+ASSUNTOS = ['licitação', 'obra', 'saúde', 'escola', 'estrada', 'ponte', 'hospital', 'creche', 'praça', 'ônibus']
+
+
+def _resultado(i, fonte='blog.exemplo.com'):
+    # Textos distintos por resultado, para o agrupador de duplicatas não juntar nenhum
+    assunto = ' '.join(ASSUNTOS[(i + k) % len(ASSUNTOS)] + str(i * 7 + k) for k in range(6))
+    return {
+        'href': f'https://{fonte}/materia-{i}',
+        'title': f'{assunto} com Fulano de Tal',
+        'body': f'Fulano de Tal comentou {assunto}. ' + 'Frase sem a pessoa. ' * 20,
+    }
+
+
+def test_compactacao_respeita_o_orcamento_de_tokens():
+    resultados = [_resultado(i) for i in range(30)]
+    original = copy.deepcopy(resultados)
+
+    compactados = compactar_resultados('Fulano de Tal', resultados, orcamento_tokens=300)
+
+    custo = sum(estimar_tokens(json.dumps(item, ensure_ascii=False)) for item in compactados)
+    assert 0 < len(compactados) < len(resultados)
+    assert custo <= 300
+    assert resultados == original
+
+
+def test_compactacao_prioriza_fontes_oficiais_e_corta_frases_sem_a_pessoa():
+    resultados = [_resultado(i) for i in range(5)] + [_resultado(99, fonte='www.tse.jus.br')]
+
+    compactados = compactar_resultados('Fulano de Tal', resultados, orcamento_tokens=10_000)
+
+    assert compactados[0]['href'] == 'https://www.tse.jus.br/materia-99'
+    assert all('Frase sem a pessoa' not in item['body'] for item in compactados)
+    assert all('Fulano de Tal' in item['body'] for item in compactados)
+
+
+def test_primeiro_resultado_entra_mesmo_acima_do_orcamento():
+    compactados = compactar_resultados('Fulano de Tal', [_resultado(1)], orcamento_tokens=1)
+    assert len(compactados) == 1
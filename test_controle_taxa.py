@@ -0,0 +1,116 @@
+import threading
+import time
+
+from controle_taxa import ControleConcorrenciaAIMD, DisjuntorCircuito, LimitadorTokenBucket
+
+
+def test_token_bucket_libera_o_burst_e_depois_segue_a_taxa():
+    limitador = LimitadorTokenBucket(taxa_por_segundo=20, capacidade=3)
+    inicio = time.monotonic()
+    esperas = [limitador.adquirir() for _ in range(3)]
+    assert esperas == [0.0, 0.0, 0.0]
+
+    # Burst esgotado: as próximas 4 saem a ~20/s
+    for _ in range(4):
+        limitador.adquirir()
+    assert time.monotonic() - inicio >= 4 / 20 * 0.9
+    assert limitador.estado()['total_adquiridos'] == 7
+
+
+def test_token_bucket_e_compartilhado_entre_threads():
+    limitador = LimitadorTokenBucket(taxa_por_segundo=50, capacidade=1)
+    inicio = time.monotonic()
+    threads = [threading.Thread(target=lambda: [limitador.adquirir() for _ in range(5)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # 20 tokens, 1 no balde: ~19/50 s no total, não 19/50 por thread
+    decorrido = time.monotonic() - inicio
+    assert 19 / 50 * 0.9 <= decorrido < 2
+    assert limitador.estado()['total_adquiridos'] == 20
+
+
+def test_taxa_zero_nao_limita():
+    limitador = LimitadorTokenBucket(taxa_por_segundo=0)
+    assert all(limitador.adquirir() == 0.0 for _ in range(100))
+
+
+def test_aimd_cresce_aditivo_e_cai_multiplicativo_uma_vez_por_episodio():
+    controle = ControleConcorrenciaAIMD(limite_inicial=4, limite_maximo=8, intervalo_reducao=60)
+    for _ in range(8):
+        controle.adquirir()
+        controle.liberar(True)
+    # +1/limite por sucesso: ~+1 a cada janela cheia de sucessos
+    assert 5 < controle.limite < 6
+
+    limite = controle.limite
+    for _ in range(3):
+        controle.adquirir()
+        controle.liberar(False)
+    # Erros do mesmo episódio reduzem o limite uma só vez
+    assert controle.limite == limite * 0.5
+    assert controle.estado()['reducoes'] == 1 and controle.estado()['erros'] == 3
+
+
+def test_aimd_respeita_minimo_e_bloqueia_acima_do_limite(esperar):
+    controle = ControleConcorrenciaAIMD(limite_inicial=1, limite_minimo=1, intervalo_reducao=0)
+    controle.adquirir()
+    controle.liberar(False)
+    assert controle.limite == 1
+
+    controle.adquirir()
+    entrou = threading.Event()
+    thread = threading.Thread(target=lambda: (controle.adquirir(), entrou.set()))
+    thread.start()
+    assert not entrou.wait(0.1)
+
+    controle.liberar(None)  # Só libera a vaga, sem mexer no limite
+    esperar(entrou.is_set)
+    assert controle.limite == 1 and controle.estado()['em_voo'] == 1
+
+
+def test_disjuntor_abre_no_limiar_e_fecha_pela_sonda():
+    disjuntor = DisjuntorCircuito(limiar_falhas=2, resfriamento=0.05, resfriamento_maximo=0.08)
+    disjuntor.registrar_falha()
+    assert disjuntor.estado_atual == DisjuntorCircuito.FECHADO
+    disjuntor.registrar_falha()
+    assert disjuntor.estado_atual == DisjuntorCircuito.ABERTO
+
+    # Sucesso atrasado de uma requisição anterior não fecha o circuito
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado_atual == DisjuntorCircuito.ABERTO
+
+    inicio = time.monotonic()
+    disjuntor.aguardar()
+    assert time.monotonic() - inicio >= 0.04
+    assert disjuntor.estado_atual == DisjuntorCircuito.MEIO_ABERTO
+
+    # Sonda falhou: reabre com o resfriamento dobrado, limitado ao máximo
+    disjuntor.registrar_falha()
+    assert disjuntor.estado_atual == DisjuntorCircuito.ABERTO
+    assert disjuntor.estado()['resfriamento_atual'] == 0.08
+
+    disjuntor.aguardar()
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado() == {
+        'estado': DisjuntorCircuito.FECHADO, 'falhas_consecutivas': 0, 'aberturas': 2,
+        'resfriamento_atual': 0.05, 'segundos_para_reabrir': 0.0,
+    }
+
+
+def test_disjuntor_meio_aberto_deixa_passar_uma_sonda_por_vez():
+    disjuntor = DisjuntorCircuito(limiar_falhas=1, resfriamento=0)
+    disjuntor.registrar_falha()
+    disjuntor.aguardar()  # A sonda
+
+    liberadas = []
+    thread = threading.Thread(target=lambda: (disjuntor.aguardar(), liberadas.append(True)))
+    thread.start()
+    thread.join(0.1)
+    assert liberadas == []
+
+    disjuntor.registrar_sucesso()
+    thread.join(5)
+    assert liberadas == [True]
@@ -0,0 +1,57 @@
+import random
+
+from duplicatas import AgrupadorDuplicatas, distancia_hamming, simhash
+
+
+def _resultado(titulo, corpo, href):
+    return {'title': titulo, 'body': corpo, 'href': href}
+
+
+def test_noticia_replicada_entra_no_grupo_do_primeiro_portal():
+    agrupador = AgrupadorDuplicatas()
+    corpo = ("O Tribunal de Contas do Estado abriu investigação sobre o contrato de merenda "
+             "assinado pelo secretário Ana Souza em março, segundo o Ministério Público")
+    original = _resultado("TCE investiga contrato de merenda", corpo, "https://a.com/1")
+    copia = _resultado("TCE investiga contrato de merenda escolar", corpo + ".", "https://b.com/2")
+    outra = _resultado("Ana Souza inaugura escola", "Cerimônia reuniu professores e alunos no bairro", "https://c.com/3")
+
+    assert agrupador.adicionar(original)
+    assert not agrupador.adicionar(copia)
+    assert agrupador.adicionar(outra)
+    assert original['duplicatas'] == 1
+    assert original['fontes_similares'] == ["https://b.com/2"]
+    assert 'duplicatas' not in outra
+
+
+def test_duplicata_de_um_representante_soma_as_copias_dele():
+    agrupador = AgrupadorDuplicatas()
+    texto = "Prefeito é alvo de operação da Polícia Federal por desvio de verbas da saúde"
+    representante = _resultado(texto, "", "https://a.com")
+    assert agrupador.adicionar(representante)
+    assert not agrupador.adicionar({**_resultado(texto, "", "https://b.com"), 'duplicatas': 2})
+    assert representante['duplicatas'] == 3
+
+
+def test_bandas_encontram_todas_as_assinaturas_dentro_da_distancia():
+    # Casa dos pombos: distância <= d garante uma banda idêntica entre as d+1
+    agrupador = AgrupadorDuplicatas(distancia_maxima=12)
+    aleatorio = random.Random(1)
+    base = aleatorio.getrandbits(64)
+    agrupador._representantes.append((base, {'href': 'base'}))
+    for banda, chave in zip(agrupador._bandas, agrupador._chaves_bandas(base)):
+        banda.setdefault(chave, []).append(0)
+
+    for distancia in range(0, 20):
+        bits = aleatorio.sample(range(64), distancia)
+        vizinha = base
+        for bit in bits:
+            vizinha ^= 1 << bit
+        encontrado = agrupador.encontrar_representante(vizinha)
+        assert (encontrado is not None) == (distancia <= 12), distancia
+
+
+def test_simhash_de_textos_parecidos_fica_proximo():
+    a = simhash("Deputado é condenado por improbidade administrativa pelo Tribunal de Justiça do Paraná")
+    b = simhash("Deputado é condenado por improbidade administrativa pelo Tribunal de Justiça do Paraná hoje")
+    c = simhash("Time da capital vence clássico e assume a liderança do campeonato estadual")
+    assert distancia_hamming(a, b) < distancia_hamming(a, c)
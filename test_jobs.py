@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+import jobs as modulo_jobs
+from agendador import AgendadorAnalises
+from coalescencia import Coalescedor
+from jobs import GerenciadorJobs
+
+
+@pytest.fixture
+def gerenciador(tmp_path):
+    return GerenciadorJobs(AgendadorAnalises(capacidade=2, reserva_interativa=1), Coalescedor("teste"),
+                           caminho=str(tmp_path / "jobs.db"))
+
+
+def test_jobs_rodam_nas_vagas_do_agendador_sem_thread_por_job(gerenciador, esperar):
+    liberar = threading.Event()
+    threads_antes = threading.active_count()
+
+    def analisar(ao_mudar_fase):
+        ao_mudar_fase('busca')
+        liberar.wait(5)
+        return "ok"
+
+    ids = [gerenciador.submeter(analisar, nome=f"P{i}") for i in range(20)]
+    esperar(lambda: gerenciador.pendentes() == 18)
+
+    # Só os trabalhadores do agendador: o resto espera na fila, sem thread
+    assert gerenciador.agendador.estatisticas()['ativas_interativa'] == 2
+    assert threading.active_count() - threads_antes <= gerenciador.agendador.capacidade
+
+    liberar.set()
+    esperar(lambda: all(gerenciador.obter(job_id)['status'] == gerenciador.CONCLUIDO for job_id in ids))
+    assert gerenciador.obter(ids[0])['resultado'] == "ok"
+
+
+def test_erro_do_lider_chega_aos_jobs_seguidores(gerenciador, esperar):
+    liberar = threading.Event()
+
+    def falhar(ao_mudar_fase):
+        ao_mudar_fase('busca')
+        liberar.wait(5)
+        raise RuntimeError("busca indisponível")
+
+    ids = [gerenciador.submeter(falhar, chave="x|", nome="X") for _ in range(3)]
+    esperar(lambda: gerenciador.obter(ids[0])['fase'] == 'busca')
+    liberar.set()
+
+    esperar(lambda: all(gerenciador.obter(job_id)['status'] == gerenciador.ERRO for job_id in ids))
+    assert {gerenciador.obter(job_id)['erro'] for job_id in ids} == {"busca indisponível"}
+    # O agendador só conta a execução depois que o job já foi finalizado
+    esperar(lambda: gerenciador.agendador.estatisticas()['executadas_interativa'] == 1)
+
+
+def test_job_orfao_de_worker_reiniciado_vira_erro(tmp_path, esperar, monkeypatch):
+    caminho = str(tmp_path / "jobs.db")
+    liberar = threading.Event()
+    antigo = GerenciadorJobs(AgendadorAnalises(capacidade=1), Coalescedor("teste"), caminho=caminho)
+    job_id = antigo.submeter(lambda fase: (fase('busca'), liberar.wait(5)), nome="X")
+    esperar(lambda: antigo.obter(job_id)['fase'] == 'busca')
+
+    # O worker novo só conhece o job pelo SQLite; o pid gravado não existe mais
+    monkeypatch.setattr(modulo_jobs, '_processo_vivo', lambda pid: False)
+    monkeypatch.setattr(modulo_jobs.os, 'getpid', lambda: -1)
+    novo = GerenciadorJobs(AgendadorAnalises(capacidade=1), Coalescedor("teste"), caminho=caminho)
+    job = novo.obter(job_id)
+    liberar.set()
+
+    assert job['status'] == novo.ERRO
+    assert job['erro'] == modulo_jobs.MENSAGEM_INTERROMPIDO
+    assert job['dados'] == {'nome': "X"}
+    assert novo.obter("inexistente") is None
+
+
+def test_saida_do_processo_marca_jobs_em_andamento(gerenciador, esperar):
+    liberar = threading.Event()
+    rodando = gerenciador.submeter(lambda fase: (fase('busca'), liberar.wait(5)))
+    esperar(lambda: gerenciador.obter(rodando)['fase'] == 'busca')
+
+    gerenciador.interromper_pendentes()
+    liberar.set()
+    # A tarefa termina depois da interrupção e não pode desfazê-la
+    esperar(lambda: gerenciador.agendador.estatisticas()['executadas_interativa'] == 1)
+    assert gerenciador.obter(rodando)['status'] == gerenciador.ERRO
+
+    outro = GerenciadorJobs(caminho=gerenciador.caminho)
+    assert outro.obter(rodando)['status'] == outro.ERRO
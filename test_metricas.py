@@ -0,0 +1,47 @@
+from metricas import RegistroMetricas
+
+
+def test_exportacao_no_formato_texto_do_prometheus():
+    registro = RegistroMetricas()
+    contador = registro.contador("erros_total", "Erros por componente", ("componente",))
+    histograma = registro.histograma("duracao_segundos", "Duração", ("rota",), buckets=(0.1, 1))
+    registro.coletor("fila", lambda: {'na_fila': 3, 'ativo': True, 'nome': 'ignorado', 'etapas': {'busca': 1.5}})
+
+    contador.inc(componente='db')
+    contador.inc(2, componente='http')
+    histograma.observar(0.05, rota='/api')
+    histograma.observar(0.5, rota='/api')
+    histograma.observar(5, rota='/api')
+
+    assert registro.exportar().splitlines() == [
+        '# HELP erros_total Erros por componente',
+        '# TYPE erros_total counter',
+        'erros_total{componente="db"} 1',
+        'erros_total{componente="http"} 2',
+        '# HELP duracao_segundos Duração',
+        '# TYPE duracao_segundos histogram',
+        'duracao_segundos_bucket{rota="/api",le="0.1"} 1',
+        'duracao_segundos_bucket{rota="/api",le="1.0"} 2',
+        'duracao_segundos_bucket{rota="/api",le="+Inf"} 3',
+        'duracao_segundos_sum{rota="/api"} 5.55',
+        'duracao_segundos_count{rota="/api"} 3',
+        '# TYPE fila_na_fila gauge',
+        'fila_na_fila 3',
+        '# TYPE fila_ativo gauge',
+        'fila_ativo 1',
+        '# TYPE fila_etapas_busca gauge',
+        'fila_etapas_busca 1.5',
+    ]
+
+
+def test_rotulos_sao_escapados_e_coletor_com_falha_nao_derruba_a_exportacao():
+    registro = RegistroMetricas()
+    registro.contador("c_total", "c", ("rota",)).inc(rota='a"b\\c\nd')
+    registro.coletor("quebrado", lambda: 1 / 0)
+
+    assert registro.exportar() == '# HELP c_total c\n# TYPE c_total counter\nc_total{rota="a\\"b\\\\c\\nd"} 1\n'
+
+
+def test_mesmo_nome_devolve_a_mesma_metrica():
+    registro = RegistroMetricas()
+    assert registro.contador("x_total", "x") is registro.contador("x_total", "outra ajuda")
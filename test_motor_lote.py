@@ -0,0 +1,156 @@
+import threading
+
+from agendador import AgendadorAnalises
+from checkpoints import chave_pessoa
+from coalescencia import Coalescedor
+from motor_lote import MotorLote
+
+
+class AnalisadorFalso:
+    tamanho_lote_llm = 1
+
+    def __init__(self):
+        self.analisados = []
+
+    def candidato_lote(self, resultados):
+        return False
+
+    def etapa_busca(self, nome, cargo, estado):
+        return None, None, [{'title': nome}], None
+
+    def etapa_llm(self, nome, cargo, execucao, resultados, motivo):
+        self.analisados.append(nome)
+        return {'risco_reputacao': 'baixo', 'polemicas': []}
+
+
+def _threads_do_motor():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("motor-")]
+
+
+def test_lote_passa_pelo_agendador_e_acompanha_analise_em_andamento(esperar):
+    agendador = AgendadorAnalises(capacidade=2, reserva_interativa=1)
+    coalescedor = Coalescedor("teste", timeout=10)
+    analisador = AnalisadorFalso()
+
+    # Uma análise interativa de "Ana" já está em voo quando o lote chega
+    voo, lider = coalescedor.iniciar(chave_pessoa("Ana", ""))
+    assert lider
+
+    motor = MotorLote(analisador, agendador=agendador, cliente="lote-1", coalescedor=coalescedor,
+                      espera_grupo_llm=0.1)
+    gerador = motor.processar([{'nome': "Ana"}, {'nome': "Bia"}, {'nome': "Caio"}])
+    resultados = [next(gerador), next(gerador)]
+    assert sorted(r['nome'] for r in resultados) == ["Bia", "Caio"]
+
+    coalescedor.concluir(chave_pessoa("Ana", ""), voo, resultado={'id': 7, 'analise': {'risco_reputacao': 'alto'}})
+    ana = next(gerador)
+    assert (ana['nome'], ana['id'], ana['risco_reputacao']) == ("Ana", 7, 'alto')
+    assert list(gerador) == []
+
+    assert sorted(analisador.analisados) == ["Bia", "Caio"]
+    # Só vagas de lote, todas devolvidas no fim
+    esperar(lambda: agendador.estatisticas()['ativas_lote'] == 0)
+    assert agendador.estatisticas()['fila_lote'] == 0
+    assert agendador.estatisticas()['executadas_interativa'] == 0
+    assert coalescedor.estatisticas()['em_voo'] == 0
+    esperar(lambda: not _threads_do_motor())
+
+
+def test_cliente_desconectado_libera_fila_do_agendador_e_threads(esperar):
+    agendador = AgendadorAnalises(capacidade=2, reserva_interativa=1)
+    coalescedor = Coalescedor("teste", timeout=10)
+    analisador = AnalisadorFalso()
+
+    # A única vaga de lote está ocupada: o motor espera a dele na fila do agendador
+    liberar = threading.Event()
+    ocupando = agendador.submeter(liberar.wait, 5, prioridade=agendador.LOTE, cliente="outro")
+    esperar(lambda: agendador.estatisticas()['ativas_lote'] == 1)
+
+    # "Ana" só acompanha uma análise em andamento: sai sem precisar de vaga
+    voo, _ = coalescedor.iniciar(chave_pessoa("Ana", ""))
+    motor = MotorLote(analisador, agendador=agendador, cliente="lote-1", coalescedor=coalescedor,
+                      workers_busca=2, tamanho_fila=2)
+    gerador = motor.processar([{'nome': "Ana"}] + [{'nome': f"Pessoa {i}"} for i in range(20)])
+
+    def concluir_ana():
+        esperar(lambda: coalescedor.estatisticas()['aguardando'] == 1)
+        coalescedor.concluir(chave_pessoa("Ana", ""), voo, resultado={'id': 1, 'analise': {}})
+
+    threading.Thread(target=concluir_ana).start()
+    assert next(gerador)['nome'] == "Ana"
+    assert agendador.estatisticas()['fila_lote'] == 1
+
+    # Cliente sai com o resto do lote esperando vaga
+    gerador.close()
+    esperar(lambda: agendador.estatisticas()['fila_lote'] == 0)
+    esperar(lambda: not _threads_do_motor())
+    assert coalescedor.estatisticas()['em_voo'] == 0
+
+    liberar.set()
+    ocupando.result(5)
+    assert analisador.analisados == []
+
+
+def test_busca_e_llm_se_sobrepoem_com_o_agendador_padrao(esperar):
+    agendador = AgendadorAnalises()
+    llm_de_ana_comecou = threading.Event()
+    busca_de_bia_em_andamento = threading.Event()
+
+    class AnalisadorSobreposto(AnalisadorFalso):
+        def etapa_busca(self, nome, cargo, estado):
+            if nome == "Bia":
+                # Só termina se o LLM de Ana estiver rodando ao mesmo tempo
+                assert llm_de_ana_comecou.wait(5)
+                busca_de_bia_em_andamento.set()
+            return super().etapa_busca(nome, cargo, estado)
+
+        def etapa_llm(self, nome, cargo, execucao, resultados, motivo):
+            if nome == "Ana":
+                llm_de_ana_comecou.set()
+                assert busca_de_bia_em_andamento.wait(5)
+            return super().etapa_llm(nome, cargo, execucao, resultados, motivo)
+
+    analisador = AnalisadorSobreposto()
+    motor = MotorLote(analisador, agendador=agendador, cliente="lote-1", workers_busca=2, workers_llm=2)
+    resultados = list(motor.processar([{'nome': "Ana"}, {'nome': "Bia"}]))
+
+    assert [r['erro'] for r in resultados] == [None, None]
+    assert sorted(analisador.analisados) == ["Ana", "Bia"]
+    esperar(lambda: agendador.estatisticas()['executadas_lote'] == 1)
+    esperar(lambda: not _threads_do_motor())
+
+
+def test_lider_de_lote_na_fila_atras_do_motor_nao_trava_o_lote(esperar):
+    agendador = AgendadorAnalises()
+    coalescedor = Coalescedor("teste", timeout=10)
+    continuar = threading.Event()
+
+    class AnalisadorLento(AnalisadorFalso):
+        def etapa_busca(self, nome, cargo, estado):
+            assert continuar.wait(5)
+            return super().etapa_busca(nome, cargo, estado)
+
+    # Outro cliente (pack.py, job assíncrono) já lidera a análise de "Xavier"...
+    chave = chave_pessoa("Xavier", "")
+    voo, _ = coalescedor.iniciar(chave)
+    analisador = AnalisadorLento()
+    motor = MotorLote(analisador, agendador=agendador, cliente="lote-1", coalescedor=coalescedor)
+    resultados = []
+    consumidor = threading.Thread(target=lambda: resultados.extend(
+        motor.processar([{'nome': "Ana"}, {'nome': "Xavier"}])))
+    consumidor.start()
+    esperar(lambda: agendador.estatisticas()['ativas_lote'] == 1 and coalescedor.estatisticas()['aguardando'] == 1)
+
+    # ...e só agora pede vaga de lote, atrás da vaga que o motor ocupa
+    lider = agendador.submeter(lambda: {'id': 9, 'analise': {'risco_reputacao': 'medio'}},
+                               prioridade=agendador.LOTE, cliente="pack")
+    lider.add_done_callback(lambda f: coalescedor.concluir(chave, voo, resultado=f.result()))
+    continuar.set()
+
+    consumidor.join(10)
+    assert not consumidor.is_alive()
+    assert sorted((r['nome'], r['id']) for r in resultados) == [("Ana", None), ("Xavier", 9)]
+    assert analisador.analisados == ["Ana"]
+    esperar(lambda: not _threads_do_motor())
+    estado = agendador.estatisticas()
+    assert (estado['fila_lote'], estado['ativas_lote']) == (0, 0)
@@ -0,0 +1,99 @@
+import buscador_duck
+import planejador_queries
+from planejador_queries import PlanejadorQueries
+
+
+def _resultados(*urls):
+    return [{'href': url} for url in urls]
+
+
+def test_plano_ordena_pelo_rendimento_e_remove_repetidas(tmp_path):
+    planejador = PlanejadorQueries(caminho=str(tmp_path / "plano.db"))
+    for _ in range(5):
+        planejador.registrar('"{nome}" tcu', 8)
+        planejador.registrar('"{nome}" pf', 0)
+
+    plano = planejador.montar_plano([
+        ('"{nome}" pf', '"Ana" pf'),
+        ('"{nome}"', '"Ana"'),
+        ('"{nome}" tcu', '"Ana" tcu'),
+        ('"{nome}" pf', '"Ana" pf'),
+    ], ja_planejadas=['"Ana"'])
+
+    # Modelo sem histórico fica com o rendimento a priori, entre os dois
+    assert [query for _, query in plano] == ['"Ana" tcu', '"Ana" pf']
+
+
+def test_sessao_para_quando_o_ganho_marginal_cai(tmp_path):
+    sessao = PlanejadorQueries(caminho=str(tmp_path / "plano.db")).iniciar_sessao()
+    assert sessao.registrar("a", _resultados("u1", "u2", "u3")) == 3
+    # Sem URLs novas, mas ainda abaixo do mínimo de queries da fase
+    for modelo in ("b", "c"):
+        sessao.registrar(modelo, _resultados("u1", "u2"))
+        assert sessao.deve_continuar()
+
+    for modelo in ("d", "e", "f", "g"):
+        sessao.registrar(modelo, _resultados("u1"))
+    assert sessao.ganho_marginal() == 0
+    assert not sessao.deve_continuar()
+
+    # Nova fase recomeça a janela, mas as URLs já vistas continuam contando como repetidas
+    sessao.nova_fase()
+    assert sessao.deve_continuar()
+    assert sessao.registrar("i", _resultados("u1", "u9")) == 1
+
+
+def test_plano_executado_para_antes_de_esgotar_as_queries(tmp_path, monkeypatch):
+    planejador = PlanejadorQueries(caminho=str(tmp_path / "plano.db"))
+    monkeypatch.setattr(buscador_duck, 'DDGS_MODO_CONCORRENTE', False)
+    executadas = []
+
+    def query_falsa(query, numero, total):
+        executadas.append(query)
+        return _resultados("https://mesma-noticia")
+
+    monkeypatch.setattr(buscador_duck, '_executar_query_segura', query_falsa)
+    plano = [(f"m{i}", f"q{i}") for i in range(12)]
+    sessao = planejador.iniciar_sessao()
+    list(buscador_duck._executar_plano(plano, sessao))
+
+    assert len(executadas) == planejador_queries.PLANO_MINIMO_QUERIES
+    assert sessao.queries_executadas == len(executadas)
+
+
+def test_acerto_de_cache_nao_atualiza_nem_toma_o_credito_do_modelo(tmp_path):
+    planejador = PlanejadorQueries(caminho=str(tmp_path / "plano.db"))
+    sessao = planejador.iniciar_sessao()
+
+    # A query em cache roda primeiro: conta para o ganho marginal, mas não para o modelo
+    assert sessao.registrar("cacheado", _resultados("u1", "u2"), em_cache=True) == 2
+    assert sessao.registrar("rede", _resultados("u1", "u2", "u3")) == 1
+
+    assert "cacheado" not in planejador.rendimentos()
+    # As três URLs da busca na rede são creditadas a ela
+    linha = planejador._conn.execute(
+        "SELECT execucoes, urls_novas FROM estatisticas_queries WHERE modelo = 'rede'").fetchone()
+    assert linha == (1, 3)
+
+
+def test_plano_sabe_quais_queries_vieram_do_cache(tmp_path, monkeypatch):
+    from cache_persistente import CachePersistente
+
+    class BackendFalso:
+        usa_cache = True
+        usa_rede = True
+
+        def text(self, query, region, max_results, timelimit):
+            return _resultados("https://exemplo.com/nova")
+
+    cache = CachePersistente("ddgs", 3600, 100, caminho=str(tmp_path / "cache.db"))
+    cache.gravar(buscador_duck.gerar_chave("q0", 'br-pt', 10, 'y'), _resultados("https://exemplo.com/antiga"))
+    monkeypatch.setattr(buscador_duck, 'cache_ddgs', cache)
+    monkeypatch.setattr(buscador_duck, 'duck', BackendFalso())
+    monkeypatch.setattr(buscador_duck, '_validar_relevancia_resultado', lambda resultado, query: True)
+
+    planejador = PlanejadorQueries(caminho=str(tmp_path / "plano.db"))
+    list(buscador_duck._executar_plano([("m0", "q0"), ("m1", "q1")], planejador.iniciar_sessao()))
+
+    linhas = planejador._conn.execute("SELECT modelo, execucoes, urls_novas FROM estatisticas_queries").fetchall()
+    assert linhas == [("m1", 1, 1)]
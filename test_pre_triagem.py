@@ -0,0 +1,42 @@
+import pytest
+
+buscar = pytest.importorskip("buscar")
+
+
+def _resultado(texto, href='https://blog.exemplo.com/materia'):
+    return {'href': href, 'title': f'Fulano de Tal {texto}', 'body': texto}
+
+
+@pytest.fixture
+def analisador():
+    return buscar.AnalisadorUnificado(triagem_ativa=True, triagem_gravidade_maxima="baixa",
+                                      triagem_max_termos_negativos=0, triagem_peso_maximo=100)
+
+
+def test_resultados_sem_sinal_dispensam_o_llm(analisador):
+    sem_sinal, motivo = analisador._pre_triagem([_resultado("inaugurou uma praça"), _resultado("visitou a escola")])
+    assert sem_sinal
+    assert motivo == "nenhum sinal de risco em 2 resultados"
+
+
+@pytest.mark.parametrize("resultado, trecho", [
+    (_resultado("foi alvo de investigação"), "termos negativos"),
+    (_resultado("acusado de corrupção", href='https://noticia.exemplo.com/x'), "gravidade 'alta' em https://noticia.exemplo.com/x"),
+])
+def test_qualquer_sinal_de_risco_manda_para_o_llm(analisador, resultado, trecho):
+    sem_sinal, motivo = analisador._pre_triagem([_resultado("inaugurou uma praça"), resultado])
+    assert not sem_sinal
+    assert trecho in motivo
+
+
+def test_sinais_acumulados_na_busca_equivalem_ao_calculo_na_lista(analisador):
+    resultados = [_resultado("inaugurou uma praça"), _resultado("alvo de investigação", href='https://www.tse.jus.br/x')]
+    sinais = buscar.SinaisRisco(analisador._classificar_gravidade)
+    for resultado in resultados:
+        sinais.adicionar(resultado)
+    assert analisador._pre_triagem(resultados, sinais) == analisador._pre_triagem(resultados)
+
+
+def test_pre_triagem_desativada_sempre_chama_o_llm():
+    analisador = buscar.AnalisadorUnificado(triagem_ativa=False)
+    assert analisador._pre_triagem([_resultado("inaugurou uma praça")]) == (False, "pré-triagem desativada")
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+roteador_llm = pytest.importorskip("roteador_llm")
+from executor_llm import ExecutorLLM  # noqa: E402
+from prompts import marcar_acerto_cache_llm  # noqa: E402
+from roteador_llm import RoteadorLLM  # noqa: E402
+
+
+@pytest.fixture
+def prazos_curtos(monkeypatch):
+    monkeypatch.setattr(roteador_llm, 'LLM_HEDGE_PRAZO_PADRAO', 0.05)
+    monkeypatch.setattr(roteador_llm, 'LLM_HEDGE_PRAZO_MINIMO', 0.05)
+    monkeypatch.setattr(roteador_llm, 'LLM_HEDGE_AMOSTRAS_MINIMAS', 3)
+
+
+def test_acertos_de_cache_nao_entram_na_latencia_do_provedor(prazos_curtos):
+    def grok(nome, resultados):
+        marcar_acerto_cache_llm()
+        return {'nome': nome}
+
+    roteador = RoteadorLLM({'grok': grok}, executor=ExecutorLLM(max_em_voo=2, timeout=5))
+    for _ in range(10):
+        assert roteador.analisar('Fulano', [])['provedor_llm'] == 'grok'
+
+    estatisticas = roteador.estatisticas['grok']
+    assert len(estatisticas.latencias) == 0
+    assert estatisticas.percentil(0.95) is None
+    assert roteador.resumo()['grok']['chamadas'] == 0
+    # A marca de acerto fica fora da análise (gravada em checkpoints e artefatos)
+    assert set(roteador.analisar('Fulano', [])) == {'nome', 'provedor_llm'}
+
+
+def test_primario_lento_dispara_o_reserva_e_a_primeira_resposta_vence(prazos_curtos):
+    liberar_grok = threading.Event()
+
+    def grok(nome, resultados):
+        liberar_grok.wait(5)
+        return {'nome': nome}
+
+    def gemini(nome, resultados):
+        return {'nome': nome}
+
+    roteador = RoteadorLLM({'grok': grok, 'gemini': gemini}, executor=ExecutorLLM(max_em_voo=2, timeout=5))
+    try:
+        resultado = roteador.analisar('Fulano', [])
+    finally:
+        liberar_grok.set()
+
+    assert resultado['provedor_llm'] == 'gemini'
+    resumo = roteador.resumo()
+    assert resumo['gemini']['hedges_disparados'] == 1
+    assert resumo['gemini']['vitorias'] == 1
+
+
+def test_falha_do_primario_passa_para_o_reserva_sem_esperar_o_prazo(monkeypatch):
+    monkeypatch.setattr(roteador_llm, 'LLM_HEDGE_PRAZO_PADRAO', 30)
+    chamados = []
+
+    def grok(nome, resultados):
+        chamados.append('grok')
+        return {'error': 'limite de taxa'}
+
+    def gemini(nome, resultados):
+        chamados.append('gemini')
+        return {'nome': nome}
+
+    roteador = RoteadorLLM({'grok': grok, 'gemini': gemini}, executor=ExecutorLLM(max_em_voo=2, timeout=5))
+    assert roteador.analisar('Fulano', [])['provedor_llm'] == 'gemini'
+    assert chamados == ['grok', 'gemini']
+    assert roteador.estatisticas['grok'].taxa_erro() == 1.0
+
+
+def test_tempo_na_fila_do_executor_nao_conta_para_o_prazo_do_hedge(prazos_curtos):
+    chamados = []
+
+    def grok(nome, resultados):
+        chamados.append('grok')
+        return {'nome': nome}
+
+    def gemini(nome, resultados):
+        chamados.append('gemini')
+        return {'nome': nome}
+
+    # A única vaga do executor está ocupada bem além do prazo do hedge
+    executor = ExecutorLLM(max_em_voo=1, timeout=5)
+    liberar = threading.Event()
+    ocupando = executor.submeter(liberar.wait, 5)
+    threading.Timer(0.5, liberar.set).start()
+
+    roteador = RoteadorLLM({'grok': grok, 'gemini': gemini}, executor=executor)
+    assert roteador.analisar('Fulano', [])['provedor_llm'] == 'grok'
+    assert ocupando.result(5)
+    assert chamados == ['grok']
+    assert roteador.resumo()['gemini']['hedges_disparados'] == 0
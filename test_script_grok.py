@@ -0,0 +1,50 @@
+import pytest
+
+script_grok = pytest.importorskip("script_grok")
+from cache_persistente import CachePersistente  # noqa: E402
+
+
+@pytest.fixture
+def modelo_falso(tmp_path, monkeypatch):
+    """Lotes com mais de 2 pessoas saem inválidos; registra o tamanho de cada chamada"""
+    chamadas = []
+
+    def lote_unico(pessoas):
+        chamadas.append(len(pessoas))
+        if len(pessoas) > 2:
+            raise ValueError("JSON cortado")
+        return {script_grok._chave_nome(nome): {'risco_reputacao': 'BAIXO', 'polemicas': []} for nome, _ in pessoas}
+
+    def individual(nome, resultados):
+        chamadas.append(1)
+        return {'risco_reputacao': 'BAIXO', 'polemicas': [], 'individual': True}
+
+    monkeypatch.setattr(script_grok, '_analisar_lote_unico', lote_unico)
+    monkeypatch.setattr(script_grok, 'analisar_com_grok', individual)
+    monkeypatch.setattr(script_grok, 'cache_grok',
+                        CachePersistente('llm_grok', ttl_segundos=60, max_entradas=100, caminho=str(tmp_path / 'c.db')))
+    return chamadas
+
+
+def _pessoas(n):
+    return [(f'Pessoa {i}', [{'href': f'https://exemplo.com/{i}', 'title': f'Pessoa {i}', 'body': ''}])
+            for i in range(n)]
+
+
+def test_lote_invalido_e_dividido_ao_meio_ate_caber(modelo_falso):
+    pessoas = _pessoas(5)
+    analises = script_grok.analisar_lote_com_grok(pessoas)
+
+    # 5 falha -> 2 + 3; 3 falha -> 1 (individual) + 2
+    assert modelo_falso == [5, 2, 3, 1, 2]
+    assert len(analises) == 5 and all('error' not in analise for analise in analises)
+    assert analises[2].get('individual')
+
+
+def test_pessoas_do_lote_ficam_no_cache_individual(modelo_falso):
+    pessoas = _pessoas(2)
+    script_grok.analisar_lote_com_grok(pessoas)
+    modelo_falso.clear()
+
+    assert all('error' not in analise for analise in script_grok.analisar_lote_com_grok(pessoas))
+    assert modelo_falso == []
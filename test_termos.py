@@ -0,0 +1,142 @@
+import pytest
+
+from buscador_duck import _calcular_peso_relevancia, _validar_relevancia_resultado
+from termos import DICIONARIO_CONTEUDO, termos_resultado
+
+# Heurísticas como eram antes do DicionarioTermos: listas próprias e `any(termo in texto)`
+
+def _relevancia_antiga(resultado):
+    title = resultado.get('title', '').lower()
+    body = resultado.get('body', '').lower()
+    href = resultado.get('href', '').lower()
+    if any(fonte in href for fonte in ['wikipedia.org', 'instagram.com', 'facebook.com', 'youtube.com',
+                                       'linkedin.com', 'blogspot.com', 'wordpress.com']):
+        return False
+    pontuacao = 0
+    if any(fonte in href for fonte in ['.gov', '.jus', '.mp', 'tcu', 'tse', 'stf', 'stj',
+                                       'g1.globo.com', 'oglobo.globo.com', 'folha.com.br',
+                                       'estadao.com.br', 'valor.com.br', 'poder360.com.br',
+                                       'congressoemfoco.uol.com.br', 'metropoles.com']):
+        pontuacao += 3
+    texto_completo = f"{title} {body}"
+    for termo in ['processo', 'ação', 'tribunal', 'ministério público', 'justiça',
+                  'condenação', 'prisão', 'investigação', 'denúncia', 'licitação',
+                  'contrato', 'desvio', 'corrupção', 'fraude']:
+        if termo in texto_completo:
+            pontuacao += 1
+    for termo in ['receita federal', 'nota fiscal', 'certidão', 'agendamento',
+                  'marcar horário', 'agendar', 'consulta simples']:
+        if termo in texto_completo:
+            pontuacao -= 2
+    return pontuacao >= 1
+
+
+def _peso_antigo(resultado):
+    href = resultado.get('href', '').lower()
+    peso = 0
+    if any(dominio in href for dominio in ['.gov', '.jus', '.mp', 'tcu', 'tse']):
+        peso += 100
+    elif any(dominio in href for dominio in ['g1.globo.com', 'oglobo.globo.com', 'folha.com.br']):
+        peso += 50
+    title_body = f"{resultado.get('title', '')} {resultado.get('body', '')}".lower()
+    if any(termo in title_body for termo in ['processo', 'tribunal', 'ministério público']):
+        peso += 30
+    return peso
+
+
+def _gravidade_antiga(texto):
+    if not texto:
+        return "baixa"
+    texto = texto.lower()
+    if any(termo in texto for termo in ['absolvido', 'inocente', 'arquivado', 'improcedente',
+                                        'favorável', 'positivo', 'elogio', 'reconhecimento']):
+        return "baixa"
+    if any(termo in texto for termo in ['condenado', 'prisão', 'crime', 'lavagem de dinheiro', 'tráfico',
+                                        'assassinato', 'homicídio', 'pedofilia', 'estupro', 'racismo']):
+        return "critica"
+    if any(termo in texto for termo in ['corrupção', 'desvio', 'propina', 'improbidade', 'fraude',
+                                        'superfaturamento', 'licitação fraudulenta', 'caixa dois',
+                                        'sonegação fiscal', 'lavagem de capitais']):
+        return "alta"
+    if any(termo in texto for termo in ['investigação', 'processo', 'denúncia', 'inquérito', 'apuração',
+                                        'irregularidade', 'tribunal de contas', 'tce', 'mpf', 'pf']):
+        return "media"
+    return "baixa"
+
+
+def _categorias_antigas(texto):
+    texto = texto.lower()
+    categorias = []
+    if any(termo in texto for termo in ['licitação', 'contrato', 'pregão']):
+        categorias.append("Licitações")
+    if any(termo in texto for termo in ['eleição', 'campanha', 'doação']):
+        categorias.append("Eleitoral")
+    if any(termo in texto for termo in ['corrupção', 'desvio', 'propina']):
+        categorias.append("Corrupção")
+    if any(termo in texto for termo in ['processo', 'judicial', 'tribunal']):
+        categorias.append("Judicial")
+    return categorias or ["Outros"]
+
+
+def _contexto_antigo(resultados):
+    texto_completo = " ".join(
+        str(r.get('title', '')) + " " + str(r.get('body', '')) for r in resultados
+    ).lower()
+    positivos = ['positivo', 'favorável', 'elogio', 'reconhecimento', 'competente',
+                 'eficiente', 'confiança', 'honesto', 'íntegro', 'trabalho']
+    negativos = ['corrupção', 'fraude', 'crime', 'condenado', 'prisão',
+                 'irregularidade', 'denúncia', 'processo', 'investigação']
+    return (sum(1 for termo in positivos if termo in texto_completo),
+            sum(1 for termo in negativos if termo in texto_completo))
+
+
+RESULTADOS = [
+    {'title': "Ana Souza é CONDENADA? Tribunal analisa PROCESSO", 'body': "Ministério Público pede prisão",
+     'href': "https://www.tjpr.jus.br/noticia"},
+    {'title': "Investigação sobre desvio em licitação", 'body': "Propina e superfaturamento no pregão",
+     'href': "https://g1.globo.com/pr/parana"},
+    {'title': "Ana Souza recebe reconhecimento", 'body': "Trabalho eficiente e honesto, diz a campanha",
+     'href': "https://blog.exemplo.com"},
+    {'title': "Agendamento de certidão", 'body': "Receita Federal: marcar horário para nota fiscal",
+     'href': "https://www.gov.br/receitafederal"},
+    {'title': "Ação no TCE", 'body': "Apuração de irregularidade pelo MPF e pela PF",
+     'href': "https://pt.wikipedia.org/wiki/Ana"},
+    {'title': "Processo arquivado", 'body': "Caso de lavagem de capitais foi considerado improcedente",
+     'href': "https://www.folha.com.br/poder"},
+    {'title': "Eleição municipal", 'body': "Doação de campanha sem nenhuma irregularidade",
+     'href': "https://tcu.gov.br/contas"},
+    {'title': "", 'body': "", 'href': ""},
+]
+
+
+@pytest.mark.parametrize("resultado", RESULTADOS)
+def test_heuristicas_da_busca_iguais_as_antigas(resultado):
+    assert _validar_relevancia_resultado(resultado, "") == _relevancia_antiga(resultado)
+    assert _calcular_peso_relevancia(resultado) == _peso_antigo(resultado)
+
+
+@pytest.mark.parametrize("resultado", RESULTADOS)
+def test_heuristicas_de_conteudo_iguais_as_antigas(resultado):
+    buscar = pytest.importorskip("buscar")
+    analisador = buscar.AnalisadorUnificado()
+    texto = f"{resultado['title']} {resultado['body']}"
+    assert analisador._classificar_gravidade(texto) == _gravidade_antiga(texto)
+    assert analisador._extrair_categorias(texto) == _categorias_antigas(texto)
+
+
+def test_contagem_de_contexto_igual_a_do_texto_concatenado():
+    positivos, negativos = set(), set()
+    for resultado in RESULTADOS:
+        ocorrencias = termos_resultado(resultado)
+        positivos |= ocorrencias.termos('contexto_positivo')
+        negativos |= ocorrencias.termos('contexto_negativo')
+    assert (len(positivos), len(negativos)) == _contexto_antigo(RESULTADOS)
+
+
+def test_ocorrencias_em_cache_nao_podem_ser_alteradas():
+    texto = "Investigação de corrupção e fraude"
+    termos = DICIONARIO_CONTEUDO.analisar(texto).termos('contexto_negativo')
+    assert termos == {'corrupção', 'fraude', 'investigação'}
+    with pytest.raises(AttributeError):
+        termos.add('prisão')
+    assert DICIONARIO_CONTEUDO.analisar(texto).termos('contexto_negativo') == {'corrupção', 'fraude', 'investigação'}